@@ -1,3 +1,5 @@
+import copy
+import hashlib
 import html
 from difflib import SequenceMatcher
 import logging
@@ -6,11 +8,10 @@ import re
 
 import jsonpatch
 import lxml.html
-import lxml.html.builder
 from lxml import etree
 from xmldiff import main as xmldiff_main, formatting
 
-from indigo.xmlutils import unwrap_element
+from indigo.xmlutils import unwrap_element, load_xslt
 
 log = logging.getLogger(__name__)
 
@@ -21,9 +22,7 @@ class HTMLFormatter(formatting.XMLFormatter):
     xslt_filename = os.path.join(os.path.dirname(__file__), 'xmldiff.xslt')
 
     def render(self, result):
-        with open(self.xslt_filename) as f:
-            xslt = lxml.etree.fromstring(f.read())
-            transform = lxml.etree.XSLT(xslt)
+        transform = load_xslt(self.xslt_filename)
         result = transform(result)
 
         # XSLT doesn't let us add an element to an attribute, so here
@@ -37,6 +36,16 @@ class HTMLFormatter(formatting.XMLFormatter):
 
 class AKNHTMLDiffer:
     """ Helper class to diff AKN documents using xmldiff.
+
+    xmldiff is slow on large documents, so before using it, unchanged elements are aligned by their ids and a
+    hash of their content, and only the elements between the unchanged ones are given to xmldiff.
+    """
+    diff_version = 2
+    """ Increment this when changes to the differ (or to how documents are rendered as HTML) mean that previously
+    cached diffs must not be used.
+    """
+    align_elements = True
+    """ Should unchanged elements be aligned and skipped, rather than diffing the entire tree with xmldiff?
     """
     akn_text_tags = 'p listIntroduction heading'.split()
     html_text_tags = 'h1 h2 h3 h4 h5'.split()
@@ -61,12 +70,92 @@ class AKNHTMLDiffer:
         self.preprocess(old_tree)
         self.preprocess(new_tree)
 
-        formatter = self.get_formatter()
-        diff = xmldiff_main.diff_trees(old_tree, new_tree, formatter=formatter, diff_options=self.xmldiff_options)
+        if self.align_elements and self.can_align(old_tree, new_tree):
+            diff = self.diff_aligned(old_tree, new_tree)
+        else:
+            diff = self.diff_trees(old_tree, new_tree)
         self.postprocess(diff)
 
         return diff
 
+    def diff_trees(self, old_tree, new_tree):
+        """ Diff two trees with xmldiff, returning the annotated tree.
+        """
+        formatter = self.get_formatter()
+        return xmldiff_main.diff_trees(old_tree, new_tree, formatter=formatter, diff_options=self.xmldiff_options)
+
+    def diff_aligned(self, old, new):
+        """ Diff two elements that can be aligned (see can_align), by aligning their children. Children that are
+        unchanged are left as they are, changed children that can be aligned are diffed in the same way, and
+        everything else is diffed with xmldiff.
+
+        The new element is changed in place to include the differences, and returned.
+        """
+        old_children = list(old)
+        new_children = list(new)
+        matcher = SequenceMatcher(None,
+                                  [self.align_key(c) for c in old_children],
+                                  [self.align_key(c) for c in new_children],
+                                  autojunk=False)
+
+        # work backwards, so that the positions of earlier children don't change as later ones are replaced
+        for opcode, a0, a1, b0, b1 in reversed(matcher.get_opcodes()):
+            if opcode == 'equal':
+                continue
+
+            old_run = old_children[a0:a1]
+            new_run = new_children[b0:b1]
+
+            if len(old_run) == len(new_run) == 1 and old_run[0].tail == new_run[0].tail \
+                    and self.can_align(old_run[0], new_run[0]):
+                self.diff_aligned(old_run[0], new_run[0])
+            else:
+                self.diff_run(new, b0, old_run, new_run)
+
+        return new
+
+    def diff_run(self, parent, index, old_run, new_run):
+        """ Diff a run of old elements against a run of new elements with xmldiff, and replace the new elements,
+        which start at +index+ in +parent+, with the result.
+        """
+        # diff the runs inside identical wrappers; this moves the elements (with their tails) out of their parents.
+        # The wrappers must be in their own documents, because xmldiff searches (and changes) the whole document
+        # of the trees it diffs, which would otherwise include the runs that have already been diffed.
+        old_wrapper = etree.Element('div')
+        old_wrapper.extend(old_run)
+        new_wrapper = etree.Element('div')
+        new_wrapper.extend(new_run)
+
+        diff = self.diff_trees(old_wrapper, new_wrapper)
+        if hasattr(diff, 'getroot'):
+            diff = diff.getroot()
+
+        if diff.text:
+            # text before the first element belongs to the previous sibling's tail, or to the parent
+            if index > 0:
+                parent[index - 1].tail = (parent[index - 1].tail or '') + diff.text
+            else:
+                parent.text = (parent.text or '') + diff.text
+
+        for i, child in enumerate(list(diff)):
+            parent.insert(index + i, child)
+
+    def can_align(self, old, new):
+        """ Can the children of these elements be aligned? Only if the elements have the same tag, attributes and
+        text, ignoring their children. Elements that xmldiff treats as formatted text are always diffed whole.
+        """
+        return old.tag == new.tag and old.text == new.text and dict(old.attrib) == dict(new.attrib) \
+            and not self.is_text_element(new)
+
+    def is_text_element(self, element):
+        return element.tag in self.html_text_tags or element.get('class') in [f'akn-{t}' for t in self.akn_text_tags]
+
+    def align_key(self, element):
+        """ Elements with the same key are unchanged. This is the element's id (or eId) and a hash of its content,
+        including its tail.
+        """
+        return element.get('id', element.get('x-id')), hash(etree.tostring(element))
+
     def get_formatter(self):
         # in html, AKN elements are recognised using classes
         text_tags = [f'*[@class="akn-{t}"]' for t in self.akn_text_tags] + self.html_text_tags
@@ -280,6 +369,66 @@ class AttributeDiffer:
         n_changes = len(diff.xpath('//ins|//del|//*[contains(@class, "ins") or contains(@class, "del")]'))
         return n_changes, diff
 
+    def changed_elements(self, old_root, new_root):
+        """ Find the smallest elements with eIds that differ between two versions of a document, so that only
+        those elements need to be rendered and diffed. Metadata is ignored, since it isn't rendered.
+
+        Returns a list of (old, new) element pairs, or None if the documents differ outside of any element
+        with an eId (such as an inserted section), in which case the whole document must be diffed.
+        """
+        changed = []
+        if not self.find_changed_elements(old_root, new_root, changed):
+            return None
+        return changed
+
+    def find_changed_elements(self, old, new, changed):
+        """ Add the changed descendants of old and new to the changed list, and return True. If old and new
+        differ other than in their descendants with eIds, return False without changing the list.
+        """
+        if self.element_skeleton(old) != self.element_skeleton(new):
+            return False
+
+        # the skeletons are the same, so these are pairs with the same eIds
+        for old_child, new_child in zip(self.eid_descendants(old), self.eid_descendants(new)):
+            if self.element_hash(old_child) != self.element_hash(new_child):
+                if not self.find_changed_elements(old_child, new_child, changed):
+                    changed.append((old_child, new_child))
+
+        return True
+
+    def element_hash(self, element):
+        return hashlib.sha1(etree.tostring(element, with_tail=False)).digest()
+
+    def element_skeleton(self, element):
+        """ A serialised copy of element without metadata, and with its nearest descendants that have eIds
+        replaced by empty placeholders.
+        """
+        element = copy.deepcopy(element)
+        element.tail = None
+
+        for meta in list(element.iterdescendants('{*}meta')):
+            meta.getparent().remove(meta)
+
+        for child in self.eid_descendants(element):
+            placeholder = element.makeelement(child.tag, {'eId': child.get('eId')})
+            placeholder.tail = child.tail
+            child.getparent().replace(child, placeholder)
+
+        return etree.tostring(element)
+
+    def eid_descendants(self, element):
+        """ The nearest descendants of element that have eIds, in document order, ignoring metadata.
+        """
+        descendants = []
+        for child in element.iterchildren(etree.Element):
+            if etree.QName(child).localname == 'meta':
+                continue
+            if child.get('eId'):
+                descendants.append(child)
+            else:
+                descendants.extend(self.eid_descendants(child))
+        return descendants
+
     def preprocess_document_diff(self, xml_str):
         """ Run pre-processing on XML before doing HTML diffs.
 
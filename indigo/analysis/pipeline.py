@@ -0,0 +1,99 @@
+import logging
+import time
+
+from lxml import etree
+
+from indigo.plugins import plugins
+
+log = logging.getLogger(__name__)
+
+
+class AnalysisStage(object):
+    """ A single named step in an :class:`AnalysisPipeline`.
+
+    The function is called with the shared etree root and the Indigo Document, and must
+    modify the tree in place.
+    """
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+
+    def __call__(self, root, document):
+        self.func(root, document)
+
+    def __repr__(self):
+        return f'AnalysisStage<{self.name}>'
+
+
+class AnalysisPipeline(object):
+    """ Runs an ordered list of analysis stages (such as reference finders and italics markup)
+    against a single parsed copy of a document.
+
+    The document's XML is parsed once before the first stage and serialised once after the last,
+    rather than once per finder.
+
+        pipeline = AnalysisPipeline()
+        pipeline.add_references(document)
+        pipeline.add_italics(document)
+        pipeline.run(document)
+    """
+
+    reference_topics = ['refs', 'refs-subtypes', 'refs-cap', 'refs-act-names', 'internal-refs']
+    """ Plugin topics for reference finders, in the order in which they are run.
+    """
+
+    def __init__(self, stages=None):
+        self.stages = list(stages or [])
+        self.timings = []
+        """ (stage name, seconds) tuples for the most recent run, in the order the stages were run.
+        """
+
+    def add_stage(self, name, func):
+        """ Add a stage to the end of the pipeline. +func+ is called with (root, document).
+        """
+        self.stages.append(AnalysisStage(name, func))
+
+    def add_references(self, document):
+        """ Add a stage for each reference finder plugin available for this document.
+        """
+        for topic in self.reference_topics:
+            finder = plugins.for_document(topic, document)
+            if finder:
+                self.add_stage(topic, finder.find_references_in_root)
+
+    def add_italics(self, document):
+        """ Add a stage that marks up the country's italics terms, if the document has any.
+        """
+        finder = plugins.for_document('italics-terms', document)
+        italics_terms = document.work.country.italics_terms
+        if finder and italics_terms:
+            self.add_stage('italics-terms', lambda root, doc: finder.mark_up_italics_in_root(root, italics_terms))
+
+    def run(self, document):
+        """ Run all stages against +document+, which is an Indigo Document object, and update its content.
+        """
+        self.timings = []
+        if not self.stages:
+            return
+
+        # we need to use etree, not objectify, so we can't use document.doc.root,
+        # we have to re-parse it
+        start = time.perf_counter()
+        root = etree.fromstring(document.content)
+        self.timings.append(('parse', time.perf_counter() - start))
+
+        for stage in self.stages:
+            start = time.perf_counter()
+            stage(root, document)
+            self.timings.append((stage.name, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        document.content = etree.tostring(root, encoding='utf-8').decode('utf-8')
+        self.timings.append(('serialise', time.perf_counter() - start))
+
+        log.info("Analysis of %s took %.3fs: %s" % (
+            document, self.total_time(),
+            ', '.join(f'{name}={secs:.3f}s' for name, secs in self.timings)))
+
+    def total_time(self):
+        return sum(secs for name, secs in self.timings)
@@ -1,3 +1,12 @@
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+import requests
+from requests.adapters import HTTPAdapter
+
 from indigo.plugins import LocaleBasedMatcher
 
 
@@ -11,8 +20,66 @@ class BasePublicationFinder(LocaleBasedMatcher):
     """ The locale this finder is suited for, as ``(country, language, locality)``.
     """
 
+    _session = None
+
     def find_publications(self, params):
         """ Return a list of publications matching the given params, a dict of arbitrary
         key-value pairs.
         """
         raise NotImplemented()
+
+    def find_many_publications(self, params_list):
+        """ Find publications for each params dict in +params_list+, concurrently, using a bounded pool of
+        workers. Results are cached for INDIGO['PUBLICATION_FINDER_CACHE_TTL'] seconds.
+
+        Returns a list with an entry for each params dict, in order: either the list of publications,
+        or the exception raised while looking them up.
+        """
+        if not params_list:
+            return []
+
+        workers = min(self.max_workers(), len(params_list))
+        if workers <= 1:
+            return [self.find_publications_cached(p) for p in params_list]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.find_publications_cached, params_list))
+
+    def find_publications_cached(self, params):
+        """ Find publications for +params+ using the cache, returning the exception if the lookup fails.
+        """
+        ttl = settings.INDIGO.get('PUBLICATION_FINDER_CACHE_TTL', 0)
+        key = self.cache_key(params)
+        cache = caches['default']
+
+        if ttl:
+            publications = cache.get(key)
+            if publications is not None:
+                return publications
+
+        try:
+            publications = self.find_publications(params)
+        except Exception as e:
+            return e
+
+        if ttl:
+            cache.set(key, publications, ttl)
+        return publications
+
+    def cache_key(self, params):
+        params = json.dumps(params, sort_keys=True, default=str)
+        return f'publications:{self.__class__.__name__}:{hashlib.md5(params.encode("utf-8")).hexdigest()}'
+
+    def max_workers(self):
+        return settings.INDIGO.get('PUBLICATION_FINDER_WORKERS', 8)
+
+    @property
+    def session(self):
+        """ A requests session with a connection pool big enough for the workers in find_many_publications.
+        """
+        if not self._session:
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=self.max_workers())
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
+        return self._session
@@ -4,6 +4,7 @@ import re
 from indigo.analysis.markup import TextPatternMarker, MultipleTextPatternMarker
 from indigo.plugins import LocaleBasedMatcher, plugins
 from indigo.xmlutils import closest
+from indigo_api import place_cache
 from indigo_api.models import Subtype, Work
 
 
@@ -18,11 +19,53 @@ class BaseRefsFinder(LocaleBasedMatcher, TextPatternMarker):
         # we need to use etree, not objectify, so we can't use document.doc.root,
         # we have to re-parse it
         root = etree.fromstring(document.content)
+        self.find_references_in_root(root, document)
+        document.content = etree.tostring(root, encoding='utf-8').decode('utf-8')
+
+    def find_references_in_root(self, root, document):
+        """ Find references in the already-parsed etree +root+ of +document+, modifying it in place.
+        """
         self.document = document
         self.frbr_uri = document.doc.frbr_uri
         self.setup(root)
+        self.prefetch_works(root)
         self.markup_patterns(root)
-        document.content = etree.tostring(root, encoding='utf-8').decode('utf-8')
+
+    def setup(self, root):
+        super().setup(root)
+        # FRBR URI -> does a work with that URI exist?
+        self.known_works = {}
+
+    def prefetch_works(self, root):
+        """ Check which of the local works that may be referenced in +root+ exist, using a single query
+        (or the place's cached works), rather than a query for each match.
+        """
+        if not self.frbr_uri.locality:
+            return
+
+        candidates = set()
+        for ancestor in self.ancestor_nodes(root):
+            for candidate in self.candidate_nodes(ancestor):
+                for match in self.find_matches(candidate):
+                    uri = self.local_work_uri(match)
+                    if uri:
+                        candidates.add(uri)
+
+        if not candidates:
+            return
+
+        if place_cache.enabled():
+            existing = place_cache.place_work_uris(self.frbr_uri.place) & candidates
+        else:
+            existing = set(Work.objects.filter(frbr_uri__in=candidates).values_list('frbr_uri', flat=True))
+
+        for uri in candidates:
+            self.known_works[uri] = uri in existing
+
+    def work_exists(self, frbr_uri):
+        if frbr_uri not in self.known_works:
+            self.known_works[frbr_uri] = Work.objects.filter(frbr_uri=frbr_uri).exists()
+        return self.known_works[frbr_uri]
 
     def is_valid(self, node, match):
         if self.make_href(match) != self.frbr_uri.work_uri():
@@ -36,15 +79,21 @@ class BaseRefsFinder(LocaleBasedMatcher, TextPatternMarker):
         ref.set('href', self.make_href(match))
         return ref, match.start('ref'), match.end('ref')
 
+    def local_work_uri(self, match):
+        """ The FRBR URI of the work in the document's locality that this match may refer to, or None.
+        """
+        groups = match.groupdict()
+        if self.frbr_uri.locality and groups.get('year') and groups.get('num'):
+            return f"/akn/{self.frbr_uri.country}-{self.frbr_uri.locality}/act/{groups['year']}/{groups['num']}"
+
     def make_href(self, match):
         """ Turn this match into a full FRBR URI href.
             Check for an existing Act with that FRBR URI in the locality first; default to national (may or may not exist).
         """
         link_uri = f"/akn/{self.frbr_uri.country}/act/{match.group('year')}/{match.group('num')}"
-        if self.frbr_uri.locality:
-            local = f"/akn/{self.frbr_uri.country}-{self.frbr_uri.locality}/act/{match.group('year')}/{match.group('num')}"
-            if Work.objects.filter(frbr_uri=local).exists():
-                link_uri = local
+        local = self.local_work_uri(match)
+        if local and self.work_exists(local):
+            link_uri = local
 
         return link_uri
 
@@ -99,7 +148,7 @@ class RefsFinderSubtypesENG(BaseRefsFinder):
             super().setup(root)
 
     def setup_subtypes(self):
-        self.subtypes = [s for s in Subtype.objects.all()]
+        self.subtypes = Subtype.cached()
         self.subtype_names = [s.name for s in self.subtypes]
         self.subtype_abbreviations = [s.abbreviation for s in self.subtypes]
 
@@ -124,6 +173,10 @@ class RefsFinderSubtypesENG(BaseRefsFinder):
                 )
             ''', re.X | re.I)
 
+    def prefetch_works(self, root):
+        # references to subtypes don't depend on which works exist
+        pass
+
     def markup_patterns(self, root):
         # don't do anything if there are no subtypes
         if self.subtypes:
@@ -168,13 +221,18 @@ class RefsFinderCapENG(BaseRefsFinder):
         self.setup_cap_numbers(self.document)
         super().setup(root)
 
+    def prefetch_works(self, root):
+        # cap numbers are loaded in setup
+        pass
+
     def setup_cap_numbers(self, document):
-        country = document.work.country
-        locality = document.work.locality
-        place = locality or country
+        place = document.work.place
         cap_strings = [p for p in place.settings.work_properties if p.startswith('cap')]
 
-        self.cap_numbers = {w.properties[c]: w.frbr_uri for c in cap_strings for w in Work.objects.filter(country=country, locality=locality) if w.properties.get(c)}
+        index = place_cache.place_cap_numbers(place.place_code)
+        self.cap_numbers = {}
+        for c in cap_strings:
+            self.cap_numbers.update(index.get(c, {}))
 
     def is_valid(self, node, match):
         return self.cap_numbers.get(match.group('num'))
@@ -200,9 +258,14 @@ class BaseInternalRefsFinder(LocaleBasedMatcher, MultipleTextPatternMarker):
         # we need to use etree, not objectify, so we can't use document.doc.root,
         # we have to re-parse it
         root = etree.fromstring(document.content)
+        self.find_references_in_root(root, document)
+        document.content = etree.tostring(root, encoding='utf-8').decode('utf-8')
+
+    def find_references_in_root(self, root, document):
+        """ Find references in the already-parsed etree +root+ of +document+, modifying it in place.
+        """
         self.setup(root)
         self.markup_patterns(root)
-        document.content = etree.tostring(root, encoding='utf-8').decode('utf-8')
 
     def is_valid(self, node, match):
         return self.find_target(node, match) is not None
@@ -9,6 +9,69 @@ from indigo.plugins import LocaleBasedMatcher
 log = logging.getLogger(__name__)
 
 
+class TermsMatcher(object):
+    """ Finds non-overlapping occurrences of a set of terms in text, in a single pass over the text.
+
+    Matches are the same as those of the regular expression ``\\b(term1|term2|...)\\b`` with the terms
+    ordered longest first: the leftmost match wins and, at that position, the longest term that ends
+    on a word boundary.
+    """
+    word_re = re.compile(r'\w', re.UNICODE)
+
+    def __init__(self, terms):
+        # a trie of the characters in the terms; the None key marks the end of a term
+        self.trie = {}
+        for term in terms:
+            if term:
+                node = self.trie
+                for c in term:
+                    node = node.setdefault(c, {})
+                node[None] = term
+
+        # matches the first character of any term, so that we can skip quickly to potential matches
+        self.first_char_re = re.compile('[%s]' % ''.join(re.escape(c) for c in self.trie)) if self.trie else None
+
+    def is_boundary(self, text, pos):
+        before = pos > 0 and self.word_re.match(text, pos - 1) is not None
+        after = pos < len(text) and self.word_re.match(text, pos) is not None
+        return before != after
+
+    def finditer(self, text):
+        """ Yield (start, end, term) tuples for each match in +text+, from left to right.
+        """
+        if not self.first_char_re:
+            return
+
+        trie = self.trie
+        i = 0
+        n = len(text)
+
+        while i < n:
+            start = self.first_char_re.search(text, i)
+            if not start:
+                break
+            i = start.start()
+
+            match = None
+            if self.is_boundary(text, i):
+                node = trie
+                j = i
+                # walk the trie as far as the text allows, remembering the longest term
+                while j < n:
+                    node = node.get(text[j])
+                    if node is None:
+                        break
+                    j += 1
+                    if None in node and self.is_boundary(text, j):
+                        match = (i, j, node[None])
+
+            if match:
+                yield match
+                i = match[1]
+            else:
+                i += 1
+
+
 class BaseTermsFinder(LocaleBasedMatcher):
     """ Finds references to defined terms in documents.
 
@@ -176,24 +239,19 @@ class BaseTermsFinder(LocaleBasedMatcher):
 
         # term to term id
         term_lookup = self.make_term_index(terms)
+        matcher = TermsMatcher(term_lookup.keys())
 
-        # big regex of all the terms, longest first
-        terms = sorted(term_lookup.keys(), key=lambda t: -len(t))
-        terms_re = re.compile(r'\b(%s)\b' % '|'.join(re.escape(t) for t in terms))
-
-        def make_term(match):
-            term_id = term_lookup[match.group(1)]
+        def make_term(text):
             term = etree.Element(self.term_tag)
-            term.text = match.group()
-            term.set('refersTo', '#' + term_id)
+            term.text = text
+            term.set('refersTo', '#' + term_lookup[text])
             return term
 
-        def in_own_defn(node, match):
-            # don't link to a term inside its own definition
-            term_id = '#' + term_lookup[match.group(1)]
-            for ancestor in node.iterancestors(self.ancestors):
-                if ancestor.get('refersTo'):
-                    return ancestor.get('refersTo') == term_id
+        def own_defn(container):
+            # the term defined by the container of the text, or its closest ancestor that defines a term
+            for elem in chain([container], container.iterancestors(self.ancestors)):
+                if elem.tag in self.ancestors and elem.get('refersTo'):
+                    return elem.get('refersTo')
 
         for candidate in self.text_xpath(doc):
             node = candidate.getparent()
@@ -202,40 +260,46 @@ class BaseTermsFinder(LocaleBasedMatcher):
             if node.tag in self.no_term_markup or len(list(node.iterancestors(self.no_term_markup))) > 0:
                 continue
 
-            if not candidate.is_tail:
-                # text directly inside a node
-                for match in terms_re.finditer(node.text):
-                    log.debug("Matched " + match.group(1))
-                    if in_own_defn(node, match):
-                        log.debug("In own definition")
-                        continue
-
-                    term = make_term(match)
-                    node.text = match.string[:match.start()]
-                    node.insert(0, term)
-                    term.tail = match.string[match.end():]
+            if candidate.is_tail:
+                text = node.tail
+                container = node.getparent()
+            else:
+                text = node.text
+                container = node
+
+            matches = []
+            defn_id = None
+            for start, end, match in matcher.finditer(text):
+                log.debug("Matched " + match)
+                if defn_id is None:
+                    # only look this up once per text node
+                    defn_id = own_defn(container) or ''
+
+                # don't link to a term inside its own definition
+                if defn_id == '#' + term_lookup[match]:
+                    log.debug("In own definition")
+                    continue
 
-                    # now continue to check the new tail
-                    node = term
-                    break
+                matches.append((start, end, match))
 
-            while node is not None and node.tail:
-                for match in terms_re.finditer(node.tail):
-                    log.debug("Matched " + match.group(1))
-                    if in_own_defn(node, match):
-                        log.debug("In own definition")
-                        continue
+            if not matches:
+                continue
 
-                    term = make_term(match)
+            # insert the terms right-to-left, so that the offsets of earlier matches stay valid
+            end = len(text)
+            for start, match_end, match in reversed(matches):
+                term = make_term(match)
+                term.tail = text[match_end:end]
+                if candidate.is_tail:
                     node.addnext(term)
-                    node.tail = match.string[:match.start()]
-                    term.tail = match.string[match.end():]
-
-                    # now continue to check the new tail
-                    node = term
-                    break
                 else:
-                    break
+                    node.insert(0, term)
+                end = start
+
+            if candidate.is_tail:
+                node.tail = text[:end]
+            else:
+                node.text = text[:end]
 
     def make_term_index(self, terms):
         return {v: k for k, v in terms.items()}
@@ -97,6 +97,9 @@ class TOCBuilderBase(LocaleBasedMatcher):
         self.language = language
         self._toc_elements_ns = set(f'{{{self.act.namespace}}}{s}' for s in self.toc_elements)
         self._toc_deadends_ns = set(f'{{{self.act.namespace}}}{s}' for s in self.toc_deadends)
+        # collects heading text without descending into authorial notes; compiled once per document
+        self._heading_xpath = etree.XPath(".//text()[not(ancestor::a:authorialNote)]",
+                                          namespaces={'a': self.act.namespace})
 
     def determine_component(self, element):
         """ Determine the component element which contains +element+.
@@ -159,10 +162,7 @@ class TOCBuilderBase(LocaleBasedMatcher):
         id_ = element.get('eId')
 
         def get_heading(element):
-            # collect text without descending into authorial notes
-            xpath = etree.XPath(".//text()[not(ancestor::a:authorialNote)]",
-                                namespaces={'a': self.act.namespace})
-            return ''.join(xpath(element.heading))
+            return ''.join(self._heading_xpath(element.heading))
 
         # support for crossheadings in AKN 2.0
         if type_ == 'hcontainer' and element.get('name', None) == 'crossheading':
@@ -258,7 +258,8 @@ class TOCBuilderBase(LocaleBasedMatcher):
         return items
 
     def insert_commenceable_provisions(self, doc, provisions, id_set):
-        toc = self.table_of_contents_for_document(doc)
+        # use the document's stored table of contents, rather than re-parsing it
+        toc = [TOCElement.from_dict(d) for d in doc.table_of_contents_dicts()]
         items = self.commenceable_items(toc)
         self.insert_provisions(provisions, id_set, items)
 
@@ -271,17 +272,32 @@ class TOCBuilderBase(LocaleBasedMatcher):
             `items` is a list of commenceable provisions from the current document's ToC.
         """
         # take note of any removed items to compensate for later
-        removed_indexes = [i for i, p in enumerate(provisions) if p.id not in [i.id for i in items]]
+        item_ids = set(item.id for item in items)
+        removed_indexes = [i for i, p in enumerate(provisions) if p.id not in item_ids]
+
+        # Because insertion indexes only grow, we can build the new list in a single pass, by merging
+        # the existing provisions with the new ones.
+        existing = provisions[:]
+        provisions.clear()
+        n_existing = 0
+        n_removed = 0
         for i, item in enumerate(items):
             if item.id and item.id not in id_set:
                 id_set.add(item.id)
                 # We need to insert this provision at the correct position in the work provision list.
                 # If any provisions from a previous document have been removed in this document
                 # (indexes stored in removed_indexes), bump the insertion index up to take them into account.
-                for n in removed_indexes:
-                    if i >= n:
-                        i += 1
-                provisions.insert(i, item)
+                while n_removed < len(removed_indexes) and i + n_removed >= removed_indexes[n_removed]:
+                    n_removed += 1
+                i += n_removed
+
+                # copy across existing provisions that come before this one
+                while len(provisions) < i and n_existing < len(existing):
+                    provisions.append(existing[n_existing])
+                    n_existing += 1
+                provisions.append(item)
+
+        provisions.extend(existing[n_existing:])
 
 
 class TOCElement(object):
@@ -312,6 +328,18 @@ class TOCElement(object):
         self.title = None
         self.qualified_id = id_ if component == 'main' else f"{component_id}/{id_}"
 
+    @classmethod
+    def from_dict(cls, info, parent=None, component_id=None):
+        """ Build a TOCElement (without an XML element) from a dict, as per :meth:`as_dict`.
+        """
+        item = cls(None, info['component'], info['type'], heading=info.get('heading'), id_=info.get('id'),
+                   num=info.get('num'), subcomponent=info.get('subcomponent'), parent=parent,
+                   component_id=component_id)
+        item.title = info.get('title')
+        if info.get('children'):
+            item.children = [cls.from_dict(c, item, component_id) for c in info['children']]
+        return item
+
     def as_dict(self):
         info = {
             'type': self.type,
@@ -3,13 +3,19 @@ import re
 import csv
 import io
 import logging
+import time
+from contextlib import contextmanager
+from itertools import chain
 
 from cobalt import FrbrUri
 from django import forms
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.conf import settings
+from django.db import router, transaction
+from django.db.models import prefetch_related_objects, signals
 import requests
+import reversion.revisions
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google.oauth2 import service_account
@@ -221,13 +227,54 @@ class BaseBulkCreator(LocaleBasedMatcher):
     def get_row_validation_form(self, country, locality, subtypes, row_data):
         return self.row_validation_form_class(country, locality, subtypes, row_data)
 
-    def create_works(self, table, dry_run, workflow):
+    def create_works(self, table, dry_run, workflow, bulk=False, progress=None):
+        """ Create works from the rows of +table+, or just preview them if +dry_run+ is True.
+
+        In bulk mode, all works referenced by the spreadsheet are looked up up-front with a few set queries,
+        and new works, tasks and relationships are inserted in batches inside a single revision.
+
+        The time taken by each phase is stored in `timings`, as (phase, seconds) tuples.
+
+        If +progress+ is given, it's called as progress(phase, row) at the start of each phase (with row=None),
+        and after each row has been processed in the 'create' phase.
+        """
         self.workflow = workflow
         self.subtypes = Subtype.objects.all()
         self.dry_run = dry_run
+        self.bulk = bulk
+        self.progress = progress
+        self.publication_finder = self.get_publication_finder()
+        # publication_key(params) -> publications, or the error raised looking them up
+        self.publications = {}
+        self.timings = []
+        self.rows_total = 0
 
         self.works = []
 
+        # bulk mode: FRBR URI -> Work (or None), and title -> Works in this place with that title
+        self.works_by_frbr_uri = {}
+        self.works_by_title = {}
+        # bulk mode: new objects waiting to be inserted
+        self.pending_works = []
+        self.pending_publication_documents = []
+        self.pending_commencements = []
+        self.pending_amendments = []
+        self.pending_tasks = []
+
+        if self.bulk and not self.dry_run:
+            with transaction.atomic(), reversion.revisions.create_revision():
+                reversion.revisions.set_user(self.user)
+                self.process_rows(table)
+        else:
+            self.process_rows(table)
+
+        self.log.info("Bulk creation of %d rows took %.3fs: %s" % (
+            len(self.works), sum(secs for phase, secs in self.timings),
+            ', '.join(f'{phase}={secs:.3f}s' for phase, secs in self.timings)))
+
+        return self.works
+
+    def process_rows(self, table):
         # clean up headers
         headers = [h.split(' ')[0].lower() for h in table[0]]
 
@@ -239,82 +286,125 @@ class BaseBulkCreator(LocaleBasedMatcher):
             for row in table[1:]
         ]
 
-        for idx, row in enumerate(rows):
-            # ignore if it's blank or explicitly marked 'ignore' in the 'ignore' column
-            if row.get('ignore') or not any(row.values()):
-                continue
+        # ignore if it's blank or explicitly marked 'ignore' in the 'ignore' column
+        rows = [(idx, row) for idx, row in enumerate(rows) if not row.get('ignore') and any(row.values())]
+        self.rows_total = len(rows)
+
+        with self.timed('validate'):
+            rows = [self.prepare_row(row, idx) for idx, row in rows]
+
+        if self.bulk:
+            with self.timed('prefetch'):
+                self.prefetch_works(rows)
+
+        with self.timed('publications'):
+            self.prefetch_publications(rows)
+
+        with self.timed('create'):
+            for row in rows:
+                self.works.append(row if row.errors else self.create_work_from_row(row))
+                self.report_progress('create', self.works[-1])
 
-            self.works.append(self.create_work(row, idx))
+            if self.bulk:
+                self.save_pending_works()
 
         self.check_preview_duplicates()
 
-        # link all commencements first so that amendments and repeals will have dates to work with (include duplicates)
-        for row in self.works:
-            if row.status and row.commenced:
-                self.link_commencement_passive(row)
-            if row.status and row.commences:
-                self.link_commencement_active(row)
+        with self.timed('commencements'):
+            # link all commencements first so that amendments and repeals will have dates to work with (include duplicates)
+            for row in self.works:
+                if row.status and row.commenced:
+                    self.link_commencement_passive(row)
+                if row.status and row.commences:
+                    self.link_commencement_active(row)
 
-        for row in self.works:
-            if row.status:
-                # this will check duplicate works as well
-                # (they won't overwrite the existing works but the relationships will be linked)
-                if row.primary_work:
-                    self.link_parent_work(row)
+            self.save_pending_commencements()
 
-                if row.subleg:
-                    self.link_children_works(row)
+        with self.timed('relationships'):
+            for row in self.works:
+                if row.status:
+                    # this will check duplicate works as well
+                    # (they won't overwrite the existing works but the relationships will be linked)
+                    if row.primary_work:
+                        self.link_parent_work(row)
 
-                if row.taxonomy:
-                    self.link_taxonomy(row)
+                    if row.subleg:
+                        self.link_children_works(row)
 
-                if row.amended_by:
-                    self.link_amendment_passive(row)
+                    if row.taxonomy:
+                        self.link_taxonomy(row)
 
-                if row.amends:
-                    self.link_amendment_active(row)
+                    if row.amended_by:
+                        self.link_amendment_passive(row)
 
-                if row.repealed_by:
-                    self.link_repeal_passive(row)
+                    if row.amends:
+                        self.link_amendment_active(row)
 
-                if row.repeals:
-                    self.link_repeal_active(row)
+                    if row.repealed_by:
+                        self.link_repeal_passive(row)
 
-        return self.works
+                    if row.repeals:
+                        self.link_repeal_active(row)
+
+            self.save_pending_amendments()
+
+        with self.timed('tasks'):
+            self.save_pending_tasks()
+
+    @contextmanager
+    def timed(self, phase):
+        self.report_progress(phase)
+        start = time.perf_counter()
+        yield
+        self.timings.append((phase, time.perf_counter() - start))
+
+    def report_progress(self, phase, row=None):
+        if self.progress:
+            self.progress(phase, row)
 
-    def create_work(self, row, idx):
+    def prepare_row(self, row, idx):
         # handle spreadsheet that still uses 'principal'
         row['stub'] = row.get('stub') if 'stub' in row else not row.get('principal')
         row = self.validate_row(row)
         row.status = None
         row.row_number = idx + 2
+        return row
+
+    def create_work_from_row(self, row):
+        frbr_uri = self.get_frbr_uri(row)
 
-        if row.errors:
+        existing = self.find_existing_work(frbr_uri)
+        if existing:
+            row.work = existing
+            row.status = 'duplicate'
             return row
 
-        frbr_uri = self.get_frbr_uri(row)
+        work = Work()
+
+        work.frbr_uri = frbr_uri
+        work.country = self.country
+        work.locality = self.locality
+        for attribute in ['title',
+                          'publication_name', 'publication_number',
+                          'assent_date', 'publication_date',
+                          'commenced', 'stub']:
+            setattr(work, attribute, getattr(row, attribute, None))
+        work.created_by_user = self.user
+        work.updated_by_user = self.user
+        self.add_extra_properties(work, row)
 
         try:
-            row.work = Work.objects.get(frbr_uri=frbr_uri)
-            row.status = 'duplicate'
+            # in bulk mode, the FRBR URI has already been checked against existing works
+            work.full_clean(validate_unique=not self.bulk)
 
-        except Work.DoesNotExist:
-            work = Work()
-
-            work.frbr_uri = frbr_uri
-            work.country = self.country
-            work.locality = self.locality
-            for attribute in ['title',
-                              'publication_name', 'publication_number',
-                              'assent_date', 'publication_date',
-                              'commenced', 'stub']:
-                setattr(work, attribute, getattr(row, attribute, None))
-            work.created_by_user = self.user
-            work.updated_by_user = self.user
-            self.add_extra_properties(work, row)
+            # info for linking publication document
+            row.params = self.publication_params(row)
 
-            try:
-                work.full_clean()
+            if self.bulk and not self.dry_run:
+                # the work is inserted and its publication document and tasks linked by save_pending_works
+                self.pending_works.append((work, row))
+                self.add_to_work_index(work)
+            else:
                 if not self.dry_run:
                     work.save_with_revision(self.user)
 
@@ -322,32 +412,193 @@ class BaseBulkCreator(LocaleBasedMatcher):
                     if not self.testing:
                         work_changed.send(sender=work.__class__, work=work, request=self.request)
 
-                # info for linking publication document
-                row.params = {
-                    'date': work.publication_date,
-                    'number': work.publication_number,
-                    'publication': work.publication_name,
-                    'country': self.country.place_code,
-                    'locality': self.locality.code if self.locality else None,
-                }
+                self.link_new_work(work, row)
 
-                self.link_publication_document(work, row)
+            row.work = work
+            row.status = 'success'
 
-                if not work.stub:
-                    self.create_task(work, row, task_type='import-content')
+        except ValidationError as e:
+            if hasattr(e, 'message_dict'):
+                row.errors = ' '.join(
+                    ['%s: %s' % (f, '; '.join(errs)) for f, errs in e.message_dict.items()]
+                )
+            else:
+                row.errors = str(e)
 
-                row.work = work
-                row.status = 'success'
+        return row
 
-            except ValidationError as e:
-                if hasattr(e, 'message_dict'):
-                    row.errors = ' '.join(
-                        ['%s: %s' % (f, '; '.join(errs)) for f, errs in e.message_dict.items()]
-                    )
-                else:
-                    row.errors = str(e)
+    def link_new_work(self, work, row):
+        """ Link the publication document of a newly created work, and create its tasks.
+        """
+        self.link_publication_document(work, row)
 
-        return row
+        if not work.stub:
+            self.create_task(work, row, task_type='import-content')
+
+    def find_existing_work(self, frbr_uri):
+        if self.bulk:
+            return self.works_by_frbr_uri.get(frbr_uri)
+
+        try:
+            return Work.objects.get(frbr_uri=frbr_uri)
+        except Work.DoesNotExist:
+            return None
+
+    def referenced_works(self, row):
+        """ The strings (FRBR URIs or titles) in this row that refer to other works.
+        """
+        refs = [getattr(row, attr, None) for attr in ['primary_work', 'commenced_by', 'commences', 'amended_by',
+                                                      'amends', 'repealed_by', 'repeals']]
+        refs.extend(x.strip() for x in (getattr(row, 'subleg', None) or '').split(';'))
+        return [r for r in refs if r and r.strip()]
+
+    def prefetch_works(self, rows):
+        """ Look up the works for all rows, and all works referenced by rows, with a few set queries.
+        Used in bulk mode.
+        """
+        frbr_uris = set()
+        titles = set()
+        for row in rows:
+            if row.errors:
+                continue
+
+            frbr_uris.add(self.get_frbr_uri(row))
+            for given_string in self.referenced_works(row):
+                substring = given_string.split()[0]
+                try:
+                    FrbrUri.parse(substring)
+                    frbr_uris.add(substring)
+                except ValueError:
+                    titles.add(given_string)
+
+        # use the same instance for a work, however it was found
+        works = {}
+
+        self.works_by_frbr_uri = {uri: None for uri in frbr_uris}
+        if frbr_uris:
+            for work in Work.objects.filter(frbr_uri__in=frbr_uris):
+                works[work.pk] = work
+                self.works_by_frbr_uri[work.frbr_uri] = work
+
+        self.works_by_title = {title: [] for title in titles}
+        if titles:
+            for work in Work.objects.filter(title__in=titles, country=self.country, locality=self.locality):
+                self.works_by_title[work.title].append(works.setdefault(work.pk, work))
+
+    def add_to_work_index(self, work):
+        """ Add a new work to the bulk mode lookups.
+        """
+        self.works_by_frbr_uri[work.frbr_uri] = work
+        # titles that weren't prefetched will be looked up in the database
+        if work.title in self.works_by_title:
+            self.works_by_title[work.title].append(work)
+
+    def save_pending_works(self):
+        """ Insert new works in bulk mode, and then link their publication documents and create their tasks.
+        """
+        if not self.pending_works:
+            return
+
+        works = [work for work, row in self.pending_works]
+        Work.objects.bulk_create(works)
+        self.send_created_signals(Work, works)
+
+        for work, row in self.pending_works:
+            if not self.testing:
+                work_changed.send(sender=work.__class__, work=work, request=self.request)
+            self.link_new_work(work, row)
+        self.pending_works = []
+
+        PublicationDocument.objects.bulk_create(self.pending_publication_documents)
+        self.pending_publication_documents = []
+
+    def save_pending_commencements(self):
+        """ Insert new commencements in bulk mode, skipping those that already exist.
+        """
+        if not self.pending_commencements:
+            return
+
+        existing = set(Commencement.objects
+                       .filter(commenced_work_id__in=set(c.commenced_work_id for c in self.pending_commencements))
+                       .values_list('commenced_work_id', 'commencing_work_id', 'date'))
+        new = []
+        for commencement in self.pending_commencements:
+            key = (commencement.commenced_work_id, commencement.commencing_work_id, commencement.date)
+            if key not in existing:
+                existing.add(key)
+                new.append(commencement)
+        self.pending_commencements = []
+
+        Commencement.objects.bulk_create(new)
+        self.send_created_signals(Commencement, new)
+
+        # works cache their commencements, which have now changed
+        works = {}
+        for work in chain(self.works_by_frbr_uri.values(), chain.from_iterable(self.works_by_title.values()),
+                          (getattr(row, 'work', None) for row in self.works)):
+            if isinstance(work, Work) and work.pk:
+                works[id(work)] = work
+                work.__dict__.pop('main_commencement', None)
+                getattr(work, '_prefetched_objects_cache', {}).pop('commencements', None)
+        prefetch_related_objects(list(works.values()), 'commencements')
+
+    def save_pending_amendments(self):
+        """ Insert new amendments in bulk mode, skipping those that already exist, and create tasks to apply them.
+        """
+        if not self.pending_amendments:
+            return
+
+        existing = set(Amendment.objects
+                       .filter(amended_work_id__in=set(a.amended_work_id for a, row in self.pending_amendments))
+                       .values_list('amended_work_id', 'amending_work_id', 'date'))
+        new = []
+        for amendment, row in self.pending_amendments:
+            key = (amendment.amended_work_id, amendment.amending_work_id, amendment.date)
+            if key not in existing:
+                existing.add(key)
+                new.append((amendment, row))
+        self.pending_amendments = []
+
+        Amendment.objects.bulk_create([amendment for amendment, row in new])
+        self.send_created_signals(Amendment, [amendment for amendment, row in new])
+
+        for amendment, row in new:
+            self.create_task(amendment.amended_work, row, task_type='apply-amendment', amendment=amendment)
+
+    def save_pending_tasks(self):
+        """ Insert new tasks in bulk mode, along with their workflow and labels.
+        """
+        if not self.pending_tasks:
+            return
+
+        tasks = self.pending_tasks
+        self.pending_tasks = []
+        Task.objects.bulk_create(tasks)
+
+        if self.workflow:
+            through = Task.workflows.through
+            through.objects.bulk_create([through(workflow_id=self.workflow.pk, task_id=t.pk) for t in tasks])
+
+        pending_tasks = [t for t in tasks if 'pending-commencement' in t.code]
+        if pending_tasks:
+            # add the `pending commencement` label, if it exists
+            pending_commencement_label = TaskLabel.objects.filter(slug='pending-commencement').first()
+            if pending_commencement_label:
+                through = Task.labels.through
+                through.objects.bulk_create([
+                    through(task_id=t.pk, tasklabel_id=pending_commencement_label.pk)
+                    for t in pending_tasks])
+
+        self.send_created_signals(Task, tasks)
+
+    def send_created_signals(self, model, instances):
+        """ bulk_create doesn't send post_save signals, so send them for the new instances, so that the
+        activity stream and revisions are updated as usual.
+        """
+        using = router.db_for_write(model)
+        for instance in instances:
+            signals.post_save.send(sender=model, instance=instance, created=True, update_fields=None,
+                                   raw=False, using=using)
 
     def transform_aliases(self, row):
         """ Adds the term the platform expects to `row` for validation (and later saving).
@@ -416,17 +667,60 @@ class BaseBulkCreator(LocaleBasedMatcher):
             if hasattr(row, extra_property):
                 work.properties[extra_property] = getattr(row, extra_property)
 
-    def link_publication_document(self, work, row):
+    def get_publication_finder(self):
         locality_code = self.locality.code if self.locality else None
-        finder = plugins.for_locale('publications', self.country.code, None, locality_code)
+        return plugins.for_locale('publications', self.country.code, None, locality_code)
+
+    def publication_params(self, row):
+        return {
+            'date': getattr(row, 'publication_date', None),
+            'number': getattr(row, 'publication_number', None),
+            'publication': getattr(row, 'publication_name', None),
+            'country': self.country.place_code,
+            'locality': self.locality.code if self.locality else None,
+        }
+
+    def publication_key(self, params):
+        return tuple(sorted(params.items()))
+
+    def prefetch_publications(self, rows):
+        """ Look up the publications for the works that will be created from +rows+, concurrently,
+        for link_publication_document to use. Rows for existing works are skipped.
+        """
+        if not self.publication_finder:
+            return
+
+        rows = [row for row in rows if not row.errors and getattr(row, 'publication_date', None)]
+        frbr_uris = set(self.get_frbr_uri(row) for row in rows)
+        if self.bulk:
+            existing = set(uri for uri in frbr_uris if self.works_by_frbr_uri.get(uri))
+        else:
+            existing = set(Work.objects.filter(frbr_uri__in=frbr_uris).values_list('frbr_uri', flat=True))
+
+        params = {}
+        for row in rows:
+            if self.get_frbr_uri(row) not in existing:
+                row_params = self.publication_params(row)
+                params[self.publication_key(row_params)] = row_params
+
+        results = self.publication_finder.find_many_publications(list(params.values()))
+        self.publications.update(zip(params.keys(), results))
+
+    def link_publication_document(self, work, row):
+        finder = self.publication_finder
 
         if not finder or not row.params.get('date'):
             return self.create_task(work, row, task_type='link-gazette')
 
-        try:
-            publications = finder.find_publications(row.params)
-        except requests.HTTPError:
+        key = self.publication_key(row.params)
+        if key not in self.publications:
+            self.publications[key] = finder.find_publications_cached(row.params)
+        publications = self.publications[key]
+
+        if isinstance(publications, requests.RequestException):
             return self.create_task(work, row, task_type='link-gazette')
+        elif isinstance(publications, Exception):
+            raise publications
 
         if len(publications) != 1:
             return self.create_task(work, row, task_type='link-gazette')
@@ -438,7 +732,11 @@ class BaseBulkCreator(LocaleBasedMatcher):
             pub_doc.file = None
             pub_doc.trusted_url = pub_doc_details.get('url')
             pub_doc.size = pub_doc_details.get('size')
-            pub_doc.save()
+            if self.bulk:
+                pub_doc.filename = pub_doc.build_filename()
+                self.pending_publication_documents.append(pub_doc)
+            else:
+                pub_doc.save()
 
     def check_preview_duplicates(self):
         if self.dry_run:
@@ -468,16 +766,7 @@ class BaseBulkCreator(LocaleBasedMatcher):
                 row.work.updated_by_user = self.user
                 row.work.save()
 
-            Commencement.objects.get_or_create(
-                commenced_work=row.work,
-                commencing_work=commencing_work,
-                date=date,
-                defaults={
-                    'main': True,
-                    'all_provisions': True,
-                    'created_by_user': self.user,
-                },
-            )
+            self.get_or_create_commencement(row.work, commencing_work, date)
 
     def link_commencement_active(self, row):
         # if the work `commences` another work, try linking it
@@ -507,16 +796,7 @@ class BaseBulkCreator(LocaleBasedMatcher):
                 commenced_work.updated_by_user = self.user
                 commenced_work.save()
 
-            Commencement.objects.get_or_create(
-                commenced_work=commenced_work,
-                commencing_work=row.work,
-                date=date,
-                defaults={
-                    'main': True,
-                    'all_provisions': True,
-                    'created_by_user': self.user,
-                },
-            )
+            self.get_or_create_commencement(commenced_work, row.work, date)
             self.update_works_list(commenced_work)
 
     def link_repeal_passive(self, row):
@@ -654,19 +934,7 @@ class BaseBulkCreator(LocaleBasedMatcher):
 
             row.relationships.append(f'Amended by {amending_work} on {date}')
 
-            amendment, new = Amendment.objects.get_or_create(
-                amended_work=row.work,
-                amending_work=amending_work,
-                date=date,
-                defaults={
-                    'created_by_user': self.user,
-                },
-            )
-
-            if new:
-                self.create_task(row.work, row,
-                                 task_type='apply-amendment',
-                                 amendment=amendment)
+            self.get_or_create_amendment(row.work, amending_work, date, row)
 
     def link_amendment_active(self, row):
         # if the work `amends` something, try linking it
@@ -686,19 +954,55 @@ class BaseBulkCreator(LocaleBasedMatcher):
         if self.dry_run:
             row.notes.append(f"An 'Apply amendment' task will be created on {amended_work}")
         else:
-            amendment, new = Amendment.objects.get_or_create(
-                amended_work=amended_work,
-                amending_work=row.work,
+            self.get_or_create_amendment(amended_work, row.work, date, row)
+
+    def get_or_create_commencement(self, commenced_work, commencing_work, date):
+        if self.bulk:
+            # inserted by save_pending_commencements
+            self.pending_commencements.append(Commencement(
+                commenced_work=commenced_work,
+                commencing_work=commencing_work,
+                date=date,
+                main=True,
+                all_provisions=True,
+                created_by_user=self.user,
+            ))
+        else:
+            Commencement.objects.get_or_create(
+                commenced_work=commenced_work,
+                commencing_work=commencing_work,
                 date=date,
                 defaults={
+                    'main': True,
+                    'all_provisions': True,
                     'created_by_user': self.user,
                 },
             )
 
-            if new:
-                self.create_task(amended_work, row,
-                                 task_type='apply-amendment',
-                                 amendment=amendment)
+    def get_or_create_amendment(self, amended_work, amending_work, date, row):
+        if self.bulk:
+            # inserted (and the task created) by save_pending_amendments
+            self.pending_amendments.append((Amendment(
+                amended_work=amended_work,
+                amending_work=amending_work,
+                date=date,
+                created_by_user=self.user,
+            ), row))
+            return
+
+        amendment, new = Amendment.objects.get_or_create(
+            amended_work=amended_work,
+            amending_work=amending_work,
+            date=date,
+            defaults={
+                'created_by_user': self.user,
+            },
+        )
+
+        if new:
+            self.create_task(amended_work, row,
+                             task_type='apply-amendment',
+                             amendment=amendment)
 
     def link_taxonomy(self, row):
         topics = [x.strip() for x in row.taxonomy.split(';') if x.strip()]
@@ -718,10 +1022,13 @@ class BaseBulkCreator(LocaleBasedMatcher):
                 row.notes.append(f'Taxonomy not found: {"; ".join(unlinked_topics)}')
             else:
                 row.unlinked_topics = "; ".join(unlinked_topics)
-                try:
-                    existing_task = Task.objects.get(work=row.work, code='link-taxonomy', description__contains=row.unlinked_topics)
-                except Task.DoesNotExist:
-                    self.create_task(row.work, row, task_type='link-taxonomy')
+                pending = any(t.work == row.work and t.code == 'link-taxonomy' and row.unlinked_topics in t.description
+                              for t in self.pending_tasks)
+                if not pending:
+                    try:
+                        existing_task = Task.objects.get(work=row.work, code='link-taxonomy', description__contains=row.unlinked_topics)
+                    except Task.DoesNotExist:
+                        self.create_task(row.work, row, task_type='link-taxonomy')
 
     def create_task(self, work, row, task_type, repealing_work=None, repealed_work=None, amended_work=None, amendment=None, subleg=None, main_work=None):
         if self.dry_run:
@@ -879,6 +1186,11 @@ Possible reasons:
         task.code = task_type
         task.created_by_user = self.user
 
+        if self.bulk:
+            # inserted, with its workflow and labels, by save_pending_tasks
+            self.pending_tasks.append(task)
+            return task
+
         # need to save before assigning workflow because of M2M relation
         task.save()
         if self.workflow:
@@ -906,11 +1218,11 @@ Possible reasons:
         substring = given_string.split()[0]
         try:
             FrbrUri.parse(substring)
-            work = Work.objects.filter(frbr_uri=substring).first()
+            work = self.find_work_by_frbr_uri(substring)
         except ValueError:
-            potential_matches = Work.objects.filter(title=given_string, country=self.country, locality=self.locality)
+            potential_matches = self.find_works_by_title(given_string)
             if len(potential_matches) == 1:
-                work = potential_matches.first()
+                work = potential_matches[0]
         if self.dry_run and not work:
             # neither the FRBR URI nor the title matched,
             # but it could be in the current batch
@@ -920,6 +1232,16 @@ Possible reasons:
                     break
         return work
 
+    def find_work_by_frbr_uri(self, frbr_uri):
+        if self.bulk and frbr_uri in self.works_by_frbr_uri:
+            return self.works_by_frbr_uri[frbr_uri]
+        return Work.objects.filter(frbr_uri=frbr_uri).first()
+
+    def find_works_by_title(self, title):
+        if self.bulk and title in self.works_by_title:
+            return self.works_by_title[title]
+        return list(Work.objects.filter(title=title, country=self.country, locality=self.locality))
+
     @property
     def share_with(self):
         if not self._gsheets_secret:
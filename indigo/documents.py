@@ -24,11 +24,12 @@ class ResolvedAnchor(object):
 
     def resolve(self, exact):
         anchor_id = self.anchor_id
+        attachment_id = None
         component = None
 
         if '/' in anchor_id:
-            prefix, anchor_id = anchor_id.split('/', 1)
-            escaped = prefix.replace("'", "\\'")
+            attachment_id, anchor_id = anchor_id.split('/', 1)
+            escaped = attachment_id.replace("'", "\\'")
             # find the attachment with this id
             results = list(self.document.doc.main.xpath(f"./a:attachments/a:attachment[@eId='{escaped}']", namespaces={'a': self.document.doc.namespace}))
             if len(results):
@@ -39,18 +40,18 @@ class ResolvedAnchor(object):
         if component is None:
             return
 
+        # eId -> element for this component
+        index = self.document.eid_index(attachment_id)
         self.exact_match = True
 
         while anchor_id:
-            escaped = anchor_id.replace("'", "\\'")
-            elems = component.xpath(f".//a:*[@eId='{escaped}']", namespaces={'a': self.document.doc.namespace})
-            if len(elems):
-                self.resolve_element(elems[0])
+            if anchor_id in index:
+                self.resolve_element(index[anchor_id])
                 break
             elif anchor_id in ['preface', 'preamble']:
                 # HACK HACK HACK
                 # We sometimes use 'preamble' and 'preface' even though they aren't IDs
-                elems = component.xpath(f".//a:{escaped}", namespaces={'a': self.document.doc.namespace})
+                elems = component.xpath(f".//a:{anchor_id}", namespaces={'a': self.document.doc.namespace})
                 if len(elems):
                     self.resolve_element(elems[0])
                     break
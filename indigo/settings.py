@@ -130,6 +130,63 @@ INDIGO = {
     # see http://docs.oasis-open.org/legaldocml/akn-core/v1.0/os/part1-vocabulary/akn-core-v1.0-os-part1-vocabulary.html#_Toc523925025
     'DOCTYPES': [('Act', 'act')],
     'EXTRA_DOCTYPES': {},
+
+    # Should we resolve the templates and static files used for rendering documents
+    # when the app starts, rather than on first use? This requires database access at startup.
+    'WARM_RESOLUTION_CACHE': False,
+
+    # Maximum total size (in characters of XML) of parsed documents to keep in a per-process cache
+    # shared between requests. 0 disables the cache.
+    'PARSED_DOCUMENT_CACHE_SIZE': 0,
+
+    # Should lookups of the works in a place, such as their FRBR URIs and cap numbers, be cached (in the default
+    # cache) when finding references to works in documents? This saves database queries when importing many
+    # documents for a place.
+    'PLACE_WORKS_CACHE': False,
+
+    # Should the batch work importer create works, tasks and relationships using set-based queries and
+    # bulk inserts, inside a single transaction and revision? This is much faster for large spreadsheets.
+    'BULK_CREATE_WORKS': False,
+
+    # Should batch imports (and previews) of works run as background tasks, with the browser polling for
+    # their progress? If not, they run during the request, and a failed import is rolled back.
+    # Background tasks need a task runner (see NOTIFICATION_EMAILS_BACKGROUND).
+    'BATCH_IMPORT_BACKGROUND': False,
+
+    # When the metadata that documents inherit from their work changes, should their XML be refreshed by a
+    # background task (see NOTIFICATION_EMAILS_BACKGROUND)? If not, it's refreshed while the work is saved.
+    'DOCUMENT_REFRESH_BACKGROUND': False,
+
+    # Should changes to works, their documents and related objects be logged, and the metrics of those works
+    # updated shortly afterwards by a background task (see NOTIFICATION_EMAILS_BACKGROUND)? If not, metrics
+    # are only updated by the daily update_daily_metrics command.
+    'WORK_METRICS_INCREMENTAL': False,
+
+    # How long (in seconds) to wait before updating the metrics of changed works, so that changes are batched.
+    'WORK_METRICS_INCREMENTAL_DELAY': 60,
+
+    # How many gazette lookups should publication finders make at once when finding publications for
+    # many works, such as during a batch import?
+    'PUBLICATION_FINDER_WORKERS': 8,
+
+    # How long (in seconds) should publication finder results be cached for? 0 disables caching.
+    'PUBLICATION_FINDER_CACHE_TTL': 24 * 60 * 60,
+
+    # Should PDFs and ePUBs of published documents be kept in file storage once rendered, rather than only
+    # in the cache? See indigo_api.render_store.
+    'RENDER_STORE': False,
+
+    # With RENDER_STORE, should the content API render missing PDFs and ePUBs in background tasks (see
+    # NOTIFICATION_EMAILS_BACKGROUND) and respond with a 202 until they're ready, rather than rendering them
+    # during the request? Published documents are also pre-rendered whenever they're saved.
+    'RENDER_BACKGROUND': False,
+
+    # How many processes should render the HTML of documents when many documents are rendered into a single
+    # PDF or ePUB, such as all the acts of a year? 1 renders them one after the other. More than 1 forks
+    # worker processes from the process doing the rendering, which can deadlock if that process has other
+    # threads running, so only raise this when rendering happens in single-threaded processes, such as
+    # background task runners or sync web workers.
+    'RENDER_MANY_WORKERS': 1,
 }
 
 # Database
@@ -23,13 +23,13 @@ class BaseBulkCreatorTest(testcases.TestCase):
         creator.testing = True
         self.creator = creator
 
-    def get_works(self, dry_run, filename):
+    def get_works(self, dry_run, filename, bulk=False):
         file = os.path.join(os.path.dirname(__file__), filename)
         with open(file) as csv_file:
             content = csv_file.read()
             reader = csv.reader(io.StringIO(content))
             table = list(reader)
-            return self.creator.create_works(table, dry_run, None)
+            return self.creator.create_works(table, dry_run, None, bulk=bulk)
 
     def test_basic_preview(self):
         works = self.get_works(True, 'basic.csv')
@@ -1004,6 +1004,47 @@ class BaseBulkCreatorTest(testcases.TestCase):
         self.assertEqual(3, len(w2_tasks))
         self.assertEqual(3, len(w3_tasks))
 
+    def test_bulk_basic_live(self):
+        works = self.get_works(False, 'basic.csv', bulk=True)
+        self.assertEqual(2, len(works))
+        self.assertEqual(['validate', 'prefetch', 'publications', 'create', 'commencements', 'relationships', 'tasks'],
+                         [phase for phase, secs in self.creator.timings])
+
+        work1 = Work.objects.get(frbr_uri='/akn/za/act/2020/1')
+        self.assertEqual(work1, works[0].work)
+        self.assertEqual('success', works[0].status)
+        self.assertEqual('Testy 1', work1.title)
+        self.assertEqual(['Import content', 'Link gazette'], sorted(t.title for t in work1.tasks.all()))
+
+        work2 = Work.objects.get(frbr_uri='/akn/za/act/2020/2')
+        self.assertEqual(work2, works[1].work)
+        self.assertTrue(work2.stub)
+        self.assertEqual(['Link gazette'], [t.title for t in work2.tasks.all()])
+
+        # a second run finds the existing works
+        works = self.get_works(False, 'basic.csv', bulk=True)
+        self.assertEqual(['duplicate', 'duplicate'], [row.status for row in works])
+        self.assertEqual(2, work1.tasks.count())
+
+    def test_bulk_link_amendments_active(self):
+        works = self.get_works(False, 'amendments_active.csv', bulk=True)
+        main = works[0].work
+        amend1 = works[1].work
+        amend2 = works[2].work
+        error = works[3].work
+
+        amendments = main.amendments.all()
+        self.assertEqual(
+            [(amend1, datetime.date(2020, 6, 1)), (amend2, datetime.date(2020, 8, 1))],
+            [(a.amending_work, a.date) for a in amendments])
+        self.assertEqual(2, [t.title for t in main.tasks.all()].count('Apply amendment'))
+        self.assertIn('Link amendment (active)', [t.title for t in error.tasks.all()])
+
+        # existing amendments aren't duplicated
+        self.get_works(False, 'amendments_active.csv', bulk=True)
+        self.assertEqual(2, main.amendments.count())
+        self.assertEqual(2, [t.title for t in main.tasks.all()].count('Apply amendment'))
+
     # TODO:
     #  - test_link_publication_document
     #  - test_create_task (include workflow too)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+from lxml import etree
+
+from django.test import TestCase
+
+from indigo.analysis.italics_terms import BaseItalicsFinder
+from indigo.analysis.pipeline import AnalysisPipeline
+from indigo.analysis.refs.base import SectionRefsFinderENG
+from indigo_api.models import Document, Work, Language
+from indigo_api.tests.fixtures import document_fixture
+
+
+class AnalysisPipelineTestCase(TestCase):
+    fixtures = ['languages_data', 'countries']
+
+    def setUp(self):
+        self.work = Work(frbr_uri='/akn/za/act/1991/1')
+        self.eng = Language.for_code('eng')
+        self.maxDiff = None
+
+    def make_document(self):
+        return Document(
+            work=self.work,
+            document_xml=document_fixture(
+                xml="""
+        <section eId="sec_1">
+          <num>1.</num>
+          <heading>Application of Act</heading>
+          <content>
+            <p>As given in section 2, published in the Gazette.</p>
+          </content>
+        </section>
+        <section eId="sec_2">
+          <num>2.</num>
+          <heading>Important heading</heading>
+          <content>
+            <p>An important provision.</p>
+          </content>
+        </section>
+                """
+            ),
+            language=self.eng)
+
+    def test_stages_share_tree(self):
+        document = self.make_document()
+        italics = BaseItalicsFinder()
+
+        pipeline = AnalysisPipeline()
+        pipeline.add_stage('internal-refs', SectionRefsFinderENG().find_references_in_root)
+        pipeline.add_stage('italics-terms', lambda root, doc: italics.mark_up_italics_in_root(root, ['Gazette']))
+        pipeline.run(document)
+
+        root = etree.fromstring(document.content)
+        p = root.xpath('//a:section[@eId="sec_1"]//a:p', namespaces={'a': root.nsmap[None]})[0]
+        self.assertEqual(
+            '<p xmlns="http://docs.oasis-open.org/legaldocml/ns/akn/3.0">As given in <ref href="#sec_2">section 2</ref>, '
+            'published in the <i>Gazette</i>.</p>',
+            etree.tostring(p, encoding='unicode').strip())
+
+        self.assertEqual(['parse', 'internal-refs', 'italics-terms', 'serialise'], [name for name, secs in pipeline.timings])
+
+    def test_same_as_individual_finders(self):
+        expected = self.make_document()
+        SectionRefsFinderENG().find_references_in_document(expected)
+        BaseItalicsFinder().mark_up_italics_in_document(expected, ['Gazette'])
+
+        document = self.make_document()
+        italics = BaseItalicsFinder()
+        pipeline = AnalysisPipeline()
+        pipeline.add_stage('internal-refs', SectionRefsFinderENG().find_references_in_root)
+        pipeline.add_stage('italics-terms', lambda root, doc: italics.mark_up_italics_in_root(root, ['Gazette']))
+        pipeline.run(document)
+
+        self.assertEqual(expected.content, document.content)
+
+    def test_no_stages(self):
+        document = self.make_document()
+        xml = document.content
+
+        pipeline = AnalysisPipeline()
+        pipeline.run(document)
+
+        self.assertEqual(xml, document.content)
+        self.assertEqual([], pipeline.timings)
@@ -255,3 +255,27 @@ class BeautifulProvisionsTestCase(TestCase):
             'section-Y',
             'section-Z',
         ])
+
+    def test_many_provisions(self):
+        pit_1_provisions = [str(i) for i in range(5000)]
+        pit_2_provisions = [f'{i}A' if i % 2 else str(i) for i in range(5000)]
+        provisions = []
+        id_set = set()
+        for pit in [pit_1_provisions, pit_2_provisions]:
+            items = [DotMap(id=f'section-{p}') for p in pit]
+            self.toc_plugin.insert_provisions(provisions, id_set, items)
+        provisions = [p.id for p in provisions]
+        self.assertEqual(7500, len(provisions))
+        self.assertEqual(['section-0', 'section-1', 'section-1A', 'section-2', 'section-3', 'section-4'], provisions[:6])
+
+    def test_from_dict(self):
+        item = TOCElement(element=None, component='main', type_='part', id_='part_1', num='1', subcomponent='part/1')
+        item.title = 'Part 1'
+        kid = TOCElement(element=None, component='main', type_='section', id_='part_1__sec_1', num='1.',
+                         heading='Heading', subcomponent='section/1', parent=item)
+        kid.title = '1. Heading'
+        item.children = [kid]
+
+        copy = TOCElement.from_dict(item.as_dict())
+        self.assertEqual(item.as_dict(), copy.as_dict())
+        self.assertEqual(['part_1__sec_1'], [p.id for p in self.toc_plugin.commenceable_items([copy])])
@@ -2,8 +2,9 @@
 from unittest import TestCase
 
 import lxml.html
+from lxml import etree
 
-from indigo.analysis.differ import AttributeDiffer
+from indigo.analysis.differ import AttributeDiffer, AKNHTMLDiffer
 
 
 def as_tree(html):
@@ -14,6 +15,31 @@ def as_html(tree):
     return lxml.html.tostring(tree, encoding='utf-8').decode('utf-8')
 
 
+def section(num, text):
+    return f'<section class="akn-section" id="sec_{num}"><h3>{num}. Heading</h3><span class="akn-p">{text}</span></section>'
+
+
+def akn(body, meta=''):
+    return etree.fromstring(
+        '<akomaNtoso xmlns="http://docs.oasis-open.org/legaldocml/ns/akn/3.0"><act>'
+        f'<meta>{meta}</meta><body>{body}</body></act></akomaNtoso>')
+
+
+def akn_section(num, text):
+    return f'<section eId="sec_{num}"><num>{num}.</num><content><p>{text}</p></content></section>'
+
+
+class CountingDiffer(AKNHTMLDiffer):
+    """ Counts the number of elements given to xmldiff.
+    """
+    def __init__(self):
+        self.diffed = []
+
+    def diff_trees(self, old_tree, new_tree):
+        self.diffed.append(len(new_tree.xpath('.//*')))
+        return super().diff_trees(old_tree, new_tree)
+
+
 class AttributeDifferTestCase(TestCase):
     def setUp(self):
         self.differ = AttributeDiffer()
@@ -141,3 +167,66 @@ class AttributeDifferTestCase(TestCase):
                 'html_old': '3'
             }]},
             diffs)
+
+    def test_aligned_sections(self):
+        old = as_tree('<div>' + ''.join(section(i, f'text {i}') for i in range(1, 6)) + '</div>')
+        new = as_tree('<div>' + section(1, 'text 1') + section(2, 'text 2') + section(3, 'changed text 3')
+                      + section(4, 'text 4') + section(9, 'new') + section(5, 'text 5') + '</div>')
+        differ = CountingDiffer()
+        diff = differ.diff_html(old, new)
+
+        self.assertEqual(
+            as_html(diff),
+            '<div>' + section(1, 'text 1') + section(2, 'text 2')
+            + section(3, '<ins>changed </ins>text 3') + section(4, 'text 4')
+            + section(9, 'new').replace('class="akn-section"', 'class="ins akn-section"') + section(5, 'text 5') + '</div>',
+        )
+        # only the new section (and its two children) and the changed paragraph are given to xmldiff
+        self.assertEqual([3, 1], differ.diffed)
+
+    def test_aligned_many_changed(self):
+        old = as_tree('<div>' + section(1, 'alpha') + section(2, 'beta') + section(3, 'gamma') + '</div>')
+        new = as_tree('<div>' + section(1, 'alpha one') + section(2, 'beta') + section(3, 'gamma three') + '</div>')
+        n_changes, diff = self.differ.diff_document_html(old, new)
+
+        self.assertEqual(
+            as_html(diff),
+            '<div>' + section(1, 'alpha<ins> one</ins>') + section(2, 'beta')
+            + section(3, 'gamma<ins> three</ins>') + '</div>',
+        )
+        self.assertEqual(2, n_changes)
+
+    def test_aligned_tail_changed(self):
+        old = as_tree('<div>' + section(1, 'text 1') + 'old tail' + section(2, 'text 2') + '</div>')
+        new = as_tree('<div>' + section(1, 'text 1') + 'new tail' + section(2, 'text 2') + '</div>')
+        n_changes, diff = self.differ.diff_document_html(old, new)
+
+        self.assertEqual(
+            as_html(diff),
+            '<div>' + section(1, 'text 1') + '<span class="diff-pair"><del>old</del><ins>new</ins></span> tail'
+            + section(2, 'text 2') + '</div>',
+        )
+
+    def test_changed_elements(self):
+        old = akn(''.join(akn_section(i, f'text {i}') for i in range(1, 4)), meta='<lifecycle eId="x"/>')
+        new = akn(akn_section(1, 'text 1') + akn_section(2, 'changed') + akn_section(3, 'text 3'), meta='<lifecycle/>')
+        changed = self.differ.changed_elements(old, new)
+
+        self.assertEqual([('sec_2', 'sec_2')], [(a.get('eId'), b.get('eId')) for a, b in changed])
+        self.assertEqual([], self.differ.changed_elements(old, old))
+
+    def test_changed_elements_nested(self):
+        old = akn('<chapter eId="chp_1"><num>1</num>' + akn_section(1, 'text 1') + akn_section(2, 'text 2') + '</chapter>')
+        new = akn('<chapter eId="chp_1"><num>1</num>' + akn_section(1, 'text 1') + akn_section(2, 'changed') + '</chapter>')
+        changed = self.differ.changed_elements(old, new)
+        self.assertEqual(['sec_2'], [b.get('eId') for a, b in changed])
+
+        # a new section changes the chapter
+        new = akn('<chapter eId="chp_1"><num>1</num>' + akn_section(1, 'text 1') + akn_section(3, 'new') + akn_section(2, 'text 2') + '</chapter>')
+        changed = self.differ.changed_elements(old, new)
+        self.assertEqual(['chp_1'], [b.get('eId') for a, b in changed])
+
+    def test_changed_elements_outside_eids(self):
+        old = akn(akn_section(1, 'text 1'))
+        new = akn(akn_section(1, 'text 1') + akn_section(2, 'text 2'))
+        self.assertIsNone(self.differ.changed_elements(old, new))
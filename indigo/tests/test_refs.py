@@ -8,7 +8,7 @@ from cobalt import FrbrUri
 
 from indigo.analysis.refs.base import SectionRefsFinderENG, RefsFinderENG, RefsFinderSubtypesENG, RefsFinderCapENG
 
-from indigo_api.models import Document, Language, Work, Country, User, Subtype
+from indigo_api.models import Document, Language, Work, Country, Locality, User, Subtype
 from indigo_api.tests.fixtures import document_fixture
 
 
@@ -722,7 +722,7 @@ class SectionRefsFinderTestCase(TestCase):
 
 
 class RefsFinderENGTestCase(TestCase):
-    fixtures = ['languages_data', 'countries']
+    fixtures = ['languages_data', 'countries', 'user']
 
     def setUp(self):
         self.work = Work(frbr_uri='/akn/za/act/1991/1')
@@ -814,6 +814,59 @@ class RefsFinderENGTestCase(TestCase):
         expected.content = etree.tostring(root, encoding='utf-8').decode('utf-8')
         self.assertEqual(expected.content, document.content)
 
+    def test_local_works_looked_up_once(self):
+        user1 = User.objects.get(pk=1)
+        local_work = Work(
+            frbr_uri='/akn/za-cpt/act/2012/22',
+            title='By-law 22 of 2012',
+            country=Country.objects.get(pk=1),
+            locality=Locality.objects.get(code='cpt'),
+            created_by_user=user1,
+            updated_by_user=user1,
+        )
+        local_work.save()
+
+        document = Document(
+            work=self.work,
+            document_xml=document_fixture(
+                xml="""
+        <section eId="sec_1">
+          <num>1.</num>
+          <heading>Tester</heading>
+          <paragraph eId="sec_1.paragraph-0">
+            <content>
+              <p>Something to do with Act no 22 of 2012.</p>
+              <p>And another thing about Act 4 of 1998 and Act 22 of 2012.</p>
+            </content>
+          </paragraph>
+        </section>"""
+            ),
+            language=self.eng)
+
+        expected = Document(
+            work=self.work,
+            document_xml=document_fixture(
+                xml="""
+        <section eId="sec_1">
+          <num>1.</num>
+          <heading>Tester</heading>
+          <paragraph eId="sec_1.paragraph-0">
+            <content>
+              <p>Something to do with Act <ref href="/akn/za-cpt/act/2012/22">no 22 of 2012</ref>.</p>
+              <p>And another thing about Act <ref href="/akn/za/act/1998/4">4 of 1998</ref> and Act <ref href="/akn/za-cpt/act/2012/22">22 of 2012</ref>.</p>
+            </content>
+          </paragraph>
+        </section>"""
+            ),
+            language=self.eng)
+
+        document.doc.frbr_uri = FrbrUri.parse('/akn/za-cpt/act/2020/1')
+        with self.assertNumQueries(1):
+            self.finder.find_references_in_document(document)
+        root = etree.fromstring(expected.content)
+        expected.content = etree.tostring(root, encoding='utf-8').decode('utf-8')
+        self.assertEqual(expected.content, document.content)
+
 
 class RefsFinderSubtypesENGTestCase(TestCase):
     fixtures = ['languages_data', 'countries', 'subtype']
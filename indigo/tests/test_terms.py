@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import re
+from unittest import TestCase
+
+from indigo.analysis.terms.base import TermsMatcher
+
+
+class TermsMatcherTestCase(TestCase):
+    def assert_same_as_regex(self, terms, text):
+        terms_re = re.compile(r'\b(%s)\b' % '|'.join(re.escape(t) for t in sorted(terms, key=lambda t: -len(t))))
+        expected = [(m.start(), m.end(), m.group(1)) for m in terms_re.finditer(text)]
+        self.assertEqual(expected, list(TermsMatcher(terms).finditer(text)))
+
+    def test_longest_match(self):
+        matcher = TermsMatcher(['Act', 'the Act', 'Act No'])
+        self.assertEqual([
+            (0, 7, 'the Act'),
+            (12, 18, 'Act No'),
+        ], list(matcher.finditer('the Act and Act No 5')))
+
+    def test_word_boundaries(self):
+        matcher = TermsMatcher(['Act', 'officer'])
+        self.assertEqual([], list(matcher.finditer('Acts and officers')))
+        self.assertEqual([(0, 3, 'Act')], list(matcher.finditer("Act's officer_")))
+
+    def test_same_as_regex(self):
+        terms = ['Act', 'the Act', 'authorised officer', 'officer', 'City', '(a)', 'über', 'Act.']
+        for text in [
+            'the Act, the Acts and an authorised officer of the City',
+            'under (a) and (a)b of the Act.',
+            'über-officer and Cityscape; Act.Act',
+            '',
+        ]:
+            self.assert_same_as_regex(terms, text)
+
+    def test_no_terms(self):
+        self.assertEqual([], list(TermsMatcher([]).finditer('the Act')))
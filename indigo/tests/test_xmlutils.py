@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
+import os
+import tempfile
 from unittest import TestCase
 
 from lxml import etree
 
 from indigo.analysis.differ import unwrap_element
+from indigo.xmlutils import XSLTCache
 
 
 class XMLUtilsTestCase(TestCase):
@@ -40,3 +43,64 @@ class XMLUtilsTestCase(TestCase):
             actual,
         )
 
+
+
+XSLT = """<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:output method="text"/>
+  <xsl:template match="/">%s</xsl:template>
+</xsl:stylesheet>
+"""
+
+
+class XSLTCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = XSLTCache(maxsize=2)
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_xslt(self, name, text, mtime=None):
+        fname = os.path.join(self.tmpdir.name, name)
+        with open(fname, 'w') as f:
+            f.write(XSLT % text)
+        if mtime:
+            os.utime(fname, (mtime, mtime))
+        return fname
+
+    def transform(self, xslt):
+        return str(xslt(etree.fromstring('<root/>')))
+
+    def test_compiled_once(self):
+        fname = self.write_xslt('a.xsl', 'a')
+        xslt = self.cache.get(fname)
+        self.assertEqual('a', self.transform(xslt))
+        self.assertIs(xslt, self.cache.get(fname))
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+
+    def test_changed_file_recompiled(self):
+        fname = self.write_xslt('a.xsl', 'a', mtime=1000)
+        self.assertEqual('a', self.transform(self.cache.get(fname)))
+
+        self.write_xslt('a.xsl', 'b', mtime=2000)
+        self.assertEqual('b', self.transform(self.cache.get(fname)))
+
+    def test_bounded(self):
+        a = self.cache.get(self.write_xslt('a.xsl', 'a'))
+        self.cache.get(self.write_xslt('b.xsl', 'b'))
+        self.cache.get(self.write_xslt('c.xsl', 'c'))
+        self.assertEqual(2, len(self.cache))
+        # a was evicted
+        self.assertIsNot(a, self.cache.get(os.path.join(self.tmpdir.name, 'a.xsl')))
+
+    def test_invalidate(self):
+        fname = self.write_xslt('a.xsl', 'a')
+        self.cache.get(fname)
+        self.cache.get(self.write_xslt('b.xsl', 'b'))
+
+        self.cache.invalidate(fname)
+        self.assertEqual(1, len(self.cache))
+
+        self.cache.invalidate()
+        self.assertEqual(0, len(self.cache))
@@ -1,7 +1,11 @@
+import os
 import re
+import threading
+from collections import OrderedDict
 from itertools import chain
 
 import lxml.html
+from lxml import etree
 
 
 def fragments_fromstring(html):
@@ -121,3 +125,68 @@ def closest(element, predicate):
         return next(e for e in chain([element], element.iterancestors()) if predicate(e))
     except StopIteration:
         return None
+
+
+class XSLTCache(object):
+    """ Process-wide cache of compiled XSLT stylesheets.
+
+    Stylesheets are keyed by their resolved filename and modification time, so a changed file
+    is recompiled on next use. At most +maxsize+ stylesheets are kept, least recently used first out.
+    Compiled XSLT objects can safely be shared between threads.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, filename):
+        """ Return a compiled :class:`lxml.etree.XSLT` for +filename+, compiling it if necessary.
+        """
+        filename = os.path.realpath(filename)
+        key = (filename, os.path.getmtime(filename))
+
+        with self._lock:
+            xslt = self._cache.get(key)
+            if xslt is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return xslt
+            self.misses += 1
+
+        # compile outside the lock; at worst two threads compile the same file once each
+        xslt = etree.XSLT(etree.parse(filename))
+
+        with self._lock:
+            self._cache[key] = xslt
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+        return xslt
+
+    def invalidate(self, filename=None):
+        """ Remove +filename+ from the cache, or clear the entire cache if +filename+ is None.
+        """
+        with self._lock:
+            if filename is None:
+                self._cache.clear()
+            else:
+                filename = os.path.realpath(filename)
+                for key in [k for k in self._cache if k[0] == filename]:
+                    del self._cache[key]
+
+    def __len__(self):
+        return len(self._cache)
+
+
+xslt_cache = XSLTCache()
+
+
+def load_xslt(filename):
+    """ Return a compiled :class:`lxml.etree.XSLT` for the stylesheet in +filename+,
+    using the process-wide XSLT cache.
+    """
+    return xslt_cache.get(filename)
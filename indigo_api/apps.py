@@ -1,4 +1,10 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+from django.db import DatabaseError
+
+log = logging.getLogger(__name__)
 
 
 class IndigoApiConfig(AppConfig):
@@ -18,3 +24,11 @@ class IndigoApiConfig(AppConfig):
         registry.register(PlaceSettings)
         registry.register(ArbitraryExpressionDate)
         registry.register(Commencement)
+
+        if settings.INDIGO.get('WARM_RESOLUTION_CACHE'):
+            from indigo_api.utils import warm_resolution_cache
+            try:
+                warm_resolution_cache()
+            except DatabaseError as e:
+                # eg. before migrations have been run
+                log.warning(f"Couldn't warm template resolution cache: {e}")
@@ -0,0 +1,63 @@
+""" Refreshing the metadata that documents inherit from their works.
+
+A document's XML includes details of its work, such as the FRBR URI, publication details, amendments
+and repeal. When those change, the work's documents are refreshed by refresh_work_documents. This is
+queued as a background task, so that saving a work doesn't re-save all of its documents during the
+request, and repeated saves of a work while a refresh is pending only run it once.
+
+Only documents whose XML is out of date are changed, and they're written with a single bulk update.
+Unlike saving each document, this doesn't create a new version of the document or send an activity
+stream action, since the document's content hasn't changed.
+"""
+import logging
+
+from background_task import background
+from django.conf import settings
+from django.utils import timezone
+
+from indigo_api import render_cache, render_store
+
+
+log = logging.getLogger(__name__)
+
+
+def refresh_documents(documents):
+    """ Update the XML of those +documents+ with out of date work metadata, and return them.
+    """
+    from indigo_api.models import Document
+
+    stale = [doc for doc in documents if doc.work_metadata_stale()]
+    if not stale:
+        return []
+
+    now = timezone.now()
+    for doc in stale:
+        doc.updated_at = now
+        doc.copy_attributes()
+
+    Document.objects.bulk_update(stale, ['frbr_uri', 'title', 'document_xml', 'updated_at'])
+
+    # bulk_update doesn't send post_save, so do what it would for rendered documents
+    for doc in stale:
+        render_cache.invalidate_document(doc.id)
+        render_store.document_saved(doc)
+
+    return stale
+
+
+@background(queue='indigo', remove_existing_tasks=True)
+def refresh_work_documents(work_id):
+    from indigo_api.models import Document
+
+    documents = Document.objects \
+        .filter(work_id=work_id) \
+        .select_related('language', 'language__language') \
+        .prefetch_related('work__repealed_by', 'work__amendments__amending_work')
+
+    refreshed = refresh_documents(documents)
+    log.info(f"Refreshed {len(refreshed)} documents for work {work_id}")
+
+
+if not settings.INDIGO.get('DOCUMENT_REFRESH_BACKGROUND', False):
+    # change background document refreshes to be synchronous
+    refresh_work_documents = refresh_work_documents.now
@@ -4,7 +4,10 @@ import shutil
 import tempfile
 import urllib.parse
 import logging
+import multiprocessing
 import subprocess
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
 import lxml.html
 from django.conf import settings
@@ -16,6 +19,7 @@ from lxml import etree as ET
 from sass_processor.processor import SassProcessor
 from wkhtmltopdf import make_absolute_paths, wkhtmltopdf
 
+from indigo.xmlutils import load_xslt
 from indigo_api.models import Colophon
 from indigo_api.utils import filename_candidates, find_best_template, find_best_static
 
@@ -57,6 +61,11 @@ class HTMLExporter(object):
             else:
                 content_html = ''
 
+        return self.render_template(document, element, content_html, renderer)
+
+    def render_template(self, document, element, content_html, renderer):
+        """ Render the boilerplate HTML around the already-rendered +content_html+ of this document.
+        """
         # find the template to use
         template_name = self.template_name or self.find_template(document)
 
@@ -157,23 +166,49 @@ class PDFExporter(HTMLExporter):
             return self.to_pdf(html, tmpdir, document=document)
 
     def render_many(self, documents, **kwargs):
-        html = []
+        """ Render many documents into a single PDF.
 
+        The HTML for each document is rendered in parallel by worker processes (see map_jobs), and written
+        to its own file. The files are then combined into the PDF container, so that only one document's
+        HTML is held in memory at a time.
+        """
         with tempfile.TemporaryDirectory() as tmpdir:
-            # render individual documents
+            markers = [f'{CONTENT_MARKER}-{i}' for i in range(len(documents))]
+            jobs = []
+
             for i, doc in enumerate(documents):
+                self.document = doc
                 self.media_url = f'doc-{i}/'
-                doc_html = super(PDFExporter, self).render(doc, **kwargs)
-                self.save_attachments(doc_html, doc, f'doc-{i}/media/', tmpdir)
-
-                html.append(doc_html)
+                renderer = self._xml_renderer(doc)
+                jobs.append(DocumentHTMLJob(
+                    xslt_filename=renderer.xslt_filename,
+                    xslt_params=renderer.xslt_params,
+                    xml=doc.document_xml,
+                    wrapper=self.render_template(doc, None, markers[i], renderer),
+                    marker=markers[i],
+                    prefix=f'doc-{i}/media/',
+                    fname=os.path.join(tmpdir, f'doc-{i}.html'),
+                ))
+
+            # copy the attachments each document uses, in order, as its HTML is ready
+            for doc, job, fnames in zip(documents, jobs, map_jobs(render_document_html, jobs)):
+                self.copy_attachments(doc, fnames, os.path.join(tmpdir, job.prefix))
 
             # combine and embed the HTML into the PDF container
-            html = render_to_string('indigo_api/akn/export/pdf.html', {
-                'documents': list(zip(documents, html)),
+            container = render_to_string('indigo_api/akn/export/pdf.html', {
+                'documents': list(zip(documents, markers)),
             })
 
-            return self.to_pdf(html, tmpdir, documents=documents)
+            with tempfile.NamedTemporaryFile(suffix='.html', dir=tmpdir) as f:
+                for marker, job in zip(markers, jobs):
+                    head, container = container.split(marker, 1)
+                    f.write(make_absolute_paths(head).encode('utf-8'))
+                    with open(job.fname, 'rb') as doc_f:
+                        shutil.copyfileobj(doc_f, f)
+                f.write(make_absolute_paths(container).encode('utf-8'))
+                f.flush()
+
+                return self.html_file_to_pdf(f.name, tmpdir, documents=documents)
 
     def save_attachments(self, html, document, prefix, tmpdir):
         """ Place attachments needed by the html of this document into tmpdir. Only attachments
@@ -186,26 +221,40 @@ class PDFExporter(HTMLExporter):
         imgs = [img for img in html.iter('img') if img.get('src', '').startswith(prefix)]
         fnames = set(img.get('src')[prefix_len:] for img in imgs)
 
+        self.copy_attachments(document, fnames, os.path.join(tmpdir, prefix))
+
+        # make img references absolute
+        # see https://github.com/wkhtmltopdf/wkhtmltopdf/issues/2660
+        for img in imgs:
+            img.set('src', os.path.join(tmpdir, img.get('src')))
+
+        return lxml.html.tostring(html, encoding='unicode')
+
+    def copy_attachments(self, document, fnames, media_dir):
+        """ Copy the attachments of this document named in +fnames+ (which are URL-quoted) into media_dir.
+        """
         # ensure the media directory exists
-        media_dir = os.path.join(tmpdir, prefix)
         os.makedirs(media_dir, exist_ok=True)
 
         for attachment in document.attachments.all():
             # the src attribute values in fnames are URL-quoted
             if urllib.parse.quote(attachment.filename) in fnames:
-                # save the attachment into tmpdir
+                # save the attachment into media_dir
                 fname = os.path.join(media_dir, attachment.filename)
                 with open(fname, "wb") as f:
                     shutil.copyfileobj(attachment.file, f)
 
-        # make img references absolute
-        # see https://github.com/wkhtmltopdf/wkhtmltopdf/issues/2660
-        for img in imgs:
-            img.set('src', os.path.join(tmpdir, img.get('src')))
+    def to_pdf(self, html, dirname, document=None, documents=None):
+        # this makes all paths, such as stylesheets and javascript, use
+        # absolute file paths so that wkhtmltopdf finds them
+        html = make_absolute_paths(html)
 
-        return lxml.html.tostring(html, encoding='unicode')
+        with tempfile.NamedTemporaryFile(suffix='.html', dir=dirname) as f:
+            f.write(html.encode('utf-8'))
+            f.flush()
+            return self.html_file_to_pdf(f.name, dirname, document=document, documents=documents)
 
-    def to_pdf(self, html, dirname, document=None, documents=None):
+    def html_file_to_pdf(self, fname, dirname, document=None, documents=None):
         options = self.pdf_options()
         args = [
             '--allow', dirname,
@@ -213,13 +262,9 @@ class PDFExporter(HTMLExporter):
             '--allow', settings.STATIC_ROOT,
         ]
 
-        # for debugging, an array of (filename, content) tuples
+        # for debugging, the names of the files given to wkhtmltopdf
         files = []
 
-        # this makes all paths, such as stylesheets and javascript, use
-        # absolute file paths so that wkhtmltopdf finds them
-        html = make_absolute_paths(html)
-
         # keep this around so that the file doesn't get cleaned up
         # before it's used
         colophon_f = None
@@ -230,24 +275,25 @@ class PDFExporter(HTMLExporter):
                 colophon_f.write(colophon.encode('utf-8'))
                 colophon_f.flush()
                 args.extend(['cover', 'file://' + colophon_f.name])
-                files.append((colophon_f.name, colophon))
+                files.append(colophon_f.name)
 
         toc_xsl = options.pop('xsl-style-sheet')
         if self.toc:
             args.extend(['toc', '--xsl-style-sheet', toc_xsl])
 
-        with tempfile.NamedTemporaryFile(suffix='.html', dir=dirname) as f:
-            f.write(html.encode('utf-8'))
-            f.flush()
-            args.append('file://' + f.name)
-            files.append((f.name, html))
+        args.append('file://' + fname)
+        files.append(fname)
 
-            try:
-                return self._wkhtmltopdf(args, **options)
-            except subprocess.CalledProcessError as e:
-                files = '\n'.join(f'{name}:\n---\n{value}\n---' for name, value in files)
-                log.warning(f"wkhtmltopdf failed. args: {args}. options: {options}. files: \n{files}")
-                raise
+        try:
+            return self._wkhtmltopdf(args, **options)
+        except subprocess.CalledProcessError as e:
+            contents = []
+            for name in files:
+                with open(name, encoding='utf-8') as f:
+                    contents.append(f'{name}:\n---\n{f.read()}\n---')
+            contents = '\n'.join(contents)
+            log.warning(f"wkhtmltopdf failed. args: {args}. options: {options}. files: \n{contents}")
+            raise
 
     def render_colophon(self, document=None, documents=None):
         """ Find the colophon template this document and render it, returning
@@ -367,7 +413,7 @@ class EPUBExporter(HTMLExporter):
             self.add_colophon(document=document)
         self.book.spine.append('nav')
 
-        self.add_document(document)
+        self.add_documents([document])
         return self.to_epub()
 
     def render_many(self, documents):
@@ -387,9 +433,7 @@ class EPUBExporter(HTMLExporter):
             self.add_colophon(documents=documents)
         self.book.spine.append('nav')
 
-        for d in documents:
-            self.add_document(d)
-
+        self.add_documents(documents)
         return self.to_epub()
 
     def create_book(self):
@@ -459,7 +503,29 @@ class EPUBExporter(HTMLExporter):
             'documents': documents,
         })
 
-    def add_document(self, document):
+    def add_documents(self, documents):
+        """ Add documents to the book, in order. The HTML for the items of each document's table of contents
+        is rendered in parallel by worker processes (see map_jobs).
+        """
+        tocs = [document.table_of_contents() for document in documents]
+        jobs = []
+        for document, toc in zip(documents, tocs):
+            renderer = self._xml_renderer(document)
+            tree = document.doc.root.getroottree()
+            jobs.append(DocumentItemsJob(
+                xslt_filename=renderer.xslt_filename,
+                xslt_params=renderer.xslt_params,
+                xml=ET.tostring(tree, encoding='unicode'),
+                paths=[tree.getpath(item.element) for item in toc],
+            ))
+
+        for document, toc, (items_html, media) in zip(documents, tocs, map_jobs(render_document_items, jobs)):
+            self.add_document(document, toc, items_html, media)
+
+    def add_document(self, document, toc, items_html, media):
+        """ Add a document to the book, using the already-rendered HTML for each of its top-level
+        table of contents items, and the filenames of the media it uses.
+        """
         # relative directory for files for this document
         file_dir = 'doc-%s' % document.id
         self.renderer = self._xml_renderer(document)
@@ -468,23 +534,16 @@ class EPUBExporter(HTMLExporter):
 
         # generate the individual items for each navigable element
         children = []
-        toc = document.table_of_contents()
-        for item in toc:
-            children.append(self.add_item(item, file_dir))
+        for item, html in zip(toc, items_html):
+            children.append(self.add_item(item, file_dir, html))
 
         # add everything as a child of this document
         self.book.toc.append((titlepage, children))
 
         # add images
-        self.add_attachments(document, file_dir)
-
-    def add_attachments(self, document, file_dir):
-        fnames = set(
-            img.get('src')[6:]
-            for img in document.doc.root.xpath('//a:img[@src]', namespaces={'a': document.doc.namespace})
-            if img.get('src', '').startswith('media/')
-        )
+        self.add_attachments(document, file_dir, media)
 
+    def add_attachments(self, document, file_dir, fnames):
         for attachment in document.attachments.all():
             if attachment.filename in fnames:
                 img = epub.EpubImage()
@@ -515,7 +574,7 @@ class EPUBExporter(HTMLExporter):
 
         return entry
 
-    def add_item(self, item, file_dir):
+    def add_item(self, item, file_dir, html):
         id = self.item_id(item)
         fname = os.path.join(file_dir, self.PATH_SUB_RE.sub('_', id) + '.xhtml')
 
@@ -523,7 +582,7 @@ class EPUBExporter(HTMLExporter):
             title=item.title,
             uid='-'.join([file_dir, id]),
             file_name=fname)
-        entry.content = self.clean_html(self.renderer.render(item.element), wrap='akoma-ntoso')
+        entry.content = self.clean_html(html, wrap='akoma-ntoso')
 
         self.book.add_item(entry)
         self.book.spine.append(entry)
@@ -582,7 +641,8 @@ class XSLTRenderer(object):
     """
 
     def __init__(self, xslt_filename, xslt_params=None):
-        self.xslt = ET.XSLT(ET.parse(xslt_filename))
+        self.xslt_filename = xslt_filename
+        self.xslt = load_xslt(xslt_filename)
         self.xslt_params = xslt_params or {}
 
     def render(self, node):
@@ -607,4 +667,70 @@ class XSLTRenderer(object):
         ns = node.nsmap[None]
         scope = node.xpath('./ancestor::a:attachment[@eId]/@eId', namespaces={'a': ns})
         if scope:
-            return scope[0]
\ No newline at end of file
+            return scope[0]
+
+
+# Rendering the HTML for many documents at once, such as for a PDF of all the acts of a year, is done by
+# a pool of worker processes. The workers only transform XML and write files; anything that needs the
+# database, such as templates and attachments, is done by the calling process.
+
+# placeholder for a document's content HTML in its (already rendered) template
+CONTENT_MARKER = 'INDIGO-CONTENT-HTML-f6c1d0e2'
+
+DocumentHTMLJob = namedtuple('DocumentHTMLJob', 'xslt_filename xslt_params xml wrapper marker prefix fname')
+DocumentItemsJob = namedtuple('DocumentItemsJob', 'xslt_filename xslt_params xml paths')
+
+
+def map_jobs(func, jobs):
+    """ Like map(func, jobs), but using a pool of RENDER_MANY_WORKERS processes when there is more than one job.
+    Results are returned in the same order as the jobs.
+    """
+    workers = min(settings.INDIGO.get('RENDER_MANY_WORKERS', 1), len(jobs))
+    if workers <= 1:
+        yield from map(func, jobs)
+        return
+
+    # forked workers share the loaded settings and code, and don't touch the database
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+        yield from pool.map(func, jobs)
+
+
+def render_document_html(job):
+    """ Render a document's XML into its template and write the HTML to job.fname. Returns the (URL-quoted)
+    filenames of the attachments the HTML uses.
+    """
+    if job.xml:
+        content_html = XSLTRenderer(job.xslt_filename, job.xslt_params).render_xml(job.xml)
+    else:
+        content_html = ''
+    html = job.wrapper.replace(job.marker, content_html)
+
+    prefix_len = len(job.prefix)
+    fnames = set(
+        img.get('src')[prefix_len:]
+        for img in lxml.html.fromstring(html).iter('img')
+        if img.get('src', '').startswith(job.prefix)
+    )
+
+    with open(job.fname, 'w', encoding='utf-8') as f:
+        f.write(make_absolute_paths(html))
+
+    return fnames
+
+
+def render_document_items(job):
+    """ Render the elements of a document at each of job.paths into HTML. Returns a list of the HTML of
+    each element, and the filenames of the media the document uses.
+    """
+    renderer = XSLTRenderer(job.xslt_filename, job.xslt_params)
+    root = ET.fromstring(job.xml)
+    tree = root.getroottree()
+    items_html = [renderer.render(tree.xpath(path)[0]) for path in job.paths]
+
+    media = set(
+        img.get('src')[6:]
+        for img in root.xpath('//a:img[@src]', namespaces={'a': root.nsmap[None]})
+        if img.get('src', '').startswith('media/')
+    )
+
+    return items_html, media
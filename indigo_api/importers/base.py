@@ -14,7 +14,9 @@ from django.core.files.uploadedfile import UploadedFile
 
 from cobalt import AkomaNtosoDocument
 from indigo_api.models import Attachment
+from indigo.analysis.pipeline import AnalysisPipeline
 from indigo.plugins import plugins, LocaleBasedMatcher
+from indigo.xmlutils import load_xslt
 from indigo_api.serializers import AttachmentSerializer
 from indigo_api.utils import filename_candidates, find_best_static
 from indigo_api.importers.pdfs import pdf_extract_pages
@@ -167,7 +169,7 @@ class Importer(LocaleBasedMatcher):
             raise ValueError("Couldn't find XSLT file to use for %s, tried: %s" % (doc, candidates))
 
         html = ET.HTML(html)
-        xslt = ET.XSLT(ET.parse(xslt_filename))
+        xslt = load_xslt(xslt_filename)
         result = xslt(html)
         return str(result)
 
@@ -286,30 +288,10 @@ class Importer(LocaleBasedMatcher):
         """ Run analysis after import.
         Usually only used on PDF documents.
         """
-        finder = plugins.for_document('refs', doc)
-        if finder:
-            finder.find_references_in_document(doc)
-
-        finder = plugins.for_document('refs-subtypes', doc)
-        if finder:
-            finder.find_references_in_document(doc)
-
-        finder = plugins.for_document('refs-cap', doc)
-        if finder:
-            finder.find_references_in_document(doc)
-
-        finder = plugins.for_document('refs-act-names', doc)
-        if finder:
-            finder.find_references_in_document(doc)
-
-        finder = plugins.for_document('internal-refs', doc)
-        if finder:
-            finder.find_references_in_document(doc)
-
-        italics_terms_finder = plugins.for_document('italics-terms', doc)
-        italics_terms = doc.work.country.italics_terms
-        if italics_terms_finder and italics_terms:
-            italics_terms_finder.mark_up_italics_in_document(doc, italics_terms)
+        pipeline = AnalysisPipeline()
+        pipeline.add_references(doc)
+        pipeline.add_italics(doc)
+        pipeline.run(doc)
 
     def create_from_docx(self, docx_file, doc):
         """ We can create a mammoth image handler that stashes the binary data of the image
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.12 on 2026-10-18 09:12
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indigo_api', '0005_block_tasks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='toc_json',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, null=True),
+        ),
+    ]
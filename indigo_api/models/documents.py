@@ -3,6 +3,8 @@ import os
 import logging
 import re
 import datetime
+import threading
+from collections import OrderedDict
 
 from actstream import action
 from django.conf import settings
@@ -22,6 +24,7 @@ from cobalt import FrbrUri, AmendmentEvent, datestring, StructuredDocument
 
 from indigo.plugins import plugins
 from indigo.documents import ResolvedAnchor
+from indigo_api import render_cache, render_store
 
 log = logging.getLogger(__name__)
 
@@ -103,6 +106,70 @@ class DocumentQuerySet(models.QuerySet):
         return obj
 
 
+class ParsedDocumentCache(object):
+    """ Process-wide LRU cache of parsed (cobalt) documents, shared between Document instances, keyed
+    by (document id, updated_at). This is opt-in: it is disabled unless INDIGO['PARSED_DOCUMENT_CACHE_SIZE']
+    is set to the maximum total size, in characters of XML, of documents to keep.
+
+    Cached documents are shared, so they must not be changed. Document instances using a cached
+    document make their own copy before changing it (see `Document.own_doc`).
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        return settings.INDIGO.get('PARSED_DOCUMENT_CACHE_SIZE', 0)
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def get(self, key, xml):
+        """ Get the cached parsed document for this key, or None. The cached entry is only used if it was
+        parsed from the same xml, in case the instance's XML was changed without being saved.
+        """
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == xml:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+    def put(self, key, xml, doc):
+        weight = len(xml)
+        if weight > self.max_size:
+            return
+
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+
+            self._cache[key] = (xml, doc)
+            self.size += weight
+
+            while self.size > self.max_size:
+                _, (old_xml, _) = self._cache.popitem(last=False)
+                self.size -= len(old_xml)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+
+parsed_documents = ParsedDocumentCache()
+
+
 class DocumentMixin(object):
     """ Support methods that define behaviour for a document, independent of the database model.
 
@@ -149,21 +216,76 @@ class DocumentMixin(object):
         """ Get the named subcomponent in this document, such as `chapter/2` or 'section/13A'.
         :class:`lxml.objectify.ObjectifiedElement` or `None`.
         """
-        def search_toc(items):
-            for item in items:
-                if item.component == component and item.subcomponent == subcomponent:
-                    return item.element
+        return self.subcomponent_index().get((component, subcomponent))
+
+    def subcomponent_index(self):
+        """ Dict from (component, subcomponent) tuples to elements, built from the table of contents.
+        If more than one TOC entry has the same subcomponent, the first one wins.
+        """
+        if getattr(self, '_subcomponent_index', None) is None:
+            index = {}
+
+            def add_items(items):
+                for item in items:
+                    index.setdefault((item.component, item.subcomponent), item.element)
+                    if item.children:
+                        add_items(item.children)
+
+            add_items(self.table_of_contents())
+            self._subcomponent_index = index
+
+        return self._subcomponent_index
+
+    def eid_index(self, attachment_id=None):
+        """ Dict from eId to element for all elements in the main document (including its attachments),
+        or in the attachment with eId `attachment_id`. If more than one element has the same eId, the
+        first in document order wins.
+
+        Returns None if there is no such attachment.
+        """
+        if getattr(self, '_eid_indexes', None) is None:
+            self._eid_indexes = {}
+
+        key = attachment_id or ''
+        if key not in self._eid_indexes:
+            nsmap = {'a': self.doc.namespace}
+            if attachment_id:
+                escaped = attachment_id.replace("'", "\\'")
+                results = self.doc.main.xpath(f"./a:attachments/a:attachment[@eId='{escaped}']", namespaces=nsmap)
+                root = results[0] if results else None
+            else:
+                root = self.doc.main
 
-                if item.children:
-                    found = search_toc(item.children)
-                    if found:
-                        return found
+            index = None
+            if root is not None:
+                index = {}
+                for elem in root.xpath('.//a:*[@eId]', namespaces=nsmap):
+                    index.setdefault(elem.get('eId'), elem)
+            self._eid_indexes[key] = index
 
-        return search_toc(self.table_of_contents())
+        return self._eid_indexes[key]
 
     def table_of_contents(self):
-        builder = plugins.for_document('toc', self)
-        return builder.table_of_contents_for_document(self)
+        """ The table of contents of this document, as a list of :class:`TOCElement` instances.
+
+        This is built once per instance and re-used until the document's XML changes.
+        """
+        if getattr(self, '_toc', None) is None:
+            builder = plugins.for_document('toc', self)
+            self._toc = builder.table_of_contents_for_document(self)
+        return self._toc
+
+    def clear_toc_cache(self):
+        """ Discard the cached table of contents and element indexes, because the XML has changed.
+        """
+        self._toc = None
+        self._subcomponent_index = None
+        self._eid_indexes = None
+
+    def table_of_contents_dicts(self):
+        """ The table of contents of this document as a list of dicts, as per :meth:`TOCElement.as_dict`.
+        """
+        return [t.as_dict() for t in self.table_of_contents()]
 
     def all_provisions(self):
         ids = []
@@ -268,16 +390,54 @@ class Document(DocumentMixin, models.Model):
     created_by_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
     updated_by_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
 
+    toc_json = JSONField(null=True, blank=True)
+    """ Serialised table of contents of this expression, as a list of dicts. This is computed when the
+    document is saved, so that the TOC can be served without parsing the XML. See `table_of_contents_dicts`.
+    """
+
     # caching attributes
     _expression_uri = None
+    # has the XML changed since toc_json was computed?
+    _toc_stale = False
+    # is _doc shared with other instances through the parsed document cache?
+    _doc_shared = False
 
     @property
     def doc(self):
-        """ The wrapped `an.act.Act` that this document works with. """
+        """ The wrapped `an.act.Act` that this document works with.
+
+        This may be shared with other instances through the parsed document cache, so
+        use `own_doc` before making changes to it.
+        """
         if not getattr(self, '_doc', None):
-            self._doc = self._make_doc(self.document_xml)
+            self._doc = self._load_doc()
         return self._doc
 
+    def own_doc(self):
+        """ Ensure that this instance has its own copy of the parsed document, so that it can be changed
+        safely, and return it.
+        """
+        if self._doc_shared:
+            self._doc = self._make_doc(self.document_xml)
+            self._doc_shared = False
+            # the cached TOC refers to elements in the shared document
+            self.clear_toc_cache()
+        return self.doc
+
+    def _load_doc(self):
+        # only saved documents are cached
+        if not parsed_documents.enabled or self.id is None or self.updated_at is None:
+            return self._make_doc(self.document_xml)
+
+        key = (self.id, self.updated_at)
+        doc = parsed_documents.get(key, self.document_xml)
+        if doc is None:
+            doc = self._make_doc(self.document_xml)
+            parsed_documents.put(key, self.document_xml, doc)
+
+        self._doc_shared = True
+        return doc
+
     @property
     def content(self):
         """ Alias for `document_xml` """
@@ -345,8 +505,35 @@ class Document(DocumentMixin, models.Model):
     def publication_date(self):
         return self.work.publication_date
 
+    def table_of_contents_dicts(self):
+        """ The table of contents of this document as a list of dicts, served from `toc_json` when it
+        is up to date.
+
+        Documents saved before `toc_json` was introduced have their stored TOC filled in on first use.
+        """
+        if self.toc_json is not None and not self._toc_stale:
+            return self.toc_json
+
+        toc = super().table_of_contents_dicts()
+        if self.toc_json is None and not self._toc_stale and self.pk and self.updated_at:
+            # store it without touching updated_at, unless the document has since been changed
+            Document.objects.filter(pk=self.pk, updated_at=self.updated_at).update(toc_json=toc)
+            self.toc_json = toc
+
+        return toc
+
+    def refresh_toc(self):
+        """ Re-compute the stored table of contents from the XML.
+        """
+        self.toc_json = super().table_of_contents_dicts()
+        self._toc_stale = False
+
     def save(self, *args, **kwargs):
         self.copy_attributes()
+        self.refresh_toc()
+        if Document.work.is_cached(self):
+            # the work's provisions are built from the tables of contents of its documents
+            self.work.clear_provisions_cache()
         return super(Document, self).save(*args, **kwargs)
 
     def save_with_revision(self, user, comment=None):
@@ -364,6 +551,7 @@ class Document(DocumentMixin, models.Model):
         if `from_model` is False. """
 
         if from_model:
+            self.own_doc()
             self.copy_attributes_from_work()
 
             self.doc.frbr_uri = self.frbr_uri
@@ -401,6 +589,38 @@ class Document(DocumentMixin, models.Model):
         if not self.title:
             self.title = self.work.title
 
+    def work_metadata_stale(self):
+        """ Has the metadata this document inherits from its work changed since the XML was last updated?
+        """
+        def events(events):
+            return sorted([(e.date, e.amending_title, e.amending_uri) for e in events], key=lambda e: e[0])
+
+        def repeal(event):
+            return (event.date, event.repealing_title, event.repealing_uri) if event else None
+
+        doc = self.doc
+        in_xml = (
+            self.frbr_uri,
+            doc.frbr_uri.work_uri(),
+            doc.title,
+            getattr(doc, 'publication_name', None) or None,
+            getattr(doc, 'publication_number', None) or None,
+            getattr(doc, 'publication_date', None),
+            repeal(getattr(doc, 'repeal', None)),
+            events(getattr(doc, 'amendments', [])),
+        )
+        in_work = (
+            self.work.frbr_uri,
+            self.work.frbr_uri,
+            self.title or self.work.title,
+            self.publication_name or None,
+            self.publication_number or None,
+            self.publication_date,
+            repeal(self.work.repeal),
+            events(self.amendment_events()),
+        )
+        return in_xml != in_work
+
     def refresh_xml(self):
         self.document_xml = self.doc.to_xml().decode('utf-8')
 
@@ -412,6 +632,9 @@ class Document(DocumentMixin, models.Model):
 
         # now update ourselves
         self._doc = doc
+        self._doc_shared = False
+        self.clear_toc_cache()
+        self._toc_stale = True
         self.copy_attributes(from_model)
 
     def versions(self):
@@ -469,6 +692,11 @@ def post_save_document(sender, instance, **kwargs):
     """ Send action to activity stream, as 'created' if a new document.
         Update documents that have been deleted but don't send action to activity stream.
     """
+    # cached renderings of this document are now stale; this includes
+    # documents re-saved when their work changes
+    render_cache.invalidate_document(instance.id)
+    render_store.document_saved(instance)
+
     if kwargs['created']:
         action.send(instance.created_by_user, verb='created', action_object=instance,
                     place_code=instance.work.place.place_code)
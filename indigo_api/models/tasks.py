@@ -14,6 +14,7 @@ from django_fsm import FSMField, has_transition_perm, transition
 from django_fsm.signals import post_transition
 
 from indigo.custom_tasks import tasks
+from indigo_api import place_summary
 from indigo_api.signals import task_closed
 
 
@@ -380,11 +381,30 @@ class Task(models.Model):
 def post_save_task(sender, instance, **kwargs):
     """ Send 'created' action to activity stream if new task
     """
+    place_summary.invalidate_place(instance.place.place_code)
+
     if kwargs['created']:
         action.send(instance.created_by_user, verb='created', action_object=instance,
                     place_code=instance.place.place_code)
 
 
+@receiver(signals.post_delete, sender=Task)
+def post_delete_task(sender, instance, **kwargs):
+    place_summary.invalidate_place(instance.place.place_code)
+
+
+@receiver(signals.m2m_changed, sender=Task.labels.through)
+def task_labels_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """ Place summaries include counts of tasks by label.
+    """
+    if action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+
+    changed = [instance] if not reverse else Task.objects.filter(pk__in=pk_set or [])
+    for place_code in {t.place.place_code for t in changed}:
+        place_summary.invalidate_place(place_code)
+
+
 @receiver(post_transition, sender=Task)
 def post_task_transition(sender, instance, name, **kwargs):
     """ When tasks transition, store actions.
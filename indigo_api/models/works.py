@@ -13,6 +13,8 @@ from reversion.models import Version
 from cobalt import FrbrUri, RepealEvent
 
 from indigo.plugins import plugins
+from indigo_api import place_cache, place_summary, render_cache, render_store
+from indigo_api.document_refresh import refresh_work_documents
 
 
 class WorkQuerySet(models.QuerySet):
@@ -96,6 +98,8 @@ class WorkMixin(object):
     """
     _work_uri = None
     _repeal = None
+    # date -> commenceable provisions, see all_commenceable_provisions
+    _commenceable_provisions = None
 
     @property
     def work_uri(self):
@@ -245,23 +249,36 @@ class WorkMixin(object):
     def all_commenceable_provisions(self, date=None):
         """ Return a list of TOCElement objects that can be commenced.
             If `date` is provided, only provisions in expressions up to and including that date are included.
+
+            Provisions are built from each expression's stored table of contents, and are remembered
+            for each date until clear_provisions_cache() is called.
         """
-        # gather documents and sort so that we consider primary language documents first
-        if date:
-            documents = self.expressions().filter(expression_date__lte=date)
-        else:
-            documents = self.expressions().all()
-        documents = sorted(documents, key=lambda d: 0 if d.language == self.country.primary_language else 1)
+        if self._commenceable_provisions is None:
+            self._commenceable_provisions = {}
+
+        if date not in self._commenceable_provisions:
+            # gather documents and sort so that we consider primary language documents first
+            if date:
+                documents = self.expressions().filter(expression_date__lte=date)
+            else:
+                documents = self.expressions().all()
+            documents = sorted(documents.no_xml(),
+                               key=lambda d: 0 if d.language_id == self.country.primary_language_id else 1)
+
+            # get all the docs and combine the TOCs, based on element IDs
+            provisions = []
+            id_set = set()
+            for doc in documents:
+                plugin = plugins.for_document('toc', doc)
+                if plugin:
+                    plugin.insert_commenceable_provisions(doc, provisions, id_set)
 
-        # get all the docs and combine the TOCs, based on element IDs
-        provisions = []
-        id_set = set()
-        for doc in documents:
-            plugin = plugins.for_document('toc', doc)
-            if plugin:
-                plugin.insert_commenceable_provisions(doc, provisions, id_set)
+            self._commenceable_provisions[date] = provisions
 
-        return provisions
+        return list(self._commenceable_provisions[date])
+
+    def clear_provisions_cache(self):
+        self._commenceable_provisions = None
 
     def all_uncommenced_provisions(self, date=None):
         provisions = self.all_commenceable_provisions(date=date)
@@ -334,6 +351,30 @@ class Work(WorkMixin, models.Model):
 
     objects = WorkManager.from_queryset(WorkQuerySet)()
 
+    # attributes that this work's documents inherit, see post_save_work
+    inherited_attributes = ['frbr_uri', 'title', 'publication_name', 'publication_number', 'publication_date',
+                            'repealed_by_id', 'repealed_date']
+
+    _loaded_inherited_values = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        work = super(Work, cls).from_db(db, field_names, values)
+        work.snapshot_inherited_values()
+        return work
+
+    def inherited_values(self):
+        # use __dict__ so that deferred fields aren't loaded
+        return {attr: self.__dict__.get(attr) for attr in self.inherited_attributes}
+
+    def snapshot_inherited_values(self):
+        self._loaded_inherited_values = self.inherited_values()
+
+    def inherited_values_changed(self):
+        """ Have any of the attributes inherited by this work's documents changed since it was loaded or saved?
+        """
+        return self._loaded_inherited_values != self.inherited_values()
+
     @property
     def locality_code(self):
         # Helper to get/set locality using the locality_code, used by the WorkSerializer.
@@ -439,13 +480,27 @@ class Work(WorkMixin, models.Model):
         """
         return Version.objects.get_for_object(self).select_related('revision', 'revision__user')
 
+    def published_expressions(self):
+        """ A list of the published expressions of this work, in ascending expression date order.
+
+        Views that list many works can prefetch these into `_published_expressions`, see
+        PublishedDocumentDetailView in the content API.
+        """
+        if hasattr(self, '_published_expressions'):
+            return self._published_expressions
+        return list(self.expressions().published())
+
     def as_at_date(self):
         # the as-at date is the maximum of the most recent, published expression date,
         # and the place's as-at date.
-        q = self.expressions().published().order_by('-expression_date').values('expression_date').first()
+        if hasattr(self, '_published_expressions'):
+            latest = self._published_expressions[-1].expression_date if self._published_expressions else None
+        else:
+            q = self.expressions().published().order_by('-expression_date').values('expression_date').first()
+            latest = (q or {}).get('expression_date')
 
         dates = [
-            (q or {}).get('expression_date'),
+            latest,
             self.place.settings.as_at_date,
         ]
 
@@ -461,13 +516,35 @@ class Work(WorkMixin, models.Model):
 def post_save_work(sender, instance, **kwargs):
     """ Cascade changes to linked documents
     """
+    places = {FrbrUri.parse(instance.frbr_uri).place}
+    old_frbr_uri = (instance._loaded_inherited_values or {}).get('frbr_uri')
+    if old_frbr_uri and old_frbr_uri != instance.frbr_uri:
+        # the work may have moved from another place
+        places.add(FrbrUri.parse(old_frbr_uri).place)
+
+    for place in places:
+        place_cache.invalidate_place(place)
+        place_summary.invalidate_place(place)
+
+    if not kwargs['raw'] and not kwargs['created'] and instance.inherited_values_changed():
+        from .documents import Document
+
+        # documents are looked up by FRBR URI, so keep that in step immediately
+        if (instance._loaded_inherited_values or {}).get('frbr_uri') != instance.frbr_uri:
+            Document.objects.filter(work=instance).update(frbr_uri=instance.frbr_uri)
+
+        # ensure documents pick up changes to inherited attributes
+        refresh_work_documents(instance.pk)
+
     if not kwargs['raw'] and not kwargs['created']:
-        # cascade updates to ensure documents
-        # pick up changes to inherited attributes
-        for doc in instance.document_set.all():
-            # forces call to doc.copy_attributes()
-            doc.updated_by_user = instance.updated_by_user
-            doc.save()
+        # rendered documents include other work details (such as on the coverpage), so discard them
+        from .documents import Document
+
+        for document_id in Document.objects.filter(work=instance).values_list('pk', flat=True):
+            render_cache.invalidate_document(document_id)
+            render_store.purge_document(document_id)
+
+    instance.snapshot_inherited_values()
 
     # Send action to activity stream, as 'created' if a new work
     if kwargs['created']:
@@ -478,6 +555,12 @@ def post_save_work(sender, instance, **kwargs):
                     place_code=instance.place.place_code)
 
 
+@receiver(signals.post_delete, sender=Work)
+def post_delete_work(sender, instance, **kwargs):
+    place_cache.invalidate_place(FrbrUri.parse(instance.frbr_uri).place)
+    place_summary.invalidate_place(FrbrUri.parse(instance.frbr_uri).place)
+
+
 # version tracking
 reversion.revisions.register(Work)
 
@@ -580,14 +663,13 @@ class Amendment(models.Model):
 
 @receiver(signals.post_save, sender=Amendment)
 def post_save_amendment(sender, instance, **kwargs):
-    """ When an amendment is created, save any documents already at that date
+    """ When an amendment is created, refresh the work's documents
     to ensure the details of the amendment are stashed correctly in each document.
     """
+    place_summary.invalidate_place(FrbrUri.parse(instance.amended_work.frbr_uri).place)
+
     if kwargs['created']:
-        for doc in instance.amended_work.document_set.filter(expression_date=instance.date):
-            # forces call to doc.copy_attributes()
-            doc.updated_by_user = instance.created_by_user
-            doc.save()
+        refresh_work_documents(instance.amended_work_id)
 
         # Send action to activity stream, as 'created' if a new amendment
         action.send(instance.created_by_user, verb='created', action_object=instance,
@@ -597,6 +679,11 @@ def post_save_amendment(sender, instance, **kwargs):
                     place_code=instance.amended_work.place.place_code)
 
 
+@receiver(signals.post_delete, sender=Amendment)
+def post_delete_amendment(sender, instance, **kwargs):
+    place_summary.invalidate_place(FrbrUri.parse(instance.amended_work.frbr_uri).place)
+
+
 class ArbitraryExpressionDate(models.Model):
     """ An arbitrary expression date not tied to an amendment, e.g. a consolidation date.
     """
@@ -658,12 +745,23 @@ class Subtype(models.Model):
 
     @classmethod
     def for_abbreviation(cls, abbr):
+        return cls._load_cache().get(abbr)
+
+    @classmethod
+    def cached(cls):
+        """ All subtypes, ordered by name, from the cache.
+        """
+        return list(cls._load_cache().values())
+
+    @classmethod
+    def _load_cache(cls):
         if not cls._cache:
             cls._cache = {s.abbreviation: s for s in cls.objects.all()}
-        return cls._cache.get(abbr)
+        return cls._cache
 
 
 @receiver(signals.post_save, sender=Subtype)
+@receiver(signals.post_delete, sender=Subtype)
 def on_subtype_saved(sender, instance, **kwargs):
     # clear the subtype cache
     Subtype._cache = {}
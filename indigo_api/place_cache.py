@@ -0,0 +1,76 @@
+""" Helpers for lookups of the works that exist in a place, such as when finding references
+to works in documents.
+
+If settings.INDIGO['PLACE_WORKS_CACHE'] is True, lookups are cached in the default cache. The cache for
+a place is discarded whenever a work in that place is saved or deleted.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def get_cache():
+    return caches['default']
+
+
+def enabled():
+    return settings.INDIGO.get('PLACE_WORKS_CACHE', False)
+
+
+def work_uris_key(place_code):
+    return f'place-work-uris:{place_code}'
+
+
+def cap_numbers_key(place_code):
+    return f'place-cap-numbers:{place_code}'
+
+
+def place_work_uris(place_code):
+    """ The set of FRBR URIs of all works in the place with this place code, such as 'za-cpt'.
+    """
+    from indigo_api.models import Work
+
+    cache = get_cache()
+    key = work_uris_key(place_code)
+    uris = cache.get(key)
+    if uris is None:
+        uris = set(Work.objects.filter(frbr_uri__startswith=f'/akn/{place_code}/').values_list('frbr_uri', flat=True))
+        cache.set(key, uris, CACHE_TIMEOUT)
+    return uris
+
+
+def place_cap_numbers(place_code):
+    """ An index of the cap numbers of works in the place with this place code. This is a dict from
+    work property name (such as 'cap') to a dict from cap number to the FRBR URI of the work.
+    """
+    if not enabled():
+        return build_cap_numbers(place_code)
+
+    cache = get_cache()
+    key = cap_numbers_key(place_code)
+    index = cache.get(key)
+    if index is None:
+        index = build_cap_numbers(place_code)
+        cache.set(key, index, CACHE_TIMEOUT)
+    return index
+
+
+def build_cap_numbers(place_code):
+    from indigo_api.models import Work
+
+    index = {}
+    works = Work.objects \
+        .filter(frbr_uri__startswith=f'/akn/{place_code}/') \
+        .values_list('frbr_uri', 'properties')
+    for frbr_uri, properties in works:
+        for prop, value in properties.items():
+            if prop.startswith('cap') and value:
+                index.setdefault(prop, {})[value] = frbr_uri
+    return index
+
+
+def invalidate_place(place_code):
+    """ Discard all cached lookups for this place.
+    """
+    get_cache().delete_many([work_uris_key(place_code), cap_numbers_key(place_code)])
@@ -0,0 +1,139 @@
+""" Summaries of the works and tasks in a place, used by the place dashboards.
+
+The summary for a place is built with a handful of aggregate queries and kept in the default cache.
+It is discarded whenever something it depends on changes: a work, amendment or task in that place
+is saved or deleted, or a task's labels change. The next page view rebuilds it.
+"""
+from collections import Counter
+
+from cobalt import FrbrUri
+from django.core.cache import caches
+from django.db.models import Count
+from django.db.models.functions import Extract
+
+CACHE_TIMEOUT = 24 * 60 * 60
+
+# number of top contributors to include in a summary
+N_CONTRIBUTORS = 10
+
+
+def get_cache():
+    return caches['default']
+
+
+def summary_key(place_code):
+    return f'place-summary:{place_code}'
+
+
+def place_summary(place):
+    """ The summary for a place (a country or locality). See build_summary.
+    """
+    return place_summaries([place])[place.place_code]
+
+
+def place_summaries(places):
+    """ A dict from place code to the summary for each place in +places+, using a single cache read.
+    """
+    cache = get_cache()
+    places = {summary_key(p.place_code): p for p in places}
+    cached = cache.get_many(list(places.keys()))
+
+    summaries = {}
+    missing = {}
+    for key, place in places.items():
+        if key in cached:
+            summaries[place.place_code] = cached[key]
+        else:
+            summaries[place.place_code] = missing[key] = build_summary(place)
+
+    if missing:
+        cache.set_many(missing, CACHE_TIMEOUT)
+
+    return summaries
+
+
+def place_filter(place):
+    """ Keyword arguments for filtering works and tasks to only those in this place.
+    """
+    from indigo_api.models import Locality
+
+    if isinstance(place, Locality):
+        return {'country_id': place.country_id, 'locality': place}
+    return {'country': place, 'locality': None}
+
+
+def build_summary(place):
+    """ Build the summary for a place. This is a dict with:
+
+    * n_works, n_stubs, n_primary_works: number of works, stubs and primary (non-subsidiary) works
+    * works_by_subtype: dict from subtype abbreviation (None for Acts) to number of works
+    * works_by_year: dict from year to number of works
+    * amendments_by_year: dict from year to number of amendments to works in the place
+    * tasks_by_state: dict from task state to number of tasks
+    * n_open_tasks: number of unclosed tasks
+    * n_assigned_open_tasks: number of open tasks that are assigned to someone
+    * open_tasks_by_label: list of dicts with slug, title and count for each label of unclosed tasks
+    * top_contributors: list of (user id, number of tasks done) tuples, most tasks first
+    """
+    from indigo_api.models import Amendment, Task, TaskLabel, Work
+
+    place_kwargs = place_filter(place)
+    works = Work.objects.filter(**place_kwargs).order_by()
+
+    summary = {
+        'n_works': 0,
+        'n_stubs': 0,
+        'n_primary_works': 0,
+        'works_by_subtype': Counter(),
+        'works_by_year': Counter(),
+    }
+    for frbr_uri, stub, parent_work_id in works.values_list('frbr_uri', 'stub', 'parent_work_id'):
+        uri = FrbrUri.parse(frbr_uri)
+        summary['n_works'] += 1
+        summary['n_stubs'] += 1 if stub else 0
+        summary['n_primary_works'] += 0 if parent_work_id else 1
+        summary['works_by_subtype'][uri.subtype] += 1
+        summary['works_by_year'][int(uri.date.split('-', 1)[0])] += 1
+
+    summary['works_by_subtype'] = dict(summary['works_by_subtype'])
+    summary['works_by_year'] = dict(summary['works_by_year'])
+
+    amendments = Amendment.objects \
+        .filter(**{f'amended_work__{k}': v for k, v in place_kwargs.items()}) \
+        .annotate(year=Extract('date', 'year')) \
+        .values('year') \
+        .annotate(n=Count('id')) \
+        .order_by()
+    summary['amendments_by_year'] = {x['year']: x['n'] for x in amendments}
+
+    tasks = Task.objects.filter(**place_kwargs).order_by()
+    summary['tasks_by_state'] = {
+        x['state']: x['n']
+        for x in tasks.values('state').annotate(n=Count('id'))
+    }
+    summary['n_open_tasks'] = sum(summary['tasks_by_state'].get(state, 0) for state in Task.OPEN_STATES)
+    summary['n_assigned_open_tasks'] = tasks.filter(state=Task.OPEN, assigned_to__isnull=False).count()
+
+    labels = TaskLabel.objects \
+        .filter(tasks__in=tasks.unclosed()) \
+        .annotate(n_tasks=Count('tasks__id'))
+    summary['open_tasks_by_label'] = [{
+        'slug': label.slug,
+        'title': label.title,
+        'count': label.n_tasks,
+    } for label in labels]
+
+    contributors = tasks \
+        .filter(state=Task.DONE, submitted_by_user__isnull=False) \
+        .values('submitted_by_user') \
+        .annotate(n=Count('id')) \
+        .order_by('-n')[:N_CONTRIBUTORS]
+    summary['top_contributors'] = [(x['submitted_by_user'], x['n']) for x in contributors]
+
+    return summary
+
+
+def invalidate_place(place_code):
+    """ Discard the cached summary for this place.
+    """
+    get_cache().delete(summary_key(place_code))
@@ -0,0 +1,37 @@
+""" Helpers for caching rendered output (such as HTML) of saved documents.
+
+Cache keys for rendered documents include a per-document generation token. Saving a document
+replaces its token, which makes all previously cached renderings of that document unreachable,
+regardless of which options (resolver, coverpage, component, etc.) they were rendered with.
+"""
+import uuid
+
+from django.core.cache import caches
+
+
+def get_cache():
+    return caches['default']
+
+
+def generation_key(document_id):
+    return f'render-generation:{document_id}'
+
+
+def document_generation(document_id):
+    """ The current generation token for this document's rendered output.
+    """
+    cache = get_cache()
+    key = generation_key(document_id)
+    token = cache.get(key)
+    if token is None:
+        # never set, or evicted; either way, start a new generation. Use add so that
+        # we don't clobber a token set concurrently by another process.
+        cache.add(key, uuid.uuid4().hex, None)
+        token = cache.get(key)
+    return token
+
+
+def invalidate_document(document_id):
+    """ Discard all cached rendered output for this document.
+    """
+    get_cache().set(generation_key(document_id), uuid.uuid4().hex, None)
@@ -0,0 +1,157 @@
+""" Persistent storage for rendered PDFs and ePUBs of published documents.
+
+Rendering a PDF or ePUB is slow, particularly for a collection of documents such as all the acts of a year.
+When RENDER_STORE is enabled, these renderings (artifacts) are kept in file storage (MEDIA_ROOT, or S3 in
+production) under renders/, named by a hash of the renderer's cache key. The cache key includes each
+document's updated_at, so a changed document gets new artifacts and a stale artifact is never served.
+A document's old artifacts are deleted when it is saved. This includes artifacts of many documents: when one of
+these is stored, an empty reference to it is also stored alongside the artifacts of each of its documents.
+
+When RENDER_BACKGROUND is also enabled, artifacts that don't exist yet are rendered by a background task, and
+the request gets a 202 response with a Location header to poll. The number of task runners processing the
+indigo queue bounds how many renders happen at once. Published documents are also rendered in the background
+whenever they're saved, so that their artifacts are usually ready before anyone asks for them.
+"""
+import hashlib
+import logging
+import os
+
+from background_task import background
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+log = logging.getLogger(__name__)
+
+ROOT = 'renders'
+
+# prefix for references to artifacts of many documents, stored alongside a document's own artifacts
+REFERENCE_PREFIX = 'many-'
+
+# formats that are pre-rendered when a published document is saved
+PRERENDER_FORMATS = ['pdf', 'epub']
+
+# how long (in seconds) clients are asked to wait before polling for an artifact being rendered
+RETRY_AFTER = 10
+
+
+def enabled():
+    return settings.INDIGO.get('RENDER_STORE', False)
+
+
+def background_enabled():
+    return enabled() and settings.INDIGO.get('RENDER_BACKGROUND', False)
+
+
+def get_storage():
+    return default_storage
+
+
+def storable(data):
+    """ Can renderings of this document, or list of documents, be stored? Only saved, published documents are stored,
+    since drafts change too often for it to be worthwhile.
+    """
+    documents = data if isinstance(data, list) else [data]
+    return bool(documents) and all(d.id is not None and not d.draft for d in documents)
+
+
+def artifact_name(data, format, key, resolver):
+    """ The storage name for the artifact of the document, or list of documents, with this cache key and resolver.
+    """
+    digest = hashlib.sha1(f'{key}:{resolver}'.encode('utf-8')).hexdigest()
+    if isinstance(data, list):
+        return f'{ROOT}/many/{digest}.{format}'
+    return f'{ROOT}/documents/{data.id}/{digest}.{format}'
+
+
+def get(name):
+    """ The content of a stored artifact, or None if it doesn't exist.
+    """
+    storage = get_storage()
+    if not storage.exists(name):
+        return None
+
+    with storage.open(name, 'rb') as f:
+        return f.read()
+
+
+def save(name, content, data=None):
+    """ Store an artifact of the document, or list of documents, in data.
+    """
+    storage = get_storage()
+    if storage.exists(name):
+        # another render got here first
+        return
+
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    storage.save(name, ContentFile(content))
+
+    if isinstance(data, list):
+        # so that the artifact is deleted when any of its documents change
+        for document in data:
+            reference = f'{ROOT}/documents/{document.id}/{REFERENCE_PREFIX}{os.path.basename(name)}'
+            if not storage.exists(reference):
+                storage.save(reference, ContentFile(b''))
+
+
+def purge_document(document_id):
+    """ Delete all stored artifacts for a single document, including artifacts of many documents that include it.
+    """
+    storage = get_storage()
+    path = f'{ROOT}/documents/{document_id}'
+    try:
+        _, fnames = storage.listdir(path)
+    except FileNotFoundError:
+        return
+
+    for fname in fnames:
+        if fname.startswith(REFERENCE_PREFIX):
+            storage.delete(f'{ROOT}/many/{fname[len(REFERENCE_PREFIX):]}')
+        storage.delete(f'{path}/{fname}')
+
+
+def document_saved(document):
+    """ Called when a document is saved. Its previous artifacts are deleted and, if it's published, new ones are
+    rendered in the background once the transaction commits.
+    """
+    if not enabled():
+        return
+
+    purge_document(document.id)
+
+    if background_enabled() and not document.draft and not document.deleted:
+        # pre-render the whole document, as served by the content API with the default resolver
+        for format in PRERENDER_FORMATS:
+            transaction.on_commit(lambda format=format: render_artifact(
+                format, document.id, component='main', resolver=settings.RESOLVER_URL))
+
+
+@background(queue='indigo', remove_existing_tasks=True)
+def render_artifact(format, document_ids, component=None, subcomponent=None, resolver=None):
+    """ Render and store an artifact. document_ids is either a document id, or a list of document ids
+    to be rendered together in that order.
+    """
+    from indigo_api.models import Document
+    from indigo_api.renderers import PDFRenderer, EPUBRenderer
+
+    renderer = {r.format: r for r in [PDFRenderer, EPUBRenderer]}[format]()
+    documents = Document.objects.undeleted().published()
+
+    if isinstance(document_ids, list):
+        documents = documents.in_bulk(document_ids)
+        data = [documents[i] for i in document_ids if i in documents]
+    else:
+        data = documents.filter(pk=document_ids).first()
+
+    if not data or not storable(data):
+        log.info(f"Not rendering {format} for documents {document_ids}, they are no longer published")
+        return
+
+    renderer.render_artifact(data, component, subcomponent, resolver)
+
+
+if not settings.INDIGO.get('RENDER_BACKGROUND', False):
+    # change background renders to be synchronous
+    render_artifact = render_artifact.now
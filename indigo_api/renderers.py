@@ -1,15 +1,19 @@
+import hashlib
 import lxml.etree as ET
-import tempfile
 import re
 import zipfile
 import logging
 
 from django.core.cache import caches
 from django.conf import settings
+from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse
 from rest_framework.renderers import BaseRenderer, StaticHTMLRenderer
 from rest_framework_xml.renderers import XMLRenderer
 
+from indigo_api import render_cache, render_store
 from indigo_api.exporters import HTMLExporter, PDFExporter, EPUBExporter
+from indigo_api.models import Document
 from .serializers import NoopSerializer
 
 log = logging.getLogger(__name__)
@@ -84,6 +88,16 @@ class HTMLRenderer(StaticHTMLRenderer, ExporterMixin):
     title = 'Standalone HTML'
     suffix = '?standalone=1'
 
+    cache_version = 1
+    """ Increment this when changes to the HTML templates or XSLT mean that previously
+    cached HTML must not be used.
+    """
+    cache_timeout = 60 * 60 * 24 * 7
+
+    def __init__(self, *args, **kwargs):
+        super(HTMLRenderer, self).__init__(*args, **kwargs)
+        self.cache = caches['default']
+
     def render(self, document, media_type=None, renderer_context=None):
         self.renderer_context = renderer_context
 
@@ -92,13 +106,52 @@ class HTMLRenderer(StaticHTMLRenderer, ExporterMixin):
 
         view = renderer_context['view']
         exporter = self.get_exporter()
+        whole_document = not hasattr(view, 'component') or (view.component == 'main' and not view.subcomponent)
 
-        if not hasattr(view, 'component') or (view.component == 'main' and not view.subcomponent):
+        if whole_document:
             exporter.coverpage = renderer_context['request'].GET.get('coverpage', '1') == '1'
-            return exporter.render(document)
+        else:
+            exporter.coverpage = renderer_context['request'].GET.get('coverpage') == '1'
 
-        exporter.coverpage = renderer_context['request'].GET.get('coverpage') == '1'
-        return exporter.render(document, view.element)
+        # check the cache
+        key = self.cache_key(document, view, exporter)
+        if key:
+            html = self.cache.get(key)
+            if html is not None:
+                return html
+
+        if whole_document:
+            html = exporter.render(document)
+        else:
+            html = exporter.render(document, view.element)
+
+        # cache it
+        if key:
+            self.cache.set(key, html, self.cache_timeout)
+
+        return html
+
+    def cache_key(self, document, view, exporter):
+        # only cache saved, published documents
+        if document.id is None or document.draft:
+            return None
+
+        parts = [
+            self.cache_version,
+            document.id,
+            document.updated_at.isoformat(),
+            render_cache.document_generation(document.id),
+            getattr(view, 'component', None),
+            getattr(view, 'subcomponent', None),
+            exporter.coverpage,
+            exporter.standalone,
+            exporter.resolver,
+            exporter.media_url,
+            exporter.media_resolver_use_akn_prefix,
+        ]
+        # the resolver and media urls are arbitrary, so hash the key to keep it short and safe
+        digest = hashlib.sha1(':'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+        return f'html:{document.id}:{digest}'
 
     def get_exporter(self):
         request = self.renderer_context['request']
@@ -136,51 +189,92 @@ class PDFRenderer(BaseRenderer, ExporterMixin):
             return ''
 
         view = renderer_context['view']
+        request = renderer_context['request']
+        response = renderer_context['response']
+        component = getattr(view, 'component', None)
+        subcomponent = getattr(view, 'subcomponent', None)
+        resolver = resolver_url(request, request.GET.get('resolver'))
+
+        if render_store.enabled() and render_store.storable(data):
+            content = render_store.get(self.artifact_name(data, component, subcomponent, resolver))
+            if content is None:
+                if render_store.background_enabled() and getattr(view, 'render_in_background', False):
+                    # render it in the background, and ask the client to poll this URL until it's ready
+                    document_ids = [d.id for d in data] if isinstance(data, list) else data.id
+                    render_store.render_artifact(self.format, document_ids, component, subcomponent, resolver)
+                    response.status_code = 202
+                    response['Location'] = request.build_absolute_uri()
+                    response['Retry-After'] = str(render_store.RETRY_AFTER)
+                    return b''
+
+                content = self.render_artifact(data, component, subcomponent, resolver, getattr(view, 'element', None))
 
-        # check the cache
-        key = self.cache_key(data, view)
-        if key:
-            pdf = self.cache.get(key)
-            if pdf:
-                return pdf
+        else:
+            # check the cache
+            key = self.cache_key(data, component, subcomponent)
+            content = self.cache.get(key) if key else None
+            if not content:
+                content = self.render_content(data, component, subcomponent, resolver, getattr(view, 'element', None))
+                # cache it
+                if key:
+                    self.cache.set(key, content)
 
         filename = self.get_filename(data, view)
-        renderer_context['response']['Content-Disposition'] = 'inline; filename=%s' % filename
-        request = renderer_context['request']
+        response['Content-Disposition'] = 'inline; filename=%s' % filename
+
+        return content
+
+    def render_content(self, data, component=None, subcomponent=None, resolver=None, element=None):
+        """ Render a document (or part of it), or a list of documents.
+        """
         exporter = self.get_exporter()
-        exporter.resolver = resolver_url(request, request.GET.get('resolver'))
+        exporter.resolver = resolver
 
         if isinstance(data, list):
             # render many
-            pdf = exporter.render_many(data)
-        elif not hasattr(view, 'component') or (view.component == 'main' and not view.subcomponent):
-            # whole document
-            pdf = exporter.render(data)
-        else:
-            # just one element
-            exporter.toc = False
-            pdf = exporter.render(data, view.element)
-
-        # cache it
-        if key:
-            self.cache.set(key, pdf)
-
-        return pdf
-
-    def cache_key(self, data, view):
+            return exporter.render_many(data)
+
+        if self.whole_document(component, subcomponent):
+            return exporter.render(data)
+
+        # just one element
+        if element is None:
+            if subcomponent:
+                element = data.get_subcomponent(component, subcomponent)
+            else:
+                element = data.doc.components().get(component)
+        exporter.toc = False
+        return exporter.render(data, element)
+
+    def render_artifact(self, data, component=None, subcomponent=None, resolver=None, element=None):
+        """ Render a document (or part of it), or a list of documents, and keep the result in the render store.
+        """
+        content = self.render_content(data, component, subcomponent, resolver, element)
+        render_store.save(self.artifact_name(data, component, subcomponent, resolver), content, data)
+        return content
+
+    def artifact_name(self, data, component, subcomponent, resolver):
+        return render_store.artifact_name(data, self.format, self.cache_key(data, component, subcomponent), resolver)
+
+    def whole_document(self, component, subcomponent):
+        return component in [None, 'main'] and not subcomponent
+
+    def cache_key(self, data, component=None, subcomponent=None):
         if hasattr(data, 'frbr_uri'):
             # it's unsaved, don't bother
             if data.id is None:
                 return None
 
-            parts = [str(data.id), data.updated_at.isoformat()]
-            if hasattr(view, 'component'):
-                parts.append(view.component)
-                parts.append(view.subcomponent)
+            # rendered documents include details of their work, such as on the coverpage
+            parts = [str(data.id), data.updated_at.isoformat(), data.work.updated_at.isoformat()]
+            # the whole document is the same, whether or not the main component was asked for explicitly
+            if not self.whole_document(component, subcomponent):
+                parts.append(component)
+                parts.append(subcomponent)
         else:
             # list of docs
             data = sorted(data, key=lambda d: d.id)
-            parts = [f"{p.id}-{p.updated_at.isoformat()}" for p in data]
+            parts = [f"{p.id}-{p.updated_at.isoformat()}-{p.work.updated_at.isoformat()}" for p in data]
 
         parts = [self.format] + parts
         return ':'.join(str(p) for p in parts)
@@ -200,43 +294,27 @@ class EPUBRenderer(PDFRenderer, ExporterMixin):
     icon = 'fas fa-book'
     title = 'ePUB'
 
-    def render(self, data, media_type=None, renderer_context=None):
-        self.renderer_context = renderer_context
-
-        if not hasattr(data, 'frbr_uri') and not isinstance(data, list):
-            return ''
 
-        view = renderer_context['view']
-        request = renderer_context['request']
+class ZipStream:
+    """ An unseekable, write-only file-like object that collects the data written to it, so that a zip file can
+    be produced in chunks as it's written.
+    """
+    def __init__(self):
+        self.chunks = []
 
-        filename = self.get_filename(data, view)
-        renderer_context['response']['Content-Disposition'] = 'inline; filename=%s' % filename
-        exporter = self.get_exporter()
-        exporter.resolver = resolver_url(request, request.GET.get('resolver'))
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
 
-        # check the cache
-        key = self.cache_key(data, view)
-        if key:
-            epub = self.cache.get(key)
-            if epub:
-                return epub
+    def flush(self):
+        pass
 
-        if isinstance(data, list):
-            # render many
-            epub = exporter.render_many(data)
-        elif not hasattr(view, 'component') or (view.component == 'main' and not view.subcomponent):
-            # whole document
-            epub = exporter.render(data)
-        else:
-            # just one element
-            exporter.toc = False
-            epub = exporter.render(data, view.element)
-
-        # cache it
-        if key:
-            self.cache.set(key, epub)
-
-        return epub
+    def pop(self):
+        """ Return and forget everything written so far.
+        """
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
 
 
 class ZIPRenderer(BaseRenderer):
@@ -244,6 +322,9 @@ class ZIPRenderer(BaseRenderer):
 
     Generates a zip file containing the primary document as main.xml, an all attachments
     inside a media folder.
+
+    Views should use streaming_response, which generates the zip file as it is sent, rather
+    than holding it all in memory.
     """
     media_type = 'application/zip'
     format = 'zip'
@@ -252,6 +333,11 @@ class ZIPRenderer(BaseRenderer):
     icon = 'far fa-file-archive'
     title = 'ZIP Archive'
 
+    # size of the blocks in which attachments are copied into the zip file
+    block_size = 64 * 1024
+    # number of documents to load XML and attachments for at once
+    chunk_size = 50
+
     def render(self, data, media_type=None, renderer_context=None):
         self.renderer_context = renderer_context
 
@@ -262,23 +348,58 @@ class ZIPRenderer(BaseRenderer):
         filename = generate_filename(data, view, self.format)
         renderer_context['response']['Content-Disposition'] = 'attachment; filename=%s' % filename
 
-        with tempfile.NamedTemporaryFile(suffix='.zip') as f:
-            self.build_zipfile(data, f.name)
-            return f.read()
+        return b''.join(self.iter_zipfile(data))
+
+    def streaming_response(self, data, view):
+        """ A StreamingHttpResponse for a zip file of the document (or list of documents) in +data+,
+        or None if data isn't a document.
+        """
+        if not hasattr(data, 'frbr_uri') and not isinstance(data, list):
+            return None
+
+        response = StreamingHttpResponse(filter(None, self.iter_zipfile(data)), content_type=self.media_type)
+        response['Content-Disposition'] = 'attachment; filename=%s' % generate_filename(data, view, self.format)
+        return response
 
-    def build_zipfile(self, data, fname):
+    def iter_zipfile(self, data):
+        """ Generate the zip file for one or many documents, in chunks.
+        """
         # one or many documents?
         many = isinstance(data, list)
-        if not many:
-            data = [data]
+        stream = ZipStream()
 
-        with zipfile.ZipFile(fname, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for document in data:
+        with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for document, xml in self.iter_documents_xml(data if many else [data]):
                 # if storing many, prefix them
                 prefix = (generate_filename(document, None) + '/') if many else ''
-                zf.writestr(prefix + "main.xml", document.document_xml.encode('utf-8'))
-                self.add_attachments(document, zf, prefix)
+                zf.writestr(prefix + "main.xml", xml.encode('utf-8'))
+                yield stream.pop()
+
+                yield from self.add_attachments(document, zf, prefix, stream)
+
+        yield stream.pop()
+
+    def iter_documents_xml(self, documents):
+        """ Generate (document, xml) tuples for these documents. XML that hasn't been loaded yet is loaded a chunk
+        of documents at a time, and isn't kept on the documents, so that not all of it is in memory at once.
+        """
+        for i in range(0, len(documents), self.chunk_size):
+            chunk = documents[i:i + self.chunk_size]
+            prefetch_related_objects(chunk, 'attachments')
+
+            deferred = [d.pk for d in chunk if 'document_xml' in d.get_deferred_fields()]
+            xml = dict(Document.objects.filter(pk__in=deferred).values_list('pk', 'document_xml')) if deferred else {}
+
+            for document in chunk:
+                yield document, xml.pop(document.pk) if document.pk in xml else document.document_xml
 
-    def add_attachments(self, document, zf, prefix):
+    def add_attachments(self, document, zf, prefix, stream):
+        """ Copy the attachments of this document into the zip file, a block at a time, generating the zipped
+        data as it's written.
+        """
         for attachment in document.attachments.all():
-            zf.writestr(prefix + "media/" + attachment.filename, attachment.file.read())
+            name = prefix + "media/" + attachment.filename
+            with attachment.file.open('rb') as f, zf.open(name, 'w', force_zip64=attachment.size >= zipfile.ZIP64_LIMIT) as dest:
+                for block in iter(lambda: f.read(self.block_size), b''):
+                    dest.write(block)
+                    yield stream.pop()
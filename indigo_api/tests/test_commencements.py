@@ -53,3 +53,15 @@ class CommencementsTestCase(TestCase):
 
         self.assertEqual(commencements_at_publication, [4, 5, 7])
         self.assertEqual(commencements_at_later_expression_date, [4, 5, 6, 7])
+
+    def test_commenceable_provisions_remembered(self):
+        provisions = [p.id for p in self.work.all_commenceable_provisions()]
+        with self.assertNumQueries(0):
+            self.assertEqual(provisions, [p.id for p in self.work.all_commenceable_provisions()])
+
+        # saving one of the work's documents forgets them
+        document = self.work.expressions().last()
+        document.work = self.work
+        document.save()
+        self.assertIsNone(self.work._commenceable_provisions)
+        self.assertEqual(provisions, [p.id for p in self.work.all_commenceable_provisions()])
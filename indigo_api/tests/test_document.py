@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 
 from nose.tools import *  # noqa
+from django.conf import settings
 from django.test import TestCase
 from datetime import date
 
 from indigo_api.models import Document, Work, Amendment, Language, Country, User
+from indigo_api.models.documents import parsed_documents
 from indigo_api.tests.fixtures import *  # noqa
 
 
@@ -132,3 +134,107 @@ class DocumentTestCase(TestCase):
 
         assert_is_none(d.get_subcomponent('main', 'chapter/99'))
         assert_is_none(d.get_subcomponent('main', 'section/99'))
+
+    def test_eid_index(self):
+        d = Document(language=self.eng)
+        d.work = self.work
+        d.content = document_fixture(xml="""
+        <section eId="sec_1">
+          <num>1.</num>
+          <content>
+            <p eId="sec_1__p_1">hello</p>
+          </content>
+        </section>
+        """)
+
+        index = d.eid_index()
+        assert_equal(index['sec_1'].get('eId'), 'sec_1')
+        assert_equal(index['sec_1__p_1'].get('eId'), 'sec_1__p_1')
+        assert_is(d.eid_index(), index)
+        assert_is_none(d.eid_index('att_99'))
+
+        # changing the content discards the index
+        d.content = d.content.replace('sec_1__p_1', 'sec_1__p_2')
+        assert_not_in('sec_1__p_1', d.eid_index())
+        assert_in('sec_1__p_2', d.eid_index())
+
+    def test_toc_json_saved(self):
+        d = Document.objects.get(id=1)
+        d.content = document_fixture(xml="""
+        <section eId="sec_1">
+          <num>1.</num>
+          <heading>Foo</heading>
+          <content>
+            <p>hello</p>
+          </content>
+        </section>
+        """)
+        # changed but unsaved content isn't served from the stored TOC
+        assert_equal([t['id'] for t in d.table_of_contents_dicts()], ['sec_1'])
+        d.save()
+
+        d = Document.objects.get(id=1)
+        assert_equal(d.toc_json, [{
+            'type': 'section', 'component': 'main', 'subcomponent': 'section/1',
+            'title': '1. Foo', 'heading': 'Foo', 'num': '1.', 'id': 'sec_1',
+        }])
+        assert_is(d.table_of_contents_dicts(), d.toc_json)
+
+    def test_toc_json_filled_in(self):
+        Document.objects.filter(id=1).update(toc_json=None)
+        d = Document.objects.get(id=1)
+        toc = d.table_of_contents_dicts()
+        assert_equal(toc, [t.as_dict() for t in d.table_of_contents()])
+        assert_equal(Document.objects.get(id=1).toc_json, toc)
+
+
+class ParsedDocumentCacheTestCase(TestCase):
+    fixtures = ['languages_data', 'countries', 'user', 'taxonomies', 'work', 'published']
+
+    def setUp(self):
+        parsed_documents.clear()
+        self.old_size = settings.INDIGO.get('PARSED_DOCUMENT_CACHE_SIZE')
+        settings.INDIGO['PARSED_DOCUMENT_CACHE_SIZE'] = 10 * 1024 * 1024
+
+    def tearDown(self):
+        settings.INDIGO['PARSED_DOCUMENT_CACHE_SIZE'] = self.old_size
+        parsed_documents.clear()
+
+    def test_shared_between_instances(self):
+        hits = parsed_documents.hits
+
+        d1 = Document.objects.get(id=1)
+        d2 = Document.objects.get(id=1)
+        assert_is(d1.doc, d2.doc)
+        assert_equal(parsed_documents.hits, hits + 1)
+
+    def test_copy_on_write(self):
+        d1 = Document.objects.get(id=1)
+        d2 = Document.objects.get(id=1)
+        shared = d2.doc
+        title = shared.title
+
+        d1.title = 'A new title'
+        d1.copy_attributes()
+        assert_is_not(d1.doc, shared)
+        assert_equal(d1.doc.title, 'A new title')
+
+        # the cached copy is untouched
+        assert_equal(shared.title, title)
+        assert_equal(Document.objects.get(id=1).doc.title, title)
+
+    def test_changed_xml_not_shared(self):
+        d1 = Document.objects.get(id=1)
+        d1.doc
+
+        d2 = Document.objects.get(id=1)
+        d2.document_xml = d2.document_xml.replace('tester', 'changed')
+        assert_is_not(d1.doc, d2.doc)
+        assert_in('changed', d2.doc.to_xml().decode('utf-8'))
+
+    def test_disabled(self):
+        settings.INDIGO['PARSED_DOCUMENT_CACHE_SIZE'] = 0
+        d1 = Document.objects.get(id=1)
+        d2 = Document.objects.get(id=1)
+        assert_is_not(d1.doc, d2.doc)
+        assert_equal(len(parsed_documents), 0)
@@ -13,6 +13,7 @@ from sass_processor.processor import SassProcessor
 from indigo_api.tests.fixtures import *  # noqa
 from indigo_api.exporters import PDFExporter
 from indigo_api.models import Work, Attachment
+from indigo_api.views.documents import DocumentDiffView
 
 
 # Ensure the processor runs during tests. It doesn't run when DEBUG=False (ie. during testing),
@@ -133,6 +134,97 @@ class DocumentAPITest(APITestCase):
         response = self.client.get('/api/documents/%s/revisions/%s/diff' % (id, revision_id))
         assert_equal(response.status_code, 200)
 
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_revision_diff_cached(self):
+        id = 1
+        response = self.client.patch('/api/documents/%s' % id, {'content': document_fixture('hello')})
+        assert_equal(response.status_code, 200)
+        response = self.client.patch('/api/documents/%s' % id, {'content': document_fixture('goodbye')})
+        assert_equal(response.status_code, 200)
+
+        revisions = self.client.get('/api/documents/%s/revisions' % id).data
+        revision_id = revisions['results'][0]['id']
+
+        response = self.client.get('/api/documents/%s/revisions/%s/diff' % (id, revision_id))
+        assert_equal(response.status_code, 200)
+        assert_in('goodbye', response.data['content'])
+        diff = response.data
+
+        # served from the cache, without diffing again
+        with patch('indigo_api.views.documents.AttributeDiffer.diff_document_html') as mock:
+            response = self.client.get('/api/documents/%s/revisions/%s/diff' % (id, revision_id))
+            assert_equal(response.status_code, 200)
+            assert_equal(diff, response.data)
+            mock.assert_not_called()
+
+    def test_diff_changed_sections(self):
+        sections = ''.join(f'<section eId="sec_{i}"><num>{i}.</num><content><p>text {i}</p></content></section>' for i in range(1, 4))
+        response = self.client.patch('/api/documents/1', {'content': document_fixture(xml=sections)})
+        assert_equal(response.status_code, 200)
+
+        data = {'document': {'content': document_fixture(xml=sections.replace('text 2', 'changed 2'))}}
+        with patch('indigo_api.views.documents.DocumentDiffView.diff_changed_elements',
+                   autospec=True, side_effect=DocumentDiffView.diff_changed_elements) as diff_changed_elements:
+            response = self.client.post('/api/documents/1/diff', data, format='json')
+            assert_equal(response.status_code, 200)
+            changed = diff_changed_elements.call_args[0][4]
+            assert_equal(['sec_2'], [local.get('eId') for remote, local in changed])
+
+        diff = response.data['html_diff'].decode('utf-8')
+        assert_in('text 1', diff)
+        assert_in('text 3', diff)
+        assert_in('<ins>changed</ins>', diff)
+
+        # the same as diffing the whole document
+        with patch.object(DocumentDiffView, 'incremental', False):
+            full = self.client.post('/api/documents/1/diff', data, format='json')
+        assert_equal(full.data['n_changes'], response.data['n_changes'])
+
+    def test_diff_changed_section_with_many_paragraphs(self):
+        section = '<section eId="sec_1"><num>1.</num><content><p>alpha</p><p>beta</p><p>gamma</p></content></section>'
+        response = self.client.patch('/api/documents/1', {'content': document_fixture(xml=section)})
+        assert_equal(response.status_code, 200)
+
+        changed = section.replace('alpha', 'alpha one').replace('gamma', 'gamma three')
+        response = self.client.post('/api/documents/1/diff', {'document': {'content': document_fixture(xml=changed)}}, format='json')
+        assert_equal(response.status_code, 200)
+
+        diff = response.data['html_diff'].decode('utf-8')
+        assert_in('alpha<ins> one</ins>', diff)
+        assert_in('gamma<ins> three</ins>', diff)
+        assert_equal(2, response.data['n_changes'])
+
+    def test_diff_changed_title(self):
+        content = document_fixture('hello')
+        response = self.client.patch('/api/documents/1', {'content': content, 'title': 'Old title'})
+        assert_equal(response.status_code, 200)
+
+        data = {'document': {'content': content, 'title': 'New title'}}
+        response = self.client.post('/api/documents/1/diff', data, format='json')
+        assert_equal(response.status_code, 200)
+
+        # the title is only on the coverpage
+        diff = response.data['html_diff'].decode('utf-8')
+        assert_in('<ins>New</ins>', diff)
+        assert_true(response.data['n_changes'] > 0)
+
+    def test_diff_changed_element_not_in_html(self):
+        sections = ''.join(f'<section eId="sec_{i}"><num>{i}.</num><content><p>text {i}</p></content></section>' for i in range(1, 3))
+        response = self.client.patch('/api/documents/1', {'content': document_fixture(xml=sections)})
+        assert_equal(response.status_code, 200)
+
+        data = {'document': {'content': document_fixture(xml=sections.replace('text 2', 'changed 2'))}}
+        full = self.client.post('/api/documents/1/diff', data, format='json')
+
+        # if the changed element can't be found in the HTML, the whole document is diffed
+        with patch('indigo_api.views.documents.DocumentDiffView.diff_html', autospec=True,
+                   side_effect=DocumentDiffView.diff_html) as diff_html, \
+                patch.object(DocumentDiffView, 'find_html_element', return_value=None):
+            response = self.client.post('/api/documents/1/diff', data, format='json')
+        assert_equal(response.status_code, 200)
+        assert_equal(1, diff_html.call_count)
+        assert_equal(full.data['n_changes'], response.data['n_changes'])
+
     def test_update_content_and_properties(self):
         response = self.client.patch('/api/documents/1', {
             'content': document_fixture('in γνωρίζω body'),
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from indigo_api import place_cache
+from indigo_api.models import Country, User, Work
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PlaceCacheTestCase(TestCase):
+    fixtures = ['languages_data', 'countries', 'user']
+
+    def setUp(self):
+        self.old_setting = settings.INDIGO.get('PLACE_WORKS_CACHE')
+        settings.INDIGO['PLACE_WORKS_CACHE'] = True
+        place_cache.invalidate_place('za')
+
+        user = User.objects.get(pk=1)
+        self.work = Work(
+            frbr_uri='/akn/za/act/2002/5',
+            title='Act 5 of 2002',
+            country=Country.objects.get(pk=1),
+            created_by_user=user,
+            updated_by_user=user,
+        )
+        self.work.properties['cap'] = '12'
+        self.work.save()
+
+    def tearDown(self):
+        settings.INDIGO['PLACE_WORKS_CACHE'] = self.old_setting
+
+    def test_work_uris(self):
+        self.assertIn('/akn/za/act/2002/5', place_cache.place_work_uris('za'))
+        with self.assertNumQueries(0):
+            self.assertIn('/akn/za/act/2002/5', place_cache.place_work_uris('za'))
+
+    def test_cap_numbers_refreshed_on_save(self):
+        self.assertEqual({'cap': {'12': '/akn/za/act/2002/5'}}, place_cache.place_cap_numbers('za'))
+        with self.assertNumQueries(0):
+            place_cache.place_cap_numbers('za')
+
+        self.work.properties['cap'] = '13'
+        self.work.save()
+        self.assertEqual({'cap': {'13': '/akn/za/act/2002/5'}}, place_cache.place_cap_numbers('za'))
+
+    def test_disabled(self):
+        settings.INDIGO['PLACE_WORKS_CACHE'] = False
+        place_cache.place_cap_numbers('za')
+        with self.assertNumQueries(1):
+            place_cache.place_cap_numbers('za')
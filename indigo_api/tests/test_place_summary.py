@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from django.test import TestCase, override_settings
+
+from indigo_api import place_summary
+from indigo_api.models import Country, Task, User, Work
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PlaceSummaryTestCase(TestCase):
+    fixtures = ['languages_data', 'countries', 'user', 'taxonomies', 'work']
+
+    def setUp(self):
+        self.za = Country.for_code('za')
+        self.user = User.objects.get(pk=1)
+        place_summary.invalidate_place('za')
+
+    def test_summary(self):
+        summary = place_summary.place_summary(self.za)
+        works = Work.objects.filter(country=self.za, locality=None)
+
+        self.assertEqual(works.count(), summary['n_works'])
+        self.assertEqual(works.filter(stub=True).count(), summary['n_stubs'])
+        self.assertEqual(works.count(), sum(summary['works_by_year'].values()))
+        self.assertEqual(works.count(), sum(summary['works_by_subtype'].values()))
+
+    def test_cached(self):
+        place_summary.place_summary(self.za)
+        with self.assertNumQueries(0):
+            place_summary.place_summary(self.za)
+
+    def test_refreshed_on_save(self):
+        n_works = place_summary.place_summary(self.za)['n_works']
+        n_tasks = place_summary.place_summary(self.za)['n_open_tasks']
+
+        Work.objects.create(frbr_uri='/akn/za/act/2030/1', title='New', country=self.za, created_by_user=self.user)
+        Task.objects.create(title='Task', country=self.za, created_by_user=self.user)
+
+        summary = place_summary.place_summary(self.za)
+        self.assertEqual(n_works + 1, summary['n_works'])
+        self.assertEqual(n_tasks + 1, summary['n_open_tasks'])
+
+    def test_refreshed_when_work_moves(self):
+        work = Work.objects.create(frbr_uri='/akn/za/act/2030/1', title='New', country=self.za, created_by_user=self.user)
+        n_works = place_summary.place_summary(self.za)['n_works']
+
+        work.frbr_uri = '/akn/za-cpt/act/2030/1'
+        work.locality = self.za.localities.get(code='cpt')
+        work.save()
+
+        self.assertEqual(n_works - 1, place_summary.place_summary(self.za)['n_works'])
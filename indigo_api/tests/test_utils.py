@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from indigo_api.utils import locale_filename_candidates, find_best_static, find_best_template, clear_resolution_cache
+
+
+@override_settings(DEBUG=False)
+class ResolutionCacheTestCase(TestCase):
+    def setUp(self):
+        clear_resolution_cache()
+
+    def tearDown(self):
+        clear_resolution_cache()
+
+    def test_candidates(self):
+        self.assertEqual([
+            'xsl/html_act-by-law-eng-za.xsl',
+            'xsl/html_act-by-law-eng.xsl',
+            'xsl/html_act-by-law-za.xsl',
+            'xsl/html_act-by-law.xsl',
+            'xsl/html_act-eng-za.xsl',
+            'xsl/html_act-za.xsl',
+            'xsl/html_act-eng.xsl',
+            'xsl/html_act.xsl',
+            'xsl/html_akn.xsl',
+        ], locale_filename_candidates('act', 'by-law', 'eng', 'za', 'xsl/html_', '.xsl'))
+
+    def test_static_cached(self):
+        candidates = locale_filename_candidates('act', None, 'eng', 'za', 'xsl/html_', '.xsl')
+        with patch('indigo_api.utils.find_static', wraps=lambda x: '/tmp/' + x if x == 'xsl/html_act.xsl' else None) as find_static:
+            self.assertEqual('/tmp/xsl/html_act.xsl', find_best_static(candidates))
+            self.assertEqual(4, find_static.call_count)
+
+            self.assertEqual('/tmp/xsl/html_act.xsl', find_best_static(candidates))
+            self.assertEqual(4, find_static.call_count)
+
+            # relative name is cached separately
+            self.assertEqual('xsl/html_act.xsl', find_best_static(candidates, actual=False))
+            self.assertEqual(8, find_static.call_count)
+
+    def test_template_miss_cached(self):
+        candidates = ['indigo_api/akn/missing-1.html', 'indigo_api/akn/missing-2.html']
+        self.assertIsNone(find_best_template(candidates))
+
+        with patch('indigo_api.utils.get_template') as get_template:
+            self.assertIsNone(find_best_template(candidates))
+            get_template.assert_not_called()
+
+    def test_clear(self):
+        candidates = locale_filename_candidates('act', None, 'eng', 'za', 'indigo_api/akn/', '.html')
+        self.assertEqual('indigo_api/akn/act.html', find_best_template(candidates))
+
+        clear_resolution_cache()
+        with patch('indigo_api.utils.get_template') as get_template:
+            find_best_template(candidates)
+            get_template.assert_called()
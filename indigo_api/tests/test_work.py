@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 import datetime
+import tempfile
 
+from django.conf import settings
+from django.core.files.storage import default_storage
 from django.test import TestCase
 from django.core.exceptions import ValidationError
+from django.test.utils import override_settings
 
+from indigo_api import render_cache, render_store
+from indigo_api.document_refresh import refresh_documents
 from indigo_api.models import Document, Work, Country, Amendment, ArbitraryExpressionDate
 
 
@@ -22,6 +28,45 @@ class WorkTestCase(TestCase):
 
         document = Document.objects.get(pk=20)
         self.assertEqual(document.frbr_uri, '/akn/za/act/2999/1')
+        self.assertEqual(document.doc.frbr_uri.work_uri(), '/akn/za/act/2999/1')
+
+    def test_cascade_publication_changes(self):
+        document = Document.objects.get(pk=20)
+        document.work.publication_name = 'Gazette of Somewhere'
+        document.work.publication_number = '1234'
+        document.work.save()
+
+        document = Document.objects.get(pk=20)
+        self.assertEqual('Gazette of Somewhere', document.doc.publication_name)
+        self.assertEqual('1234', document.doc.publication_number)
+        self.assertFalse(document.work_metadata_stale())
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_cascade_only_on_inherited_changes(self):
+        document = Document.objects.get(pk=20)
+        updated_at = document.updated_at
+        generation = render_cache.document_generation(document.id)
+
+        document.work.assent_date = datetime.date(2001, 1, 1)
+        document.work.save()
+
+        self.assertEqual(updated_at, Document.objects.get(pk=20).updated_at)
+        # the coverpage includes the assent date, so cached HTML is discarded
+        self.assertNotEqual(generation, render_cache.document_generation(document.id))
+
+    def test_refresh_documents_purges_render_store(self):
+        document = Document.objects.get(pk=20)
+        settings.INDIGO['RENDER_STORE'] = True
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir, override_settings(MEDIA_ROOT=tmpdir):
+                name = render_store.artifact_name(document, 'pdf', 'key', None)
+                render_store.save(name, 'pdf-content')
+
+                document.work.publication_name = 'Gazette of Somewhere'
+                self.assertEqual([document], refresh_documents([document]))
+                self.assertFalse(default_storage.exists(name))
+        finally:
+            settings.INDIGO['RENDER_STORE'] = False
 
     def test_commencement_as_pit_date(self):
         """ When the publication date is unknown, fall back
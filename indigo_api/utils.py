@@ -1,5 +1,8 @@
 import logging
 
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.template.loader import get_template, TemplateDoesNotExist
 from django.utils import lru_cache
 from django.contrib.postgres.search import Value, Func, SearchRank
@@ -74,11 +77,12 @@ def filename_candidates(document, prefix='', suffix=''):
     * akn
     """
     uri = document.expression_uri
-    doctype = uri.doctype
-    language = uri.language
-    country = uri.country
-    subtype = uri.subtype
+    return locale_filename_candidates(uri.doctype, uri.subtype, uri.language, uri.country, prefix, suffix)
 
+
+def locale_filename_candidates(doctype, subtype, language, country, prefix='', suffix=''):
+    """ Candidate files for a document with these attributes. See `filename_candidates`.
+    """
     options = []
     if subtype:
         options.append('-'.join([doctype, subtype, language, country]))
@@ -95,25 +99,99 @@ def filename_candidates(document, prefix='', suffix=''):
     return [prefix + f + suffix for f in options]
 
 
+# Results of find_best_static and find_best_template, keyed by the candidates (which are
+# determined by the prefix, doctype, subtype, language, country and suffix). Misses are
+# cached too, since they're the expensive case.
+_resolution_cache = {}
+
+# Template and static file prefixes used when rendering documents, as (kind, prefix, suffix) tuples.
+# These are resolved by warm_resolution_cache.
+RESOLUTION_PREFIXES = [
+    ('template', 'indigo_api/akn/', '.html'),
+    ('template', 'indigo_api/akn/coverpage_', '.html'),
+    ('template', 'indigo_api/akn/export/pdf_colophon_', '.html'),
+    ('template', 'indigo_api/akn/export/pdf_footer_', '.html'),
+    ('template', 'indigo_api/akn/export/pdf_toc_', '.xsl'),
+    ('template', 'indigo_api/akn/export/epub_colophon_', '.html'),
+    ('static', 'xsl/html_', '.xsl'),
+    ('static', 'xsl/html_to_akn_text_', '.xsl'),
+]
+
+
+def _resolution_cache_enabled():
+    # Like Django's cached template loader, don't cache while debugging, so that
+    # new templates are picked up without a restart.
+    return not settings.DEBUG
+
+
+def _resolve(key, resolver):
+    if not _resolution_cache_enabled():
+        return resolver()
+
+    try:
+        return _resolution_cache[key]
+    except KeyError:
+        result = _resolution_cache[key] = resolver()
+        return result
+
+
+def clear_resolution_cache():
+    """ Forget all resolved templates and static files.
+    """
+    _resolution_cache.clear()
+
+
+@receiver(setting_changed)
+def clear_resolution_cache_on_setting_changed(sender, setting, **kwargs):
+    if setting in ['TEMPLATES', 'INSTALLED_APPS', 'STATICFILES_DIRS', 'STATICFILES_FINDERS', 'DEBUG']:
+        clear_resolution_cache()
+
+
+def warm_resolution_cache():
+    """ Resolve the templates and static files needed to render documents in all countries
+    and their primary languages, for the configured doctypes.
+    """
+    from indigo_api.models import Country
+
+    doctypes = set(code for name, code in settings.INDIGO['DOCTYPES'])
+    for extras in settings.INDIGO['EXTRA_DOCTYPES'].values():
+        doctypes.update(code for name, code in extras)
+
+    for country in Country.objects.select_related('country', 'primary_language', 'primary_language__language'):
+        for doctype in doctypes:
+            for kind, prefix, suffix in RESOLUTION_PREFIXES:
+                candidates = locale_filename_candidates(doctype, None, country.primary_language.code, country.code, prefix, suffix)
+                if kind == 'template':
+                    find_best_template(candidates)
+                else:
+                    find_best_static(candidates)
+
+
 def find_best_static(candidates, actual=True):
     """ Return the first static file that exists given a list of candidate files.
     """
-    for option in candidates:
-        log.debug("Looking for %s" % option)
-        fname = find_static(option)
-        if fname:
-            log.debug("Using %s" % fname)
-            return fname if actual else option
+    def resolve():
+        for option in candidates:
+            log.debug("Looking for %s" % option)
+            fname = find_static(option)
+            if fname:
+                log.debug("Using %s" % fname)
+                return fname if actual else option
+
+    return _resolve(('static', tuple(candidates), actual), resolve)
 
 
 def find_best_template(candidates):
     """ Return the first template that exists given a list of candidate files.
     """
-    for option in candidates:
-        try:
-            log.debug("Looking for %s" % option)
-            if get_template(option):
-                log.debug("Using %s" % option)
-                return option
-        except TemplateDoesNotExist:
-            pass
+    def resolve():
+        for option in candidates:
+            try:
+                log.debug("Looking for %s" % option)
+                if get_template(option):
+                    log.debug("Using %s" % option)
+                    return option
+            except TemplateDoesNotExist:
+                pass
+
+    return _resolve(('template', tuple(candidates)), resolve)
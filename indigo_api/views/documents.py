@@ -2,6 +2,7 @@ import logging
 import copy
 
 from actstream import action
+from django.core.cache import caches
 from django.shortcuts import redirect
 from django.views import View
 from django.views.decorators.cache import cache_control
@@ -27,6 +28,7 @@ import lxml.html.diff
 from lxml.etree import LxmlError
 
 from indigo.analysis.differ import AttributeDiffer
+from indigo.analysis.pipeline import AnalysisPipeline
 from indigo.plugins import plugins
 from ..models import Document, Annotation, DocumentActivity, Task
 from ..serializers import DocumentSerializer, RenderSerializer, ParseSerializer, DocumentAPISerializer, VersionSerializer, AnnotationSerializer, DocumentActivitySerializer, TaskSerializer, DocumentDiffSerializer
@@ -68,7 +70,24 @@ class DocumentViewMixin(object):
             self.serializer_class = self.request.accepted_renderer.serializer_class
 
     def table_of_contents(self, document, uri=None):
-        return [t.as_dict() for t in document.table_of_contents()]
+        return document.table_of_contents_dicts()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(DocumentViewMixin, self).finalize_response(request, response, *args, **kwargs)
+
+        # stream zip files, rather than building them in memory
+        renderer = getattr(response, 'accepted_renderer', None)
+        if isinstance(response, Response) and response.status_code == 200 and isinstance(renderer, ZIPRenderer):
+            streaming = renderer.streaming_response(response.data, self)
+            if streaming:
+                for header, value in response.items():
+                    streaming.setdefault(header, value)
+                # keep the same details as other API responses
+                streaming.accepted_renderer = renderer
+                streaming.accepted_media_type = response.accepted_media_type
+                return streaming
+
+        return response
 
 
 # Read/write REST API
@@ -221,6 +240,8 @@ class RevisionViewSet(DocumentResourceView, viewsets.ReadOnlyModelViewSet):
     serializer_class = VersionSerializer
     # The permissions applied in this case are for reversion.Version
     permission_classes = DEFAULT_PERMS + (DjangoModelPermissionsOrAnonReadOnly,)
+    # versions don't change, so their diffs can be cached for a long time
+    diff_cache_timeout = 60 * 60 * 24 * 7
 
     @detail_route_action(detail=True, methods=['POST'])
     def restore(self, request, *args, **kwargs):
@@ -246,12 +267,26 @@ class RevisionViewSet(DocumentResourceView, viewsets.ReadOnlyModelViewSet):
     @cache_control(public=True, max_age=24 * 3600)
     def diff(self, request, *args, **kwargs):
         # this can be cached because the underlying data won't change (although
-        # the formatting might)
+        # the formatting might, which is why the differ's version is part of the key)
         version = self.get_object()
 
         # most recent version just before this one
         old_version = self.get_queryset().filter(id__lt=version.id).first()
 
+        cache = caches['default']
+        key = self.diff_cache_key(old_version, version)
+        diff = cache.get(key)
+        if diff is None:
+            diff = self.diff_versions(old_version, version)
+            cache.set(key, diff, self.diff_cache_timeout)
+
+        return Response(diff)
+
+    def diff_cache_key(self, old_version, version):
+        old_id = old_version.id if old_version else None
+        return f'revision-diff:{old_id}:{version.id}:{AttributeDiffer.html_differ_class.diff_version}'
+
+    def diff_versions(self, old_version, version):
         differ = AttributeDiffer()
 
         if old_version:
@@ -274,10 +309,10 @@ class RevisionViewSet(DocumentResourceView, viewsets.ReadOnlyModelViewSet):
 
         # TODO: include other diff'd attributes
 
-        return Response({
+        return {
             'content': diff,
             'n_changes': n_changes,
-        })
+        }
 
     def get_queryset(self):
         return self.document.versions().defer('serialized_data')
@@ -416,25 +451,9 @@ class LinkReferencesView(DocumentResourceView, APIView):
         return Response({'document': {'content': document.document_xml}})
 
     def find_references(self, document):
-        finder = plugins.for_document('refs', document)
-        if finder:
-            finder.find_references_in_document(document)
-
-        finder = plugins.for_document('refs-subtypes', document)
-        if finder:
-            finder.find_references_in_document(document)
-
-        finder = plugins.for_document('refs-cap', document)
-        if finder:
-            finder.find_references_in_document(document)
-
-        finder = plugins.for_document('refs-act-names', document)
-        if finder:
-            finder.find_references_in_document(document)
-
-        finder = plugins.for_document('internal-refs', document)
-        if finder:
-            finder.find_references_in_document(document)
+        pipeline = AnalysisPipeline()
+        pipeline.add_references(document)
+        pipeline.run(document)
 
 
 class MarkUpItalicsTermsView(DocumentResourceView, APIView):
@@ -461,6 +480,8 @@ class MarkUpItalicsTermsView(DocumentResourceView, APIView):
 
 class DocumentDiffView(DocumentResourceView, APIView):
     permission_classes = (IsAuthenticated,)
+    # when diffing the whole document, only render and diff the elements that have changed
+    incremental = True
 
     def post(self, request, document_id):
         serializer = DocumentDiffSerializer(instance=self.document, data=self.request.data)
@@ -491,14 +512,18 @@ class DocumentDiffView(DocumentResourceView, APIView):
 
             local_html = local_doc.to_html(element=local_element[0]) if len(local_element) else None
             remote_html = remote_doc.to_html(element=remote_element[0]) if len(remote_element) else None
+            n_changes, diff = self.diff_html(differ, remote_html, local_html)
         else:
-            # diff the whole document
-            local_html = local_doc.to_html()
-            remote_html = remote_doc.to_html()
+            result = None
+            if self.incremental:
+                changed = differ.changed_elements(remote_doc.doc.root, local_doc.doc.root)
+                if changed is not None:
+                    result = self.diff_changed_elements(differ, remote_doc, local_doc, changed)
 
-        local_tree = lxml.html.fromstring(local_html or "<div></div>")
-        remote_tree = lxml.html.fromstring(remote_html) if remote_html else None
-        n_changes, diff = differ.diff_document_html(remote_tree, local_tree)
+            if result is None:
+                # diff the whole document
+                result = self.diff_html(differ, remote_doc.to_html(), local_doc.to_html())
+            n_changes, diff = result
 
         if not isinstance(diff, str):
             diff = lxml.html.tostring(diff, encoding='utf-8')
@@ -510,6 +535,60 @@ class DocumentDiffView(DocumentResourceView, APIView):
             'n_changes': n_changes,
         })
 
+    def diff_html(self, differ, remote_html, local_html):
+        local_tree = lxml.html.fromstring(local_html or "<div></div>")
+        remote_tree = lxml.html.fromstring(remote_html) if remote_html else None
+        return differ.diff_document_html(remote_tree, local_tree)
+
+    def diff_changed_elements(self, differ, remote_doc, local_doc, changed):
+        """ Render and diff only the changed (remote, local) element pairs, and stitch the diffs into the
+        HTML of the local document, the rest of which is unchanged.
+
+        Returns None if a changed element can't be found in the HTML, and so the whole document must be diffed.
+        """
+        tree = lxml.html.fromstring(local_doc.to_html())
+        # (HTML element to replace, remote HTML, local HTML)
+        diffs = []
+
+        # the coverpage shows details that aren't in the elements compared, such as the document's title
+        exporter = HTMLExporter()
+        remote_html = exporter.render_coverpage(remote_doc)
+        local_html = exporter.render_coverpage(local_doc)
+        if remote_html != local_html:
+            original = tree.find_class('coverpage')
+            diffs.append((original[0] if original else None, remote_html, local_html))
+
+        for remote_element, local_element in changed:
+            diffs.append((
+                self.find_html_element(tree, local_element, local_doc.doc.namespace),
+                remote_doc.to_html(element=remote_element),
+                local_doc.to_html(element=local_element),
+            ))
+
+        if any(original is None or original.getparent() is None for original, _, _ in diffs):
+            return None
+
+        n_changes = 0
+        for original, remote_html, local_html in diffs:
+            count, diff = self.diff_html(differ, remote_html, local_html)
+            n_changes += count
+            if hasattr(diff, 'getroot'):
+                diff = diff.getroot()
+
+            diff.tail = original.tail
+            original.getparent().replace(original, diff)
+
+        return n_changes, tree
+
+    def find_html_element(self, tree, element, namespace):
+        """ Find the HTML rendering of an XML element in the HTML tree of a document, or None.
+        """
+        # ids in the HTML are scoped to the attachment the element is in, if any
+        scope = element.xpath('ancestor::a:attachment[@eId][1]/@eId', namespaces={'a': namespace})
+        html_id = (f'{scope[0]}/' if scope else '') + element.get('eId')
+        found = tree.xpath('//*[@id=$id]', id=html_id)
+        return found[0] if found else None
+
 
 class StaticFinderView(DocumentResourceView, View):
     """ This view looks for a static file (such as text.xsl, or html.xsl) suitable for use with this document,
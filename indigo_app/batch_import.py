@@ -0,0 +1,181 @@
+""" Batch imports of works from spreadsheets, run as background tasks.
+
+The batch import view creates a BatchImportJob and queues it with run_batch_import. The job records
+its progress (the current phase and the results of the rows processed so far) as it runs, so that
+the browser can poll for it.
+"""
+import logging
+import time
+from contextlib import nullcontext
+
+from background_task import background
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.html import conditional_escape
+
+from indigo.plugins import plugins
+from indigo_app.models import BatchImportJob
+
+
+log = logging.getLogger(__name__)
+
+
+def get_bulk_creator(country, locality, user, request=None):
+    locality_code = locality.code if locality else None
+    creator = plugins.for_locale('bulk-creator', country.code, None, locality_code)
+    creator.country = country
+    creator.locality = locality
+    creator.request = request
+    creator.user = user
+    creator.testing = False
+    return creator
+
+
+class BatchImportRunner:
+    """ Runs a BatchImportJob, saving its progress as it goes.
+
+    If an earlier attempt at running the job was interrupted, the works it created are found again as
+    duplicates. The rows up to the checkpoint (`rows_done`) keep their original results, so that they're
+    still reported as having been imported.
+
+    In bulk mode (see BaseBulkCreator), the import runs in a single transaction, and so progress is only
+    visible to other connections once the import completes.
+
+    When the job is run inside an existing transaction, such as a request's when BATCH_IMPORT_BACKGROUND is
+    off, the import runs in a savepoint so that a failed import is rolled back rather than committed with
+    the request.
+    """
+    # minimum number of seconds between saving progress
+    save_interval = 1.0
+
+    def __init__(self, job, creator=None):
+        self.job = job
+        self.creator = creator or get_bulk_creator(job.country, job.locality, job.created_by_user)
+        self.last_saved = 0
+        self.checkpoint = {}
+
+    def run(self):
+        job = self.job
+        if job.finished:
+            return
+
+        if job.status == job.RUNNING:
+            # an earlier attempt was interrupted
+            self.checkpoint = {r['row_number']: r for r in job.results[:job.rows_done]}
+            log.info(f"Resuming batch import job {job.pk} after {job.rows_done} rows")
+
+        job.status = job.RUNNING
+        job.rows_done = 0
+        job.results = []
+        self.save()
+
+        rollback = transaction.get_connection().in_atomic_block
+
+        try:
+            if job.table is None:
+                job.table = self.creator.get_datatable(job.spreadsheet_url, job.sheet_name)
+                self.save()
+
+            with transaction.atomic() if rollback else nullcontext():
+                rows = self.creator.create_works(job.table, job.dry_run, job.workflow,
+                                                 bulk=settings.INDIGO.get('BULK_CREATE_WORKS', False),
+                                                 progress=self.progress)
+
+            job.results = [self.serialise_row(row, final=True) for row in rows]
+            job.rows_done = len(job.results)
+            job.phase = None
+            job.status = job.DONE
+
+        except ValidationError as e:
+            job.error = str(e)
+            self.failed(rollback)
+
+        except Exception as e:
+            log.error(f"Error running batch import job {job.pk}: {e}", exc_info=e)
+            job.error = f"Error importing works: {e}"
+            self.failed(rollback)
+
+        self.save()
+
+    def failed(self, rolled_back):
+        job = self.job
+        job.status = job.FAILED
+        if rolled_back:
+            # none of the works were kept
+            job.results = []
+            job.rows_done = 0
+
+    def progress(self, phase, row):
+        job = self.job
+        job.rows_total = self.creator.rows_total
+        changed = job.phase != phase
+        job.phase = phase
+
+        if row is not None:
+            job.results.append(self.serialise_row(row))
+            job.rows_done = len(job.results)
+
+        if changed or time.monotonic() - self.last_saved >= self.save_interval:
+            self.save()
+
+    def save(self):
+        self.job.save()
+        self.last_saved = time.monotonic()
+
+    def serialise_row(self, row, final=False):
+        """ Serialise a SpreadsheetRow for storing on the job.
+
+        Tasks and taxonomies of new works are only included once the import has completed, because
+        they may not have been saved before then.
+        """
+        work = getattr(row, 'work', None)
+        result = {
+            'row_number': row.row_number,
+            'status': row.status,
+            'errors': str(conditional_escape(row.errors)) if row.errors else None,
+            'notes': list(row.notes),
+            'relationships': list(row.relationships),
+            'tasks': list(row.tasks),
+            'taxonomies': [str(t) for t in row.taxonomies],
+            'work': None,
+            'work_tasks': [],
+        }
+
+        if work:
+            result['work'] = {
+                'title': work.title,
+                'subtype': work.subtype,
+                'nature': work.nature,
+                'number': work.number,
+                'year': work.year,
+                'frbr_uri': work.frbr_uri,
+                'properties': work.properties,
+            }
+
+            if final and not self.job.dry_run and work.pk:
+                result['taxonomies'] = [str(t) for t in work.taxonomies.all()]
+                result['work_tasks'] = [{'pk': t.pk, 'title': t.title} for t in work.tasks.all()]
+
+        previous = self.checkpoint.get(result['row_number'])
+        if previous and previous['status'] == 'success' and result['status'] == 'duplicate':
+            # this work was created by an earlier attempt at this job
+            result['status'] = 'success'
+
+        return result
+
+
+@background(queue='indigo')
+def run_batch_import(job_id):
+    try:
+        job = BatchImportJob.objects.get(pk=job_id)
+    except BatchImportJob.DoesNotExist:
+        log.warning("Batch import job with id {} doesn't exist, ignoring".format(job_id))
+        return
+
+    BatchImportRunner(job).run()
+
+
+if not settings.INDIGO.get('BATCH_IMPORT_BACKGROUND', False):
+    # change background batch imports to be synchronous
+    run_batch_import = run_batch_import.now
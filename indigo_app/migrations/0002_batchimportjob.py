@@ -0,0 +1,43 @@
+# Generated by Django 2.2.12 on 2026-10-18 10:00
+
+from django.conf import settings
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('indigo_api', '0006_document_toc_json'),
+        ('indigo_app', '0001_squashed_0021'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchImportJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('spreadsheet_url', models.URLField()),
+                ('sheet_name', models.CharField(blank=True, max_length=512, null=True)),
+                ('dry_run', models.BooleanField(default=True, help_text='Only preview the works that would be created')),
+                ('status', models.CharField(default='pending', max_length=16)),
+                ('phase', models.CharField(blank=True, max_length=32, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('table', django.contrib.postgres.fields.jsonb.JSONField(blank=True, null=True)),
+                ('rows_total', models.IntegerField(default=0)),
+                ('rows_done', models.IntegerField(default=0)),
+                ('results', django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('country', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='indigo_api.Country')),
+                ('created_by_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('locality', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='indigo_api.Locality')),
+                ('workflow', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='indigo_api.Workflow')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.fields import JSONField
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
@@ -60,6 +61,52 @@ class Publication(models.Model):
         return str(self.name)
 
 
+class BatchImportJob(models.Model):
+    """ A batch import (or preview) of works from a spreadsheet, which runs as a background task.
+
+    The spreadsheet is fetched once and stored in `table`, so that a job that is interrupted and retried
+    imports the same rows. Results for each row are stored in `results` as they're processed, with
+    `rows_done` as the checkpoint.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    FINISHED_STATES = (DONE, FAILED)
+
+    country = models.ForeignKey('indigo_api.Country', null=False, on_delete=models.CASCADE)
+    locality = models.ForeignKey('indigo_api.Locality', null=True, on_delete=models.CASCADE)
+    workflow = models.ForeignKey('indigo_api.Workflow', null=True, on_delete=models.SET_NULL)
+    spreadsheet_url = models.URLField(null=False, blank=False)
+    sheet_name = models.CharField(max_length=512, null=True, blank=True)
+    dry_run = models.BooleanField(default=True, help_text="Only preview the works that would be created")
+
+    status = models.CharField(max_length=16, default=PENDING)
+    phase = models.CharField(max_length=32, null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+
+    table = JSONField(null=True, blank=True)
+    rows_total = models.IntegerField(default=0)
+    rows_done = models.IntegerField(default=0)
+    results = JSONField(null=False, blank=True, default=list)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    created_by_user = models.ForeignKey(User, on_delete=models.CASCADE, null=False, related_name='+')
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def finished(self):
+        return self.status in self.FINISHED_STATES
+
+    @property
+    def place(self):
+        return self.locality or self.country
+
+
 @receiver(post_save, sender=User)
 def create_editor(sender, **kwargs):
     # create editor for user objects
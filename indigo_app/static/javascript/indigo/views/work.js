@@ -392,8 +392,35 @@
       'click .btn.show-progress': 'showProgress',
     },
 
+    initialize: function() {
+      var job = document.getElementById('batch-import-job');
+      if (job) this.pollJob(job.getAttribute('data-url'));
+    },
+
     showProgress: function(e) {
       document.getElementById('import-progress').classList.remove('d-none');
     },
+
+    /**
+     * Poll a running batch import job, showing its progress and the results of the rows processed so far,
+     * and reload the page when it's done.
+     */
+    pollJob: function(url) {
+      var self = this;
+
+      $.getJSON(url).then(function(job) {
+        if (job.finished) {
+          window.location.reload();
+          return;
+        }
+
+        var percent = job.rows_total ? Math.round(100 * job.rows_done / job.rows_total) : 0;
+        self.$('#batch-import-job .progress-bar').css('width', percent + '%');
+        self.$('#batch-import-job .batch-import-status').text(job.rows_done + ' of ' + job.rows_total + ' rows');
+        self.$('#batch-import-results').html(job.results_html);
+
+        setTimeout(function() { self.pollJob(url); }, 2000);
+      });
+    },
   });
 })(window);
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import csv
+import os
+
+from django.contrib.auth.models import User, Permission
+from django.test import testcases, override_settings
+
+from indigo.bulk_creator import BaseBulkCreator
+from indigo_api.models import Country, Work
+from indigo_app.batch_import import BatchImportRunner
+from indigo_app.models import BatchImportJob
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class BatchImportJobTest(testcases.TestCase):
+    fixtures = ['languages_data', 'countries', 'user', 'taxonomies', 'work', 'editor']
+
+    def setUp(self):
+        self.user = User.objects.get(pk=1)
+        self.country = Country.objects.get(pk=1)
+
+        filename = os.path.join(os.path.dirname(__file__), '..', '..', 'indigo', 'tests', 'bulk_creator', 'basic.csv')
+        with open(filename) as f:
+            self.table = list(csv.reader(f))
+
+    def make_job(self, **kwargs):
+        kwargs.setdefault('dry_run', False)
+        return BatchImportJob.objects.create(
+            country=self.country,
+            spreadsheet_url='https://docs.google.com/spreadsheets/d/test/',
+            table=self.table,
+            created_by_user=self.user,
+            **kwargs)
+
+    def run_job(self, job):
+        creator = BaseBulkCreator()
+        creator.country = self.country
+        creator.locality = None
+        creator.user = self.user
+        creator.testing = True
+        BatchImportRunner(job, creator).run()
+        job.refresh_from_db()
+        return job
+
+    def test_preview(self):
+        job = self.run_job(self.make_job(dry_run=True))
+
+        self.assertEqual(BatchImportJob.DONE, job.status)
+        self.assertEqual(2, job.rows_total)
+        self.assertEqual(2, job.rows_done)
+        self.assertEqual(['success', 'success'], [r['status'] for r in job.results])
+        self.assertEqual('Testy 1', job.results[0]['work']['title'])
+        self.assertEqual(['link gazette', 'import content'], job.results[0]['tasks'])
+        self.assertFalse(Work.objects.filter(frbr_uri='/akn/za/act/2020/1').exists())
+
+    def test_import(self):
+        job = self.run_job(self.make_job())
+
+        self.assertEqual(BatchImportJob.DONE, job.status)
+        work = Work.objects.get(frbr_uri='/akn/za/act/2020/1')
+        self.assertEqual(
+            sorted([{'pk': t.pk, 'title': t.title} for t in work.tasks.all()], key=lambda t: t['pk']),
+            sorted(job.results[0]['work_tasks'], key=lambda t: t['pk']))
+
+    def test_resume(self):
+        first = self.run_job(self.make_job())
+
+        # the job was interrupted after the first row was checkpointed
+        job = self.make_job(status=BatchImportJob.RUNNING, rows_done=1, results=first.results[:1])
+        job = self.run_job(job)
+
+        self.assertEqual(BatchImportJob.DONE, job.status)
+        self.assertEqual(['success', 'duplicate'], [r['status'] for r in job.results])
+        self.assertEqual(1, Work.objects.filter(frbr_uri='/akn/za/act/2020/1').count())
+
+    def test_failed_import_rolled_back(self):
+        class FailingCreator(BaseBulkCreator):
+            def create_work_from_row(self, row):
+                if self.works:
+                    raise Exception("failed")
+                return super().create_work_from_row(row)
+
+        creator = FailingCreator()
+        creator.country = self.country
+        creator.locality = None
+        creator.user = self.user
+        creator.testing = True
+        job = self.make_job()
+        BatchImportRunner(job, creator).run()
+        job.refresh_from_db()
+
+        # the first work isn't kept
+        self.assertEqual(BatchImportJob.FAILED, job.status)
+        self.assertEqual('Error importing works: failed', job.error)
+        self.assertEqual([], job.results)
+        self.assertFalse(Work.objects.filter(frbr_uri='/akn/za/act/2020/1').exists())
+
+    def test_finished_job_not_run_again(self):
+        job = self.make_job(status=BatchImportJob.DONE)
+        job = self.run_job(job)
+        self.assertEqual([], job.results)
+        self.assertFalse(Work.objects.filter(frbr_uri='/akn/za/act/2020/1').exists())
+
+    def test_progress_view(self):
+        self.user.user_permissions.add(Permission.objects.get(codename='bulk_add_work'))
+        self.assertTrue(self.client.login(username='email@example.com', password='password'))
+        job = self.run_job(self.make_job(dry_run=True))
+
+        response = self.client.get(f'/places/za/works/new-batch/jobs/{job.pk}')
+        self.assertEqual(200, response.status_code)
+        data = response.json()
+        self.assertEqual('done', data['status'])
+        self.assertTrue(data['finished'])
+        self.assertEqual(2, data['rows_done'])
+        self.assertIn('Testy 1', data['results_html'])
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import csv
+import io
 import os
 import pandas as pd
 
@@ -52,6 +53,16 @@ class XLSXExporterTest(testcases.TestCase):
     def test_basic(self):
         self.write_and_compare('basic')
 
+    def test_generate_streamed(self):
+        self.import_works(False, 'basic.csv')
+        works = Work.objects.filter(country=self.country, locality=self.locality).order_by('created_at')
+        response = generate_xlsx(works, 'basic.xlsx', True)
+        self.assertEqual('attachment; filename="basic.xlsx"', response['Content-Disposition'])
+
+        output_content = pd.read_excel(io.BytesIO(b''.join(response.streaming_content)))
+        expected = os.path.join(os.path.dirname(__file__), 'basic_output_expected.xlsx')
+        pd.testing.assert_frame_equal(pd.read_excel(expected), output_content)
+
     def test_errors(self):
         self.write_and_compare('errors')
 
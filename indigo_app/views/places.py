@@ -9,7 +9,6 @@ from actstream import action
 from actstream.models import Action
 from django.contrib.auth.models import User
 from django.db.models import Count, Subquery, IntegerField, OuterRef, Prefetch
-from django.db.models.functions import Extract
 from django.contrib import messages
 from django.http import QueryDict
 from django.shortcuts import redirect
@@ -18,7 +17,8 @@ from django.utils.timezone import now
 from django.views.generic import ListView, TemplateView, UpdateView
 from django.views.generic.list import MultipleObjectMixin
 
-from indigo_api.models import Annotation, Country, Task, Work, Amendment, Subtype, Locality, TaskLabel
+from indigo_api.models import Annotation, Country, Task, Work, Subtype, Locality
+from indigo_api.place_summary import place_summary, place_summaries
 from indigo_api.views.documents import DocumentViewSet
 from indigo_metrics.models import DailyWorkMetrics, WorkMetrics, DailyPlaceMetrics
 
@@ -31,6 +31,15 @@ log = logging.getLogger(__name__)
 
 
 class PlaceMetricsHelper:
+    def add_summaries(self, places):
+        """ Add work and task counts from the place summaries to each place.
+        """
+        summaries = place_summaries(places)
+        for place in places:
+            summary = summaries[place.place_code]
+            place.n_works = summary['n_works']
+            place.n_open_tasks = summary['n_open_tasks']
+
     def add_activity_metrics(self, places, metrics, since):
         # fold metrics into countries
         for place in places:
@@ -73,20 +82,6 @@ class PlaceListView(AbstractAuthedIndigoView, TemplateView, PlaceMetricsHelper):
 
         context['countries'] = Country.objects\
             .prefetch_related('country')\
-            .annotate(n_works=Subquery(
-                Work.objects.filter(country=OuterRef('pk'), locality=None)
-                .values('country')
-                .annotate(cnt=Count('pk'))
-                .values('cnt'),
-                output_field=IntegerField()
-            ))\
-            .annotate(n_open_tasks=Subquery(
-                Task.objects.filter(state__in=Task.OPEN_STATES, country=OuterRef('pk'), locality=None)
-                .values('country')
-                .annotate(cnt=Count('pk'))
-                .values('cnt'),
-                output_field=IntegerField()
-            ))\
             .annotate(p_breadth_complete=Subquery(
                 DailyWorkMetrics.objects
                 .filter(place_code__iexact=OuterRef('country_id'), locality__exact='')
@@ -95,6 +90,7 @@ class PlaceListView(AbstractAuthedIndigoView, TemplateView, PlaceMetricsHelper):
                 output_field=IntegerField()
             ))\
             .all()
+        self.add_summaries(context['countries'])
 
         # place activity
         since = now() - timedelta(days=14)
@@ -120,16 +116,15 @@ class PlaceDetailView(PlaceViewBase, AbstractAuthedIndigoView, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        works = Work.objects.filter(country=self.country, locality=self.locality) \
-            .order_by('-updated_at')
+        summary = place_summary(self.place)
 
         context['recently_updated_works'] = self.get_recently_updated_works()
         context['recently_created_works'] = self.get_recently_created_works()
-        context['subtypes'] = self.get_works_by_subtype(works)
-        context['total_works'] = sum(p[1] for p in context['subtypes'])
+        context['subtypes'] = self.get_works_by_subtype(summary)
+        context['total_works'] = summary['n_works']
 
         # open tasks
-        open_tasks_data = self.calculate_open_tasks()
+        open_tasks_data = self.calculate_open_tasks(summary)
         context['open_tasks'] = open_tasks_data['open_tasks_chart']
         context['open_tasks_by_label'] = open_tasks_data['labels_chart']
         context['total_open_tasks'] = open_tasks_data['total_open_tasks']
@@ -147,15 +142,15 @@ class PlaceDetailView(PlaceViewBase, AbstractAuthedIndigoView, TemplateView):
         ])
 
         # stubs overview
-        context['stubs_count'] = works.filter(stub=True).count()
-        context['non_stubs_count'] = works.filter(stub=False).count()
-        context['stubs_percentage'] = int((context['stubs_count'] / (works.count() or 1)) * 100)
+        context['stubs_count'] = summary['n_stubs']
+        context['non_stubs_count'] = summary['n_works'] - summary['n_stubs']
+        context['stubs_percentage'] = int((context['stubs_count'] / (summary['n_works'] or 1)) * 100)
         context['non_stubs_percentage'] = 100 - context['stubs_percentage']
 
         # primary works overview
-        context['primary_works_count'] = works.filter(parent_work__isnull=True).count()
-        context['subsidiary_works_count'] = works.filter(parent_work__isnull=False).count()
-        context['primary_works_percentage'] = int((context['primary_works_count'] / (works.count() or 1)) * 100)
+        context['primary_works_count'] = summary['n_primary_works']
+        context['subsidiary_works_count'] = summary['n_works'] - summary['n_primary_works']
+        context['primary_works_percentage'] = int((context['primary_works_count'] / (summary['n_works'] or 1)) * 100)
         context['subsidiary_works_percentage'] = 100 - context['primary_works_percentage']
 
         # Completeness
@@ -179,10 +174,12 @@ class PlaceDetailView(PlaceViewBase, AbstractAuthedIndigoView, TemplateView):
         task_stats = self.get_tasks_stats(since)
         context['new_tasks_added'] = task_stats['new_tasks_added']
         context['tasks_completed'] = task_stats['tasks_completed']
-        context['new_works_added'] = works.filter(created_at__gte=since).count()
+        context['new_works_added'] = Work.objects\
+            .filter(country=self.country, locality=self.locality, created_at__gte=since)\
+            .count()
 
         # top most active users
-        context['top_contributors'] = self.get_top_contributors()
+        context['top_contributors'] = self.get_top_contributors(summary)
 
         return context
 
@@ -199,13 +196,9 @@ class PlaceDetailView(PlaceViewBase, AbstractAuthedIndigoView, TemplateView):
 
         return {"new_tasks_added": new_tasks_added, "tasks_completed": tasks_completed}
 
-    def get_top_contributors(self):
-        top_contributors = Task.objects\
-            .filter(country=self.country, locality=self.locality, state='done')\
-            .values('submitted_by_user')\
-            .annotate(task_count=Count('submitted_by_user'))\
-            .exclude(task_count=0)\
-            .order_by('-task_count')[:10]
+    def get_top_contributors(self, summary):
+        top_contributors = [{'submitted_by_user': user_id, 'task_count': n}
+                            for user_id, n in summary['top_contributors']]
 
         users = {u.id: u for u in User.objects.filter(id__in=[c['submitted_by_user'] for c in top_contributors])}
         for user in top_contributors:
@@ -218,9 +211,11 @@ class PlaceDetailView(PlaceViewBase, AbstractAuthedIndigoView, TemplateView):
                    .filter(country=self.country, locality=self.locality) \
                    .order_by('-created_at')[:5]
 
-    def get_works_by_subtype(self, works):
-        pairs = list(Counter([Subtype.for_abbreviation(w.subtype) for w in works]).items())
-        pairs = [list(p) for p in pairs]
+    def get_works_by_subtype(self, summary):
+        counts = Counter()
+        for abbr, n in summary['works_by_subtype'].items():
+            counts[Subtype.for_abbreviation(abbr)] += n
+        pairs = [list(p) for p in counts.items()]
         # sort by count, decreasing
         pairs.sort(key=lambda p: p[1], reverse=True)
 
@@ -230,12 +225,11 @@ class PlaceDetailView(PlaceViewBase, AbstractAuthedIndigoView, TemplateView):
 
         return pairs
 
-    def calculate_open_tasks(self):
-        tasks = Task.objects.unclosed().filter(country=self.country, locality=self.locality)
-        total_open_tasks = tasks.count()
-        pending_review_tasks = tasks.filter(state='pending_review').count()
-        open_tasks = tasks.filter(state='open').exclude(assigned_to__isnull=False).count()
-        assigned_tasks = tasks.filter(state='open').exclude(assigned_to=None).count()
+    def calculate_open_tasks(self, summary):
+        total_open_tasks = summary['n_open_tasks']
+        pending_review_tasks = summary['tasks_by_state'].get('pending_review', 0)
+        assigned_tasks = summary['n_assigned_open_tasks']
+        open_tasks = summary['tasks_by_state'].get('open', 0) - assigned_tasks
 
         open_tasks_chart = [{
                 'state': 'open',
@@ -257,16 +251,13 @@ class PlaceDetailView(PlaceViewBase, AbstractAuthedIndigoView, TemplateView):
             }]
 
         # open tasks by label
-        labels = TaskLabel.objects.filter(tasks__in=tasks) \
-            .annotate(n_tasks=Count('tasks__id'))
-
         labels_chart = []
-        for l in labels:
+        for l in summary['open_tasks_by_label']:
             labels_chart.append({
-                'count': l.n_tasks,
-                'title': l.title,
-                'slug': l.slug,
-                'percentage': int((l.n_tasks / (total_open_tasks or 1)) * 100)
+                'count': l['count'],
+                'title': l['title'],
+                'slug': l['slug'],
+                'percentage': int((l['count'] / (total_open_tasks or 1)) * 100)
             })
 
         return {"open_tasks_chart": open_tasks_chart, "labels_chart": labels_chart, "total_open_tasks": total_open_tasks}
@@ -563,25 +554,17 @@ class PlaceMetricsView(PlaceViewBase, AbstractAuthedIndigoView, TemplateView, Pl
             [m.date.isoformat(), m.n_expressions]
             for m in metrics])
 
+        summary = place_summary(self.place)
+
         # works by year
-        works = Work.objects\
-            .filter(country=self.country, locality=self.locality)\
-            .select_related(None).prefetch_related(None).all()
-        years = Counter([int(w.year) for w in works])
+        years = dict(summary['works_by_year'])
         self.add_zero_years(years)
         years = list(years.items())
         years.sort()
         context['works_by_year'] = json.dumps(years)
 
         # amendments by year
-        years = Amendment.objects\
-            .filter(amended_work__country=self.country, amended_work__locality=self.locality)\
-            .annotate(year=Extract('date', 'year'))\
-            .values('year')\
-            .annotate(n=Count('id'))\
-            .order_by()\
-            .all()
-        years = {x['year']: x['n'] for x in years}
+        years = dict(summary['amendments_by_year'])
         self.add_zero_years(years)
         years = list(years.items())
         years.sort()
@@ -593,7 +576,10 @@ class PlaceMetricsView(PlaceViewBase, AbstractAuthedIndigoView, TemplateView, Pl
                 return 'Act'
             st = Subtype.for_abbreviation(abbr)
             return st.name if st else abbr
-        pairs = list(Counter([subtype_name(w.subtype) for w in works]).items())
+        pairs = Counter()
+        for abbr, n in summary['works_by_subtype'].items():
+            pairs[subtype_name(abbr)] += n
+        pairs = list(pairs.items())
         pairs.sort(key=lambda p: p[1], reverse=True)
         context['subtypes'] = json.dumps(pairs)
 
@@ -661,14 +647,6 @@ class PlaceLocalitiesView(PlaceViewBase, AbstractAuthedIndigoView, TemplateView,
 
         context['localities'] = Locality.objects \
             .filter(country=self.country) \
-            .annotate(n_works=Count('works')) \
-            .annotate(n_open_tasks=Subquery(
-                Task.objects.filter(state__in=Task.OPEN_STATES, locality=OuterRef('pk'))
-                    .values('locality')
-                    .annotate(cnt=Count('pk'))
-                    .values('cnt'),
-                output_field=IntegerField()
-            ))\
             .annotate(p_breadth_complete=Subquery(
                 DailyWorkMetrics.objects.filter(locality=OuterRef('code'))
                 .order_by('-date')
@@ -676,6 +654,7 @@ class PlaceLocalitiesView(PlaceViewBase, AbstractAuthedIndigoView, TemplateView,
                 output_field=IntegerField()
             ))\
             .all()
+        self.add_summaries(context['localities'])
 
         # place activity
         since = now() - timedelta(days=14)
@@ -15,6 +15,7 @@ from django.views.generic.list import MultipleObjectMixin
 from django.http import Http404, JsonResponse
 from django.urls import reverse
 from django.shortcuts import redirect, get_object_or_404
+from django.template.loader import render_to_string
 from reversion import revisions as reversion
 import datetime
 
@@ -24,6 +25,8 @@ from indigo_api.models import Subtype, Work, Amendment, Document, Task, Publicat
 from indigo_api.serializers import WorkSerializer
 from indigo_api.views.attachments import view_attachment
 from indigo_api.signals import work_changed
+from indigo_app.batch_import import get_bulk_creator, run_batch_import
+from indigo_app.models import BatchImportJob
 from indigo_app.revisions import decorate_versions
 from indigo_app.forms import BatchCreateWorkForm, ImportDocumentForm, WorkForm, CommencementForm, NewCommencementForm
 from indigo_metrics.models import WorkMetrics
@@ -829,16 +832,26 @@ class BatchAddWorkView(PlaceViewBase, AbstractAuthedIndigoView, FormView):
     @property
     def bulk_creator(self):
         if not self._bulk_creator:
-            locality_code = self.locality.code if self.locality else None
-            self._bulk_creator = plugins.for_locale('bulk-creator', self.country.code, None, locality_code)
-            self._bulk_creator.country = self.country
-            self._bulk_creator.locality = self.locality
-            self._bulk_creator.request = self.request
-            self._bulk_creator.user = self.request.user
-            self._bulk_creator.testing = False
+            self._bulk_creator = get_bulk_creator(self.country, self.locality, self.request.user, self.request)
         return self._bulk_creator
 
+    @property
+    def job(self):
+        """ The batch import job being shown, if any.
+        """
+        job_id = self.request.GET.get('job')
+        if job_id and job_id.isdigit():
+            return BatchImportJob.objects.filter(pk=job_id, country=self.country, locality=self.locality).first()
+
     def get_initial(self):
+        job = self.job
+        if job:
+            return {
+                'spreadsheet_url': job.spreadsheet_url,
+                'sheet_name': job.sheet_name,
+                'workflow': job.workflow,
+            }
+
         return {
             'spreadsheet_url': self.place.settings.spreadsheet_url,
         }
@@ -875,32 +888,73 @@ class BatchAddWorkView(PlaceViewBase, AbstractAuthedIndigoView, FormView):
     def get_context_data(self, **kwargs):
         context = super(BatchAddWorkView, self).get_context_data(**kwargs)
         context['bulk_creator'] = self.bulk_creator
+
+        job = self.job
+        if job and 'works' not in kwargs:
+            context['job'] = job
+            context['works'] = job.results
+            context['dry_run'] = job.dry_run
+            context['error'] = job.error
+            context['spreadsheet_url'] = job.spreadsheet_url
+
         return context
 
     def form_valid(self, form):
-        error = None
-        works = None
-        dry_run = 'preview' in form.data
-
         if ('import' in form.data or 'preview' in form.data) and (
             # either no gsheets, or we have a sheet name
             not self.bulk_creator.is_gsheets_enabled or form.cleaned_data.get('sheet_name')):
 
-            workflow = form.cleaned_data['workflow']
+            job = BatchImportJob.objects.create(
+                country=self.country,
+                locality=self.locality,
+                workflow=form.cleaned_data['workflow'],
+                spreadsheet_url=form.cleaned_data['spreadsheet_url'],
+                sheet_name=form.cleaned_data.get('sheet_name'),
+                dry_run='preview' in form.data,
+                created_by_user=self.request.user,
+            )
+            run_batch_import(job.pk)
+
+            job.refresh_from_db()
+            if job.status == job.DONE and not job.dry_run:
+                messages.success(self.request, f"Imported {len([r for r in job.results if r['status'] == 'success'])} works.")
+
+            url = reverse('new_batch_work', kwargs={'place': self.place.place_code})
+            return redirect(f'{url}?job={job.pk}')
+
+        context_data = self.get_context_data(works=None, form=form, spreadsheet_url=form.cleaned_data['spreadsheet_url'])
+        return self.render_to_response(context_data)
 
-            try:
-                table = self.bulk_creator.get_datatable(
-                    form.cleaned_data['spreadsheet_url'],
-                    form.cleaned_data['sheet_name'])
 
-                works = self.bulk_creator.create_works(table, dry_run, workflow)
-                if not dry_run:
-                    messages.success(self.request, f"Imported {len([w for w in works if w.status == 'success'])} works.")
-            except ValidationError as e:
-                error = str(e)
+class BatchImportJobView(PlaceViewBase, AbstractAuthedIndigoView, DetailView):
+    """ The progress of a batch import job, as JSON, including the results of the rows processed so far.
+    """
+    # permissions
+    permission_required = ('indigo_api.bulk_add_work',)
+    context_object_name = 'job'
 
-        context_data = self.get_context_data(works=works, error=error, form=form, dry_run=dry_run)
-        return self.render_to_response(context_data)
+    def get_queryset(self):
+        return BatchImportJob.objects.filter(country=self.country, locality=self.locality)
+
+    def render_to_response(self, context, **response_kwargs):
+        job = self.object
+        results_html = render_to_string('indigo_api/_work_new_batch_results.html', {
+            'job': job,
+            'works': job.results,
+            'dry_run': job.dry_run,
+            'spreadsheet_url': job.spreadsheet_url,
+            'place': self.place,
+        }, request=self.request)
+
+        return JsonResponse({
+            'status': job.status,
+            'finished': job.finished,
+            'phase': job.phase,
+            'rows_done': job.rows_done,
+            'rows_total': job.rows_total,
+            'error': job.error,
+            'results_html': results_html,
+        })
 
 
 class ImportDocumentView(WorkViewBase, FormView):
@@ -1,14 +1,26 @@
 # coding=utf-8
-from django.http import HttpResponse
-import io
+import tempfile
+
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import FileResponse
 import xlsxwriter
 
-from indigo_api.models import Amendment
+from indigo_api.models import Amendment, Commencement, Work
+
+
+# works are loaded and have their relationships prefetched in chunks of this size, so that
+# memory use doesn't grow with the number of works being exported
+CHUNK_SIZE = 1000
 
 
 def generate_xlsx(queryset, filename, full_index):
-    output = io.BytesIO()
-    workbook = xlsxwriter.Workbook(output)
+    """ Build a spreadsheet of the works in +queryset+, and return a response that streams it.
+
+    The workbook is written in xlsxwriter's constant memory mode to a temporary file,
+    which is deleted once the response has been sent.
+    """
+    output = tempfile.NamedTemporaryFile(suffix='.xlsx')
+    workbook = xlsxwriter.Workbook(output.name, {'constant_memory': True})
 
     if full_index:
         write_full_index(workbook, queryset)
@@ -19,9 +31,24 @@ def generate_xlsx(queryset, filename, full_index):
     workbook.close()
     output.seek(0)
 
-    response = HttpResponse(output, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="%s"' % filename
-    return response
+    return FileResponse(output, as_attachment=True, filename=filename,
+                        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+
+def iter_works(queryset, *lookups):
+    """ Iterate over the works in +queryset+, in chunks, prefetching +lookups+ for each chunk.
+    """
+    chunk = []
+    for work in queryset.select_related('country__country', 'locality__country__country').iterator(chunk_size=CHUNK_SIZE):
+        chunk.append(work)
+        if len(chunk) == CHUNK_SIZE:
+            prefetch_related_objects(chunk, *lookups)
+            yield from chunk
+            chunk = []
+
+    if chunk:
+        prefetch_related_objects(chunk, *lookups)
+        yield from chunk
 
 
 def write_works(workbook, queryset):
@@ -35,7 +62,8 @@ def write_works(workbook, queryset):
     for position, title in enumerate(works_sheet_columns, 1):
         works_sheet.write(0, position, title)
 
-    for row, work in enumerate(queryset, 1):
+    works = iter_works(queryset.select_related('parent_work'), 'commencements')
+    for row, work in enumerate(works, 1):
         works_sheet.write(row, 0, row)
         works_sheet.write(row, 1, work.frbr_uri)
         works_sheet.write(row, 2, work.place.place_code)
@@ -62,8 +90,15 @@ def write_relationships(workbook, queryset):
     for position, title in enumerate(relationships_sheet_columns, 1):
         relationships_sheet.write(0, position, title)
 
+    works = iter_works(
+        queryset.select_related('parent_work'),
+        Prefetch('amendments_made', queryset=Amendment.objects.select_related('amended_work')),
+        'repealed_works',
+        Prefetch('commencements_made', queryset=Commencement.objects.select_related('commenced_work')),
+    )
+
     row = 1
-    for work in queryset:
+    for work in works:
         family = []
 
         # parent work
@@ -75,20 +110,18 @@ def write_relationships(workbook, queryset):
             })
 
         # amended works
-        amended = Amendment.objects.filter(amending_work=work).prefetch_related('amended_work').all()
         family = family + [{
             'rel': 'amends',
             'work': a.amended_work.frbr_uri,
             'date': a.date
-        } for a in amended]
+        } for a in work.amendments_made.all()]
 
         # repealed works
-        repealed_works = work.repealed_works.all()
         family = family + [{
             'rel': 'repeals',
             'work': r.frbr_uri,
             'date': r.repealed_date
-        } for r in repealed_works]
+        } for r in work.repealed_works.all()]
 
         # commenced works
         family = family + [{
@@ -130,8 +163,17 @@ def write_full_index(workbook, works):
     for position, title in enumerate(columns):
         sheet.write(0, position, title)
 
-    # gather the works and their related information
-    rows = []
+    works = iter_works(
+        works.select_related('parent_work', 'repealed_by'),
+        Prefetch('commencements', queryset=Commencement.objects.select_related('commencing_work').order_by('date')),
+        Prefetch('amendments', queryset=Amendment.objects.select_related('amending_work').order_by('date')),
+        Prefetch('commencements_made', queryset=Commencement.objects.select_related('commenced_work').order_by('date')),
+        Prefetch('amendments_made', queryset=Amendment.objects.select_related('amended_work').order_by('date')),
+        Prefetch('repealed_works', queryset=Work.objects.order_by('repealed_date')),
+        'taxonomies', 'child_works',
+    )
+
+    row = 0
     for work in works:
         """ how many rows will we need for this work?
             a minimum of one, plus more if there are multiple commencements / amendments / repeals
@@ -139,11 +181,11 @@ def write_full_index(workbook, works):
             grab the commencements / amendments / repeals while we're at it
         """
         n_rows = 1
-        commencements_passive = work.commencements.all().order_by('date')
-        amendments_passive = work.amendments.all().order_by('date')
-        commencements_active = work.commencements_made.all().order_by('date')
-        amendments_active = work.amendments_made.all().order_by('date')
-        repeals_active = work.repealed_works.all().order_by('repealed_date')
+        commencements_passive = work.commencements.all()
+        amendments_passive = work.amendments.all()
+        commencements_active = work.commencements_made.all()
+        amendments_active = work.amendments_made.all()
+        repeals_active = work.repealed_works.all()
 
         for relation in [commencements_passive, amendments_passive,
                          commencements_active, amendments_active, repeals_active]:
@@ -159,13 +201,8 @@ def write_full_index(workbook, works):
             'repeals_active': repeals_active,
         }
 
-        rows.append(info)
-
-    # write the works
-    row = 0
-    for info in rows:
-        work = info.get('work')
-        for n in range(info.get('n_rows')):
+        # write the work
+        for n in range(n_rows):
             row += 1
             sheet.write(row, 0, work.country.code)
             sheet.write(row, 1, work.locality.code if work.locality else None)
@@ -1,15 +1,20 @@
+import io
 import json
 import tempfile
+import zipfile
 from datetime import date
 
 from mock import patch
-from django.test.utils import override_settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import override_settings, CaptureQueriesContext
 from django.conf import settings
+from django.core.files.storage import default_storage
 from sass_processor.processor import SassProcessor
 from rest_framework.test import APITestCase
 
-from indigo_api.exporters import PDFExporter
-from indigo_api.models import Country
+from indigo_api.exporters import PDFExporter, HTMLExporter
+from indigo_api.models import Commencement, Country, Document, Work
 
 
 # Ensure the processor runs during tests. It doesn't run when DEBUG=False (ie. during testing),
@@ -128,6 +133,29 @@ class ContentAPIV2TestMixin:
         self.assertIn('class="colophon"', response.content.decode('utf-8'))
         self.assertIn('class="toc"', response.content.decode('utf-8'))
 
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_published_html_cached(self):
+        with patch.object(HTMLExporter, 'render', wraps=HTMLExporter.render, autospec=True) as render:
+            response = self.client.get(self.api_path + '/akn/za/act/2014/10/eng.html')
+            self.assertEqual(response.status_code, 200)
+            html = response.content.decode('utf-8')
+            self.assertEqual(1, render.call_count)
+
+            # served from the cache
+            response = self.client.get(self.api_path + '/akn/za/act/2014/10/eng.html')
+            self.assertEqual(html, response.content.decode('utf-8'))
+            self.assertEqual(1, render.call_count)
+
+            # different options are cached separately
+            response = self.client.get(self.api_path + '/akn/za/act/2014/10/eng.html?resolver=none')
+            self.assertEqual(2, render.call_count)
+
+            # saving the document invalidates the cache
+            for doc in Document.objects.filter(frbr_uri='/akn/za/act/2014/10'):
+                doc.save()
+            response = self.client.get(self.api_path + '/akn/za/act/2014/10/eng.html')
+            self.assertEqual(3, render.call_count)
+
     def test_published_listing(self):
         response = self.client.get(self.api_path + '/akn/za/')
         self.assertEqual(response.status_code, 200)
@@ -151,12 +179,111 @@ class ContentAPIV2TestMixin:
         self.assertEqual(response.accepted_media_type, 'application/pdf')
         self.assertIn('pdf-content', response.content.decode('utf-8'))
 
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_published_listing_pdf_parallel(self):
+        def capture_html(args, **kwargs):
+            # the last argument is the HTML file
+            with open(args[-1][len('file://'):], encoding='utf-8') as f:
+                html.append(f.read())
+            return b'pdf-content'
+
+        html = []
+        old_workers = settings.INDIGO['RENDER_MANY_WORKERS']
+        try:
+            with patch.object(PDFExporter, '_wkhtmltopdf', side_effect=capture_html):
+                for workers in [1, 2]:
+                    settings.INDIGO['RENDER_MANY_WORKERS'] = workers
+                    response = self.client.get(self.api_path + '/akn/za/act.pdf')
+                    self.assertEqual(response.status_code, 200)
+        finally:
+            settings.INDIGO['RENDER_MANY_WORKERS'] = old_workers
+
+        # rendering in parallel produces the same HTML, in the same order
+        self.assertIn('akoma-ntoso', html[0])
+        self.assertEqual(html[0], html[1])
+
+    def test_published_listing_epub(self):
+        old_workers = settings.INDIGO['RENDER_MANY_WORKERS']
+        try:
+            for workers in [1, 2]:
+                settings.INDIGO['RENDER_MANY_WORKERS'] = workers
+                response = self.client.get(self.api_path + '/akn/za/act.epub')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.accepted_media_type, 'application/epub+zip')
+                self.assertTrue(response.content.startswith(b'PK'))
+        finally:
+            settings.INDIGO['RENDER_MANY_WORKERS'] = old_workers
+
+    @patch.object(PDFExporter, '_wkhtmltopdf', return_value='pdf-content')
+    def test_published_pdf_render_store(self, mock):
+        settings.INDIGO['RENDER_STORE'] = True
+        settings.INDIGO['RENDER_BACKGROUND'] = True
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir, override_settings(MEDIA_ROOT=tmpdir):
+                # not rendered yet; during tests, the background render happens immediately
+                response = self.client.get(self.api_path + '/akn/za/act/2014/10.pdf')
+                self.assertEqual(response.status_code, 202)
+                self.assertEqual(response['Location'], 'http://' + self.api_host + self.api_path + '/akn/za/act/2014/10.pdf')
+                self.assertEqual(mock.call_count, 1)
+
+                # served from the store, for both forms of the URL
+                response = self.client.get(self.api_path + '/akn/za/act/2014/10.pdf')
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('pdf-content', response.content.decode('utf-8'))
+
+                response = self.client.get(self.api_path + '/akn/za/act/2014/10/eng.pdf')
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('pdf-content', response.content.decode('utf-8'))
+                self.assertEqual(mock.call_count, 1)
+        finally:
+            settings.INDIGO['RENDER_STORE'] = False
+            settings.INDIGO['RENDER_BACKGROUND'] = False
+
+    @patch.object(PDFExporter, '_wkhtmltopdf', return_value='pdf-content')
+    def test_published_listing_pdf_render_store_purged(self, mock):
+        settings.INDIGO['RENDER_STORE'] = True
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir, override_settings(MEDIA_ROOT=tmpdir):
+                response = self.client.get(self.api_path + '/akn/za/act.pdf')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(1, len(default_storage.listdir('renders/many')[1]))
+
+                # changing one of the documents deletes the artifact
+                document = Document.objects.published().filter(frbr_uri='/akn/za/act/2014/10').first()
+                document.save()
+                self.assertEqual([], default_storage.listdir('renders/many')[1])
+        finally:
+            settings.INDIGO['RENDER_STORE'] = False
+
     def test_published_listing_pagination(self):
         response = self.client.get(self.api_path + '/akn/za/')
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.accepted_media_type, 'application/json')
         self.assertEqual(set(response.data.keys()), set(['next', 'previous', 'count', 'results', 'links']))
 
+    def test_published_listing_queries(self):
+        """ The number of queries for a listing doesn't depend on the number of documents listed.
+        """
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(self.api_path + '/akn/za/')
+                self.assertEqual(response.status_code, 200)
+            return len(response.data['results']), len(ctx.captured_queries)
+
+        n_docs, n_queries = count_queries()
+
+        user = User.objects.get(pk=1)
+        za = Country.for_code('za')
+        for i in range(5):
+            work = Work.objects.create(frbr_uri=f'/akn/za/act/2030/{i + 1}', title=f'Test {i}', country=za,
+                                       publication_date=date(2030, 1, 1), created_by_user=user)
+            Commencement.objects.create(commenced_work=work, date=date(2030, 1, 1), main=True, created_by_user=user)
+            for expression_date in [date(2030, 1, 1), date(2030, 6, 1)]:
+                Document(work=work, expression_date=expression_date, language=za.primary_language,
+                         draft=False, created_by_user=user).save()
+
+        self.assertEqual((n_docs + 5, n_queries), count_queries())
+
     def test_published_listing_html_404(self):
         # explicitly asking for html is bad
         response = self.client.get(self.api_path + '/akn/za/act.html')
@@ -475,6 +602,17 @@ class ContentAPIV2TestMixin:
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.accepted_media_type, 'application/zip')
 
+    def test_published_zipfile_streamed(self):
+        response = self.client.get(self.api_path + '/akn/za/act/2001.zip')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Disposition'].startswith('attachment; filename='))
+
+        zf = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(zf.testzip())
+        self.assertIn('2001-8/main.xml', zf.namelist())
+        self.assertTrue(zf.read('2001-8/main.xml').startswith(b'<akomaNtoso'))
+
     def test_published_frbr_urls(self):
         response = self.client.get(self.api_path + '/akn/za/act/2014/10/eng@2014-02-12.json')
         self.assertEqual(response.status_code, 200)
@@ -97,7 +97,7 @@ class PublishedDocumentSerializer(DocumentSerializer, PublishedDocUrlMixin):
     def get_points_in_time(self, doc):
         result = []
 
-        expressions = doc.work.expressions().published()
+        expressions = doc.work.published_expressions()
         for date, group in groupby(expressions, lambda e: e.expression_date):
             result.append({
                 'date': datestring(date),
@@ -1,7 +1,10 @@
 import re
+from urllib.parse import quote
 
+from django.db.models import Prefetch
 from django.http import Http404
 from django.shortcuts import redirect
+from django.utils.http import RFC3986_SUBDELIMS
 from rest_framework import mixins, viewsets, renderers
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from rest_framework.permissions import IsAuthenticated, BasePermission
@@ -142,13 +145,23 @@ class PublishedDocumentDetailView(DocumentViewMixin,
 
     """
 
-    # only published documents
-    queryset = DocumentViewMixin.queryset.published()
+    # only published documents, with everything the serializer needs, so that the number of
+    # queries doesn't grow with the number of documents
+    queryset = DocumentViewMixin.queryset.published().prefetch_related(
+        'work__country__country', 'work__locality', 'work__publication_document',
+        'work__commencements', 'work__commencements__commencing_work',
+        Prefetch('work__document_set', to_attr='_published_expressions',
+                 queryset=Document.objects.undeleted().published().no_xml()
+                 .select_related('language__language')
+                 .order_by('expression_date')),
+    )
     document_queryset = queryset
 
     serializer_class = PublishedDocumentSerializer
     # these determine what content negotiation takes place
     renderer_classes = (renderers.JSONRenderer, PDFRenderer, EPUBRenderer, AkomaNtosoRenderer, HTMLRenderer, ZIPRenderer)
+    # PDFs and ePUBs that aren't in the render store yet are rendered in the background (see render_store)
+    render_in_background = True
 
     def perform_content_negotiation(self, request, force=False):
         # force content negotiation to succeed, because sometimes the suffix format
@@ -286,31 +299,34 @@ class PublishedDocumentTOCView(DocumentViewMixin, FrbrUriViewMixin, mixins.Retri
 
     def get(self, request, **kwargs):
         document = self.get_document()
-        uri = document.doc.frbr_uri
+        # use the model's URI rather than the XML's, so that we don't need to parse the document
+        uri = document.expression_uri.clone()
         uri.expression_date = self.frbr_uri.expression_date
         return Response({'toc': self.table_of_contents(document, uri)})
 
     def table_of_contents(self, document, uri=None):
         toc = super().table_of_contents(document, uri)
 
-        # this updates the TOC entries by adding a 'url' component
+        # this builds new TOC entries with an added 'url' component
         # based on the document's URI and the path of the TOC subcomponent
-        uri = uri or document.doc.frbr_uri
+        uri = uri or document.expression_uri.clone()
+        uri.expression_component = None
+        uri.expression_subcomponent = None
+        # reverse the document's URL once, and append the component and subcomponent paths to it
+        base_url = self.published_doc_url(document, self.request, frbr_uri=uri.expression_uri())
 
         def add_url(item):
-            uri.expression_component = item['component']
-            uri.expression_subcomponent = item.get('subcomponent')
-            item['url'] = self.published_doc_url(
-                document, self.request, frbr_uri=uri.expression_uri()
-            )
+            path = '/!' + item['component']
+            if item.get('subcomponent'):
+                path += '/' + item['subcomponent']
+            item = dict(item, url=base_url + quote(path, safe=RFC3986_SUBDELIMS + '/~:@'))
 
-            for kid in item.get('children', []):
-                add_url(kid)
+            if 'children' in item:
+                item['children'] = [add_url(kid) for kid in item['children']]
 
-        for item in toc:
-            add_url(item)
+            return item
 
-        return toc
+        return [add_url(item) for item in toc]
 
 
 class PublishedDocumentMediaView(FrbrUriViewMixin,
@@ -10,11 +10,14 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--yesterday', action='store_true')
+        parser.add_argument('--changed', action='store_true',
+                            help='Only update metrics for works changed since metrics were last updated')
 
     def handle(self, *args, **options):
         date = datetime.date.today()
         if options['yesterday']:
             date = date - datetime.timedelta(days=1)
 
-        WorkMetrics.update_all_work_metrics()
+        since = WorkMetrics.last_updated() if options['changed'] else None
+        WorkMetrics.update_all_work_metrics(since=since)
         DailyWorkMetrics.update_daily_work_metrics(date)
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.12 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indigo_metrics', '0001_squashed_0008'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workmetrics',
+            name='updated_at',
+            field=models.DateTimeField(help_text='When these metrics were calculated', null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.12 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indigo_metrics', '0002_workmetrics_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkMetricsChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('work_id', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -1,8 +1,11 @@
 import logging
 import datetime
 
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import connection, models, transaction
+from django.db.models import Max, Prefetch, Q
+from django.utils import timezone
 
 from indigo_api.models import PublicationDocument, Country
 
@@ -26,17 +29,23 @@ class WorkMetrics(models.Model):
     # total percentage complete, a combination of breadth and depth completeness
     p_complete = models.IntegerField(null=True, help_text="Percentage complete")
 
+    updated_at = models.DateTimeField(null=True, help_text="When these metrics were calculated")
+
     # weight lent to depth completeness when calculating total completeness
     DEPTH_WEIGHT = 0.50
 
+    # number of works to calculate metrics for at once, when updating metrics for many works
+    CHUNK_SIZE = 500
+
     @classmethod
     def calculate(cls, work):
         metrics = WorkMetrics()
         metrics.n_points_in_time = len(work.possible_expression_dates())
-        metrics.n_languages = work.document_set.published().values('language').distinct().count() or 1
+        published = cls.published_documents(work)
+        metrics.n_languages = len({d.language_id for d in published}) or 1
         # non-stubs should always have at least one expression
         metrics.n_expected_expressions = 0 if work.stub else max(1, metrics.n_points_in_time * metrics.n_languages)
-        metrics.n_expressions = work.document_set.published().count()
+        metrics.n_expressions = len(published)
 
         # sum up factors towards breadth completeness
         points = [
@@ -64,9 +73,23 @@ class WorkMetrics(models.Model):
 
         return metrics
 
+    @classmethod
+    def published_documents(cls, work):
+        """ The work's published documents, using those prefetched by update_all_work_metrics if available.
+        """
+        if hasattr(work, '_metrics_published_documents'):
+            return work._metrics_published_documents
+        return list(cls.published_documents_queryset().filter(work=work))
+
+    @classmethod
+    def published_documents_queryset(cls):
+        from indigo_api.models import Document
+        return Document.objects.published().prefetch_related(None).only('id', 'work_id', 'language_id')
+
     @classmethod
     def create_or_update(cls, work):
         metrics = cls.calculate(work)
+        metrics.updated_at = timezone.now()
 
         try:
             existing = cls.objects.get(work=work)
@@ -81,13 +104,132 @@ class WorkMetrics(models.Model):
         return metrics
 
     @classmethod
-    def update_all_work_metrics(cls):
+    def update_all_work_metrics(cls, since=None):
+        """ Recalculate metrics for all works, or only for works touched since the datetime +since+.
+        """
         from indigo_api.models import Work
 
-        log.info('Updating individual work metrics.')
-        for work in Work.objects.all():
-            cls.create_or_update(work)
-        log.info('Work metrics updated')
+        updated_at = timezone.now()
+        if since:
+            log.info(f'Updating individual work metrics for works changed since {since}.')
+            work_ids = sorted(cls.works_touched_since(since))
+        else:
+            log.info('Updating individual work metrics.')
+            work_ids = list(Work.objects.order_by('pk').values_list('pk', flat=True))
+
+        cls.update_work_metrics(work_ids, updated_at)
+        log.info(f'Work metrics updated for {len(work_ids)} works')
+
+        if not settings.INDIGO.get('WORK_METRICS_INCREMENTAL'):
+            # the logged deletions have been handled, and nothing else will remove them
+            WorkMetricsChange.objects.filter(created_at__lte=updated_at).delete()
+
+    @classmethod
+    def update_work_metrics(cls, work_ids, updated_at):
+        """ Recalculate metrics for the works with the given ids.
+
+        Works are processed in chunks, with everything needed to calculate their metrics prefetched,
+        and the metrics are written with bulk queries.
+        """
+        from indigo_api.models import Work
+
+        work_ids = list(work_ids)
+        for i in range(0, len(work_ids), cls.CHUNK_SIZE):
+            works = list(Work.objects
+                         .filter(pk__in=work_ids[i:i + cls.CHUNK_SIZE])
+                         .select_related('publication_document')
+                         .prefetch_related('amendments', 'arbitrary_expression_dates', 'commencements', Prefetch(
+                             'document_set',
+                             queryset=cls.published_documents_queryset(),
+                             to_attr='_metrics_published_documents')))
+            cls.bulk_save([cls.calculate(w) for w in works], works, updated_at)
+
+    @classmethod
+    def update_changed_work_metrics(cls):
+        """ Recalculate metrics for works recorded in WorkMetricsChange, a batch at a time, and then
+        update today's daily metrics.
+
+        Returns the number of works updated.
+        """
+        n_works = 0
+
+        while True:
+            with transaction.atomic():
+                changes = list(WorkMetricsChange.objects
+                               .select_for_update(skip_locked=True)
+                               .order_by('id')
+                               .values_list('id', 'work_id')[:cls.CHUNK_SIZE])
+                if not changes:
+                    break
+
+                work_ids = {work_id for _, work_id in changes}
+                cls.update_work_metrics(sorted(work_ids), timezone.now())
+                WorkMetricsChange.objects.filter(id__in=[id for id, _ in changes]).delete()
+                n_works += len(work_ids)
+
+        if n_works:
+            DailyWorkMetrics.create_or_update(datetime.date.today())
+            log.info(f'Work metrics updated for {n_works} changed works')
+
+        return n_works
+
+    @classmethod
+    def bulk_save(cls, metrics, works, updated_at):
+        """ Save a list of calculated +metrics+ for the matching list of +works+.
+        """
+        existing = dict(cls.objects.filter(work__in=works).values_list('work_id', 'id'))
+        for m, work in zip(metrics, works):
+            m.work = work
+            m.id = existing.get(work.pk)
+            m.updated_at = updated_at
+
+        fields = [f.name for f in cls._meta.concrete_fields if f.name not in ['id', 'work']]
+        cls.objects.bulk_update([m for m in metrics if m.id], fields)
+        cls.objects.bulk_create([m for m in metrics if not m.id])
+
+    @classmethod
+    def works_touched_since(cls, since):
+        """ The ids of works that may have different metrics since the datetime +since+: those changed
+        since then, with related objects changed or deleted since then, or without metrics.
+
+        Deleted objects leave no updated_at behind, so deletions are found in the WorkMetricsChange log.
+        """
+        from indigo_api.models import Work, Document, Amendment, ArbitraryExpressionDate, Commencement
+
+        ids = set(Work.objects
+                  .filter(Q(updated_at__gt=since) | Q(metrics__isnull=True)
+                          | Q(publication_document__updated_at__gt=since))
+                  .values_list('pk', flat=True))
+        ids.update(Document.objects.filter(updated_at__gt=since).values_list('work_id', flat=True))
+        ids.update(Amendment.objects.filter(updated_at__gt=since).values_list('amended_work_id', flat=True))
+        ids.update(ArbitraryExpressionDate.objects.filter(updated_at__gt=since).values_list('work_id', flat=True))
+        ids.update(Commencement.objects.filter(updated_at__gt=since).values_list('commenced_work_id', flat=True))
+        ids.update(WorkMetricsChange.objects.filter(created_at__gt=since).values_list('work_id', flat=True))
+        return ids
+
+    @classmethod
+    def last_updated(cls):
+        """ When the most recent update of work metrics started.
+        """
+        return cls.objects.aggregate(last=Max('updated_at'))['last']
+
+
+class WorkMetricsChange(models.Model):
+    """ A log of works whose metrics may have changed, and which must be updated by
+    WorkMetrics.update_changed_work_metrics. A work may be in the log more than once.
+
+    Deletions of objects that affect a work's metrics are always logged, even when metrics aren't
+    updated incrementally, so that WorkMetrics.works_touched_since can find them.
+
+    This records the work's id rather than a foreign key, so that changes can be recorded
+    while a work is being deleted.
+    """
+    work_id = models.IntegerField(null=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def record(cls, work_id):
+        cls.objects.create(work_id=work_id)
 
 
 class DailyWorkMetrics(models.Model):
@@ -1,8 +1,12 @@
+from django.conf import settings
+from django.db import transaction
 from django.db.models import signals
 from django.dispatch import receiver
 from actstream.models import Action
 
-from indigo_metrics.models import DailyPlaceMetrics
+from indigo_api.models import Work, Document, Amendment, Commencement, ArbitraryExpressionDate, PublicationDocument
+from indigo_metrics.models import DailyPlaceMetrics, WorkMetricsChange
+from indigo_metrics.tasks import queue_changed_work_metrics
 
 
 @receiver(signals.post_save, sender=Action)
@@ -12,3 +16,46 @@ def action_created(sender, instance, **kwargs):
     if kwargs['created']:
         if instance.data and instance.data.get('place_code'):
             DailyPlaceMetrics.record_activity(instance)
+
+
+# how to find the id of the work whose metrics may be changed by a saved or deleted object
+CHANGED_WORK_ID = {
+    Work: lambda work: work.pk,
+    Document: lambda doc: doc.work_id,
+    Amendment: lambda amendment: amendment.amended_work_id,
+    Commencement: lambda commencement: commencement.commenced_work_id,
+    ArbitraryExpressionDate: lambda date: date.work_id,
+    PublicationDocument: lambda pub_doc: pub_doc.work_id,
+}
+
+
+def work_metrics_changed(sender, instance, **kwargs):
+    """ Record that a work's metrics may have changed, and queue a task to update them.
+    Only used if INDIGO['WORK_METRICS_INCREMENTAL'] is set.
+    """
+    if kwargs.get('raw') or not settings.INDIGO.get('WORK_METRICS_INCREMENTAL'):
+        return
+
+    work_id = CHANGED_WORK_ID[sender](instance)
+    if work_id:
+        WorkMetricsChange.record(work_id)
+        transaction.on_commit(queue_changed_work_metrics)
+
+
+def work_metrics_deleted(sender, instance, **kwargs):
+    """ Record that a work's metrics may have changed because a related object was deleted. This is done
+    even if INDIGO['WORK_METRICS_INCREMENTAL'] isn't set, since a deletion leaves no other trace for
+    `update_daily_metrics --changed` to find.
+    """
+    work_id = CHANGED_WORK_ID[sender](instance)
+    if work_id:
+        WorkMetricsChange.record(work_id)
+        if settings.INDIGO.get('WORK_METRICS_INCREMENTAL'):
+            transaction.on_commit(queue_changed_work_metrics)
+
+
+for model in CHANGED_WORK_ID:
+    signals.post_save.connect(work_metrics_changed, sender=model)
+    # a deleted work's metrics are deleted with it
+    if model != Work:
+        signals.post_delete.connect(work_metrics_deleted, sender=model)
@@ -3,6 +3,7 @@ import logging
 
 from background_task import background
 from background_task.models import Task
+from django.conf import settings
 from django.utils import timezone
 
 from indigo_metrics.models import DailyWorkMetrics, WorkMetrics
@@ -26,6 +27,27 @@ def update_yesterdays_metrics():
         raise e
 
 
+@background(queue="indigo")
+def update_changed_work_metrics():
+    """ Task to update metrics for works that have changed, see WorkMetrics.update_changed_work_metrics.
+    """
+    try:
+        WorkMetrics.update_changed_work_metrics()
+    except Exception as e:
+        log.error(f"Error updating changed work metrics: {e}", exc_info=e)
+        raise e
+
+
+def queue_changed_work_metrics():
+    """ Queue a task to update metrics for changed works, unless one is already waiting to run.
+
+    The task is delayed by INDIGO['WORK_METRICS_INCREMENTAL_DELAY'] seconds, so that
+    changes made in the meantime are handled in the same batch.
+    """
+    if not Task.objects.filter(task_name=update_changed_work_metrics.name, locked_by=None).exists():
+        update_changed_work_metrics(schedule=settings.INDIGO.get('WORK_METRICS_INCREMENTAL_DELAY', 60))
+
+
 def setup_update_metrics_task(hour=1):
     now = timezone.now()
     at = now.replace(hour=hour, minute=0, second=0, microsecond=0)
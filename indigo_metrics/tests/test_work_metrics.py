@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
+import datetime
+
+from django.conf import settings
 from django.test import TestCase
 
-from indigo_api.models import Work
-from indigo_metrics.models import WorkMetrics
+from indigo_api.models import Work, Document, ArbitraryExpressionDate
+from indigo_metrics.models import WorkMetrics, WorkMetricsChange, DailyWorkMetrics
 
 
 class WorkMetricsTestCase(TestCase):
@@ -31,3 +34,57 @@ class WorkMetricsTestCase(TestCase):
         metrics = WorkMetrics.create_or_update(work)
         metrics.refresh_from_db()
         self.assertEqual(metrics.n_languages, 1)
+
+    def test_update_all_matches_individual(self):
+        WorkMetrics.update_all_work_metrics()
+
+        for work in Work.objects.all():
+            bulk = WorkMetrics.objects.get(work=work)
+            single = WorkMetrics.calculate(work)
+            for field in ['n_languages', 'n_expressions', 'n_points_in_time', 'n_expected_expressions',
+                          'p_depth_complete', 'p_breadth_complete', 'p_complete']:
+                self.assertEqual(getattr(single, field), getattr(bulk, field), f'{work} {field}')
+
+    def test_update_changed_since(self):
+        WorkMetrics.update_all_work_metrics()
+        since = WorkMetrics.last_updated()
+        WorkMetrics.objects.update(n_languages=99)
+
+        work = Work.objects.get(pk=1)
+        work.save()
+        WorkMetrics.update_all_work_metrics(since=since)
+
+        self.assertEqual(1, WorkMetrics.objects.get(work=work).n_languages)
+        self.assertEqual(99, WorkMetrics.objects.exclude(work=work).first().n_languages)
+
+    def test_update_changed_since_deleted(self):
+        work = Work.objects.get(pk=1)
+        date = ArbitraryExpressionDate.objects.create(work=work, date='2020-09-13', created_by_user_id=1)
+        WorkMetrics.update_all_work_metrics()
+        since = WorkMetrics.last_updated()
+        WorkMetrics.objects.update(n_points_in_time=99)
+
+        date.delete()
+        WorkMetrics.update_all_work_metrics(since=since)
+
+        self.assertEqual(1, WorkMetrics.objects.get(work=work).n_points_in_time)
+        self.assertFalse(WorkMetricsChange.objects.exists())
+
+    def test_update_changed(self):
+        old = settings.INDIGO.get('WORK_METRICS_INCREMENTAL')
+        settings.INDIGO['WORK_METRICS_INCREMENTAL'] = True
+        try:
+            work = Work.objects.get(pk=1)
+            WorkMetrics.create_or_update(work)
+            WorkMetrics.objects.update(n_expressions=99)
+
+            doc = Document.objects.filter(work=work).first()
+            doc.save()
+            self.assertEqual([work.pk], list(WorkMetricsChange.objects.values_list('work_id', flat=True)))
+
+            self.assertEqual(1, WorkMetrics.update_changed_work_metrics())
+            self.assertEqual(1, WorkMetrics.objects.get(work=work).n_expressions)
+            self.assertFalse(WorkMetricsChange.objects.exists())
+            self.assertTrue(DailyWorkMetrics.objects.filter(date=datetime.date.today()).exists())
+        finally:
+            settings.INDIGO['WORK_METRICS_INCREMENTAL'] = old
@@ -3,8 +3,6 @@
 from indigo.analysis.publications.base import BasePublicationFinder
 from indigo.plugins import plugins
 
-import requests
-
 
 @plugins.register('publications')
 class PublicationFinderZA(BasePublicationFinder):
@@ -31,7 +29,8 @@ class PublicationFinderZA(BasePublicationFinder):
             'jurisdiction_code': place,
         }
 
-        resp = requests.get(self.api_url, params=params, timeout=5.0)
+        resp = self.session.get(self.api_url, params=params, timeout=5.0)
+        resp.raise_for_status()
         items = resp.json()['results']
 
         return [{
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+import requests
+
+from indigo_za.publications import PublicationFinderZA
+
+
+class StubGazetteHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        self.requests.append(params)
+        number = params.get('issue_number', [''])[0]
+
+        if number == 'error':
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        body = json.dumps({'results': [{
+            'full_title': f'Government Gazette {number}',
+            'archive_url': f'https://example.com/gazettes/{number}.pdf',
+        }]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PublicationFinderZATestCase(SimpleTestCase):
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), StubGazetteHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        StubGazetteHandler.requests = []
+        caches['default'].clear()
+
+        self.old_ttl = settings.INDIGO.get('PUBLICATION_FINDER_CACHE_TTL')
+        settings.INDIGO['PUBLICATION_FINDER_CACHE_TTL'] = 60
+
+        self.finder = PublicationFinderZA()
+        self.finder.api_url = f'http://127.0.0.1:{self.server.server_port}/api/archived_gazettes/'
+
+    def tearDown(self):
+        settings.INDIGO['PUBLICATION_FINDER_CACHE_TTL'] = self.old_ttl
+        self.server.shutdown()
+        self.server.server_close()
+
+    def params(self, number):
+        return {'date': '2020-01-01', 'number': number, 'publication': 'Government Gazette'}
+
+    def test_find_many(self):
+        results = self.finder.find_many_publications([self.params(str(i)) for i in range(10)])
+        self.assertEqual(10, len(results))
+        self.assertEqual([[{
+            'title': f'Government Gazette {i}',
+            'url': f'https://example.com/gazettes/{i}.pdf',
+            'trustworthy': True,
+        }] for i in range(10)], results)
+        self.assertEqual(10, len(StubGazetteHandler.requests))
+
+    def test_cached(self):
+        self.finder.find_many_publications([self.params('1'), self.params('2')])
+        results = self.finder.find_many_publications([self.params('1'), self.params('2'), self.params('3')])
+        self.assertEqual('Government Gazette 3', results[2][0]['title'])
+        self.assertEqual(3, len(StubGazetteHandler.requests))
+
+    def test_errors(self):
+        results = self.finder.find_many_publications([self.params('1'), self.params('error')])
+        self.assertEqual('Government Gazette 1', results[0][0]['title'])
+        self.assertIsInstance(results[1], requests.HTTPError)
+
+        # errors aren't cached
+        self.finder.find_many_publications([self.params('error')])
+        self.assertEqual(3, len(StubGazetteHandler.requests))